@@ -0,0 +1,75 @@
+﻿# save.json codec benchmark: MizabotCodec against the previous object_pairs_hook
+# usage: python -m benchmark.codec [size in MB, default 50]
+import sys
+import json
+import random
+from datetime import datetime, timedelta
+from .common import loadBot, measure, report
+
+# previous deserializer (bot.py 5.59), strptime on every string
+def json_deserial_array(array):
+    a = []
+    for v in array:
+        if isinstance(v, list):
+            a.append(json_deserial_array(v))
+        elif isinstance(v, dict):
+            a.append(json_deserial_dict(list(v.items())))
+        elif isinstance(v, str):
+            try:
+                a.append(datetime.strptime(v, "%Y-%m-%dT%H:%M:%S"))
+            except ValueError:
+                a.append(v)
+        else:
+            a.append(v)
+    return a
+
+def json_deserial_dict(pairs):
+    d = {}
+    for k, v in pairs:
+        if isinstance(v, list):
+            d[k] = json_deserial_array(v)
+        elif isinstance(v, dict):
+            d[k] = json_deserial_dict(list(v.items()))
+        elif isinstance(v, str):
+            try:
+                d[k] = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
+            except ValueError:
+                d[k] = v
+        else:
+            d[k] = v
+    return d
+
+def makeSave(size): # synthetic save data of roughly size bytes once serialized, shaped like the real one
+    rand = random.Random(0)
+    base = datetime(2020, 1, 1)
+    data = {'newserver':{'servers':[], 'owners':[], 'pending':{}}, 'prefixes':{}, 'spark':[{}, []], 'reminders':{}, 'gbfids':{}, 'st':{}, 'gw':{'state':False}, 'extra':{}}
+    n = 0
+    while n < size:
+        uid = str(rand.randint(10**16, 10**18))
+        date = base + timedelta(seconds=rand.randint(0, 10**8))
+        data['spark'][0][uid] = [rand.randint(0, 90000), rand.randint(0, 300), rand.randint(0, 30), date]
+        data['gbfids'][uid] = rand.randint(1000000, 40000000)
+        data['reminders'][uid] = [[date + timedelta(hours=i), "reminder number {} for {}".format(i, uid)] for i in range(0, rand.randint(0, 4))]
+        if rand.random() < 0.1: data['prefixes'][uid] = rand.choice(['$', '!', '%', 'miza '])
+        n += 160 + 50 * len(data['reminders'][uid])
+    return data
+
+def main(size):
+    codec = loadBot().MizabotCodec()
+    data = makeSave(size)
+    elapsed, content = measure(lambda: json.dumps(data, default=codec.default))
+    print("synthetic save: {:,.1f} MB".format(len(content) / 1048576))
+    report("dumps", elapsed, len(content) / 1048576, 'MB')
+    elapsed, old = measure(lambda: json.loads(content, object_pairs_hook=json_deserial_dict))
+    report("loads (previous hook)", elapsed, len(content) / 1048576, 'MB')
+    elapsed, new = measure(lambda: codec.loads(content))
+    report("loads (MizabotCodec)", elapsed, len(content) / 1048576, 'MB')
+    elapsed, raw = measure(lambda: json.loads(content))
+    report("loads (plain json, no datetime)", elapsed, len(content) / 1048576, 'MB')
+    if old != new or new != data:
+        print("ERROR: the decoded data doesn't match")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(float(sys.argv[1]) * 1048576) if len(sys.argv) > 1 else 50 * 1048576))
@@ -0,0 +1,40 @@
+﻿# shared helpers for the benchmarks
+# run them from the repository root, ex: python -m benchmark.codec
+import os
+import time
+import types
+
+def loadBot(): # import the classes of bot.py without starting the bot (everything before the Start section)
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bot.py')
+    with open(path, encoding='utf-8-sig') as f:
+        src = f.read()
+    src = src[:src.index('# Start\n')]
+    module = types.ModuleType('bot')
+    module.__file__ = path
+    exec(compile(src, path, 'exec'), module.__dict__)
+    return module
+
+def measure(func, n=1): # call func n times, return (average time in seconds, last result)
+    res = None
+    start = time.perf_counter()
+    for i in range(0, n):
+        res = func()
+    return (time.perf_counter() - start) / n, res
+
+def report(name, elapsed, count=None, unit='op'): # print a result line
+    line = "{:<40} {:>10.3f} ms".format(name, elapsed * 1000)
+    if count is not None and elapsed > 0:
+        line += " {:>14,.0f} {}/s".format(count / elapsed, unit)
+    print(line)
+
+def latency(func, n): # call func n times, return the sorted durations in seconds
+    res = []
+    for i in range(0, n):
+        start = time.perf_counter()
+        func()
+        res.append(time.perf_counter() - start)
+    res.sort()
+    return res
+
+def percentile(durations, p): # durations must be sorted
+    return durations[min(len(durations) - 1, int(len(durations) * p))]
@@ -0,0 +1,106 @@
+﻿# stand-ins for the discord objects used by the commands, and an offline bot instance
+import json
+import contextlib
+from .common import loadBot
+
+class FakeUser():
+    def __init__(self, id, name, guild=None, bot=False):
+        self.id = id
+        self.name = name
+        self.display_name = name
+        self.mention = "<@{}>".format(id)
+        self.avatar_url = ""
+        self.bot = bot
+        self.guild = guild
+        self.sent = 0 # messages received
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+class FakeChannel():
+    def __init__(self, id):
+        self.id = id
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+class FakeGuild():
+    def __init__(self, id, name, member_count=0):
+        self.id = id
+        self.name = name
+        self.icon_url = ""
+        self.me = FakeUser(1, "MizaBOT", self, True)
+        self.members = [FakeUser(10**17 + i, "Member{}".format(i), self) for i in range(0, member_count)]
+        self.memberids = {m.id: m for m in self.members}
+        self.owner = self.me
+        self.owner_id = self.me.id
+
+    def get_member(self, id):
+        return self.memberids.get(id, None)
+
+class FakeMessage():
+    def __init__(self, author, channel, guild, content=""):
+        self.id = 1
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.content = content
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def remove_reaction(self, emoji, member):
+        pass
+
+class FakeContext():
+    def __init__(self, bot, guild, author=None, channel=None):
+        self.bot = bot
+        self.guild = guild
+        self.author = guild.members[0] if author is None else author
+        self.channel = FakeChannel(2) if channel is None else channel
+        self.message = FakeMessage(self.author, self.channel, guild)
+        self.prefix = '$'
+        self.command = None
+        self.embed = None # last embed sent
+
+    async def send(self, content=None, **kwargs):
+        self.embed = kwargs.get('embed', None)
+        return self.message
+
+class OfflineWeb(): # replace MizabotWeb, every request fails like when the network is down
+    @contextlib.asynccontextmanager
+    async def request(self, method, url, **kwargs):
+        raise ConnectionError("offline: {}".format(url))
+        yield
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def status(self):
+        return "offline"
+
+    async def close(self):
+        pass
+
+def makeBot(save): # build a real Mizabot in the current folder, with the local drive stand-in and the given save data, without connecting to discord
+    module = loadBot()
+    with open('config.json', 'w') as f:
+        json.dump({'tokens':{'drive_backend':'local', 'drive':'save', 'files':'files'}, 'ids':{'owner':0}, 'games':['Granblue Fantasy']}, f)
+    with open('save.json', 'w') as f:
+        module.MizabotCodec().dump(save, f)
+    bot = module.Mizabot()
+    module.bot = bot # MizabotHelp and a few tasks use the global
+    bot.web = OfflineWeb()
+    return module, bot
+
+def uploadFile(bot, path, name): # put a local file in the files folder of the local drive
+    if not bot.drive.saveDiskFile(path, "application/sql", name, bot.tokens['files']):
+        raise Exception("Couldn't upload {}".format(name))
+
+async def call(command, ctx, *args): # invoke a command callback directly (cooldowns and checks aren't applied)
+    if hasattr(command, 'callback'): return await command.callback(command.cog, ctx, *args)
+    return await command(ctx, *args)
@@ -0,0 +1,150 @@
+﻿# profile page extraction benchmark: ProfileParser against the previous BeautifulSoup code of $profile
+# usage: python -m benchmark.profile [folder of saved profile pages, default: synthetic pages] [page count for the synthetic corpus, default 300]
+import sys
+import os
+import re
+import random
+from bs4 import BeautifulSoup
+from xml.sax import saxutils as su
+from cogs.gbf_utility import ProfileParser
+from .common import measure, report
+
+# previous extraction (gbf_utility.py before the extractor), returns what $profile displays
+rankre = re.compile("Rank ([0-9])+")
+sumre = re.compile("<div id=\"js-fix-summon([0-9]{2})-name\" class=\"prt-fix-name\" name=\"[A-Za-z'-. ]+\">(Lvl [0-9]+ [A-Za-z'-. ]+)<\/div>")
+starre = re.compile("<span class=\"prt-current-npc-name\">\s*(Lvl [0-9]+ [A-Za-z'-.μ ]+)\s*<\/span>")
+starcomre = re.compile("<div class=\"prt-pushed-info\">(.+)<\/div>")
+empre = re.compile("<div class=\"txt-npc-rank\">([0-9]+)<\/div>")
+starringre = re.compile("<div class=\"ico-augment2-s\"><\/div>\s*<\/div>\s*<div class=\"prt-pushed-spec\">\s*<div class=\"prt-pushed-info\">")
+starplusre = re.compile("<div class=\"prt-quality\">(\+[0-9]+)<\/div>")
+
+def previous(data):
+    soup = BeautifulSoup(data, 'html.parser')
+    try: name = soup.find_all("span", class_="txt-other-name")[0].string
+    except: name = None
+    if name is None: return None
+    header = None
+    rarity = "R"
+    possible_headers = [("prt-title-bg-gld", "SSR"), ("prt-title-bg-slv", "SR"), ("prt-title-bg-nml", "R"), ("prt-title-bg-cpr", "R")]
+    for h in possible_headers:
+        try:
+            header = soup.find_all("div", class_=h[0])[0]
+            rarity = h[1]
+        except:
+            pass
+    if header is not None: rank = "**{}**".format(rankre.search(str(header)).group(0))
+    else: rank = ""
+    trophy = soup.find_all("div", class_="prt-title-name")[0].string
+    comment = su.unescape(soup.find_all("div", class_="prt-other-comment")[0].string).replace('\t', '').replace('\n', '')
+    mc_url = soup.find_all("img", class_="img-pc")[0]['src'].replace("/po/", "/talk/").replace("/img_low/", "/img/")
+    stats = soup.find_all("div", class_="num")
+    hp = int(stats[0].string)
+    atk = int(stats[1].string)
+    job = soup.find_all("div", class_="txt-other-job-info")[0].string
+    job_lvl = soup.find_all("div", class_="txt-other-job-level")[0].string.replace("  ", " ")
+    try:
+        try:
+            crew = soup.find_all("div", class_="prt-guild-name")[0].string
+            crewid = soup.find_all("div", class_="btn-guild-detail")[0]['data-location-href']
+            crew = "[{}](http://game.granbluefantasy.jp/#{})".format(crew, crewid)
+        except: crew = soup.find_all("div", class_="txt-notjoin")[0].string
+    except:
+        crew = None
+    summons = {}
+    for s in sumre.findall(data):
+        summons[s[0]] = s[1]
+    star = None
+    try:
+        beg = data.find('<div class="prt-inner-title">Star Character</div>')
+        end = data.find('<div class="prt-2tabs">', beg+1)
+        star_section = data[beg:end]
+        try:
+            ring = starringre.findall(star_section)[0]
+            msg = "ring "
+        except:
+            msg = ""
+        msg += "{}".format(starre.findall(star_section)[0])
+        try: msg += " **{}**".format(starplusre.findall(star_section)[0])
+        except: pass
+        try: msg += " ▫️ **{}** EMP".format(empre.findall(star_section)[0])
+        except: pass
+        starcom = starcomre.findall(star_section)
+        if starcom is not None and starcom[0] != "(Blank)": msg += "\n💬 ``{}``".format(su.unescape(starcom[0]))
+        star = msg
+    except:
+        pass
+    return (str(name), rarity, rank, str(trophy), comment, mc_url, hp, atk, str(job), job_lvl, None if crew is None else str(crew), summons, star)
+
+def current(parser, data): # same values from ProfileParser, built like the $profile command does
+    p = parser.parse(data)
+    if p.name is None: return None
+    rank = "" if p.rank is None else "**{}**".format(p.rank)
+    comment = su.unescape(p.comment).replace('\t', '').replace('\n', '')
+    if p.crew is not None and p.crewurl is not None: crew = "[{}](http://game.granbluefantasy.jp/#{})".format(p.crew, p.crewurl)
+    else: crew = p.nocrew
+    star = None
+    if p.star is not None and p.star['comment'] is not None:
+        star = "ring " if p.star['ring'] else ""
+        star += p.star['name']
+        if p.star['plus'] is not None: star += " **{}**".format(p.star['plus'])
+        if p.star['emp'] is not None: star += " ▫️ **{}** EMP".format(p.star['emp'])
+        if p.star['comment'] != "(Blank)": star += "\n💬 ``{}``".format(su.unescape(p.star['comment']))
+    return (p.name, p.rarity, rank, p.trophy, comment, p.mc.replace("/po/", "/talk/").replace("/img_low/", "/img/"), p.hp, p.atk, p.job, p.joblvl.replace("  ", " "), crew, p.summons, star)
+
+def makePage(rand, i): # synthetic page with the structure read by the extractors, padded with unrelated markup
+    words = ["Rage", "Bahamut", "Luminiera", "Omega", "Colossus", "Kaguya", "Agni", "Varuna", "Titan", "Zephyrus"]
+    filler = "".join(['<div class="prt-box-{0}"><div class="prt-inner-{0}"><span class="txt-{0}">{1}</span><img src="http://game-a.granbluefantasy.jp/assets_en/img/sp/ui/icon/{0}.png"></div></div>\n'.format(rand.randint(0, 999), rand.choice(words)) for j in range(0, 400)])
+    if rand.random() < 0.1: # private profile
+        return '<html><body>{}<div class="prt-private">This profile is private</div></body></html>'.format(filler)
+    page = ['<html><head><title>Profile</title></head><body>', filler[:len(filler)//2]]
+    page.append('<div class="prt-other-status"><div class="{}"><div class="prt-user-rank">Rank {}</div></div>'.format(rand.choice(["prt-title-bg-gld", "prt-title-bg-slv", "prt-title-bg-nml", "prt-title-bg-cpr"]), rand.randint(1, 300)))
+    page.append('<div class="prt-title-name">{}</div>'.format(rand.choice(["No Trophy Displayed", "Sky Sovereign", "Grand Order Slayer"])))
+    page.append('<span class="txt-other-name">Player{}&amp;Co</span>'.format(i))
+    page.append('<div class="prt-other-comment">{}</div>'.format(rand.choice(["hello &amp;lt;3", "\tgrinding\n", "looking for a crew"])))
+    page.append('<img class="img-pc" src="http://game-a.granbluefantasy.jp/assets_en/img_low/sp/assets/leader/po/{}_01.png">'.format(rand.randint(100000, 200000)))
+    page.append('<div class="prt-status"><div class="num">{}</div><div class="num">{}</div></div>'.format(rand.randint(1000, 99999), rand.randint(1000, 99999)))
+    page.append('<div class="txt-other-job-info">Kengo</div><div class="txt-other-job-level">Lv  {}</div></div>'.format(rand.randint(1, 20)))
+    if rand.random() < 0.8: page.append('<div class="prt-guild-name">Crew{}</div><div class="btn-guild-detail" data-location-href="guild/detail/{}"></div>'.format(i % 50, rand.randint(100000, 999999)))
+    else: page.append('<div class="txt-notjoin">Not in a crew</div>')
+    for slot in ['10', '11', '20', '21', '30', '31', '40', '41', '50', '51', '60', '61', '00', '01']:
+        if rand.random() < 0.8:
+            summon = " ".join(rand.sample(words, 2))
+            page.append('<div class="prt-fix-summon"><div id="js-fix-summon{}-name" class="prt-fix-name" name="{}">Lvl {} {}</div></div>'.format(slot, summon, rand.randint(1, 250), summon))
+    page.append(filler[len(filler)//2:])
+    if rand.random() < 0.9:
+        page.append('<div class="prt-inner-title">Star Character</div><div class="prt-pushed">')
+        page.append('<span class="prt-current-npc-name">\n Lvl {} {}\n</span>'.format(rand.randint(1, 100), rand.choice(words)))
+        if rand.random() < 0.5: page.append('<div class="prt-quality">+{}</div>'.format(rand.randint(1, 99)))
+        if rand.random() < 0.5: page.append('<div class="txt-npc-rank">{}</div>'.format(rand.randint(1, 50)))
+        if rand.random() < 0.5: page.append('<div class="prt-pushed-ring"><div class="ico-augment2-s"></div>\n</div>\n<div class="prt-pushed-spec">\n<div class="prt-pushed-info">{}</div>\n</div>'.format(rand.choice(["(Blank)", "best girl &amp; co"])))
+        else: page.append('<div class="prt-pushed-spec">\n<div class="prt-pushed-info">{}</div>\n</div>'.format(rand.choice(["(Blank)", "max uncap"])))
+        page.append('</div><div class="prt-2tabs"></div>')
+    page.append('</body></html>')
+    return "\n".join(page) # one element per line, like the game pages
+
+def main(folder, count):
+    if folder is not None:
+        pages = []
+        for f in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, f), encoding='utf-8') as file:
+                pages.append(file.read())
+    else:
+        rand = random.Random(0)
+        pages = [makePage(rand, i) for i in range(0, count)]
+    size = sum([len(p) for p in pages]) / 1048576
+    print("corpus: {} pages, {:,.1f} MB".format(len(pages), size))
+    parser = ProfileParser()
+    elapsed, old = measure(lambda: [previous(p) for p in pages])
+    report("previous (BeautifulSoup)", elapsed, len(pages), 'page')
+    elapsed, new = measure(lambda: [current(parser, p) for p in pages], 5)
+    report("ProfileParser", elapsed, len(pages), 'page')
+    diff = [i for i in range(0, len(pages)) if old[i] != new[i]]
+    if len(diff) > 0:
+        print("ERROR: {} pages don't match, first: {}".format(len(diff), diff[0]))
+        print(old[diff[0]])
+        print(new[diff[0]])
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else None, int(sys.argv[2]) if len(sys.argv) > 2 else 300))
@@ -0,0 +1,217 @@
+﻿# offline benchmark suite of the hot paths: a real Mizabot (local drive stand-in, no discord connection, no network), fake discord objects and generated data
+# usage: python -m benchmark.suite [--scale 1.0] [--only save,gwdb,summon,profile,ranking,help,parser] [--json results.json] [--baseline results.json] [--tolerance 1.5]
+# with --baseline, the exit code is 1 if a benchmark average is more than tolerance times slower than in the baseline file
+import sys
+import os
+import json
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from .common import latency, percentile
+from .codec import makeSave
+from .profile import makePage
+from .fakes import FakeGuild, FakeContext, makeBot, uploadFile, call
+
+class Suite():
+    def __init__(self, scale):
+        self.scale = scale
+        self.results = {} # name: {'n', 'avg', 'p50', 'p95'}
+        self.errors = []
+        self.rand = random.Random(0)
+
+    def add(self, name, durations, count=1, unit='op'): # durations in seconds, sorted. count = number of units processed by one call
+        r = {'n':len(durations), 'avg':sum(durations) / len(durations), 'p50':percentile(durations, 0.5), 'p95':percentile(durations, 0.95)}
+        self.results[name] = r
+        line = "{:<44} {:>6} × {:>9.3f} ms avg {:>9.3f} p50 {:>9.3f} p95".format(name, r['n'], 1000 * r['avg'], 1000 * r['p50'], 1000 * r['p95'])
+        if r['avg'] > 0: line += " {:>12,.0f} {}/s".format(count / r['avg'], unit)
+        print(line)
+
+    def run(self, name, func, n, count=1, unit='op'):
+        self.add(name, latency(func, n), count, unit)
+
+    async def runAsync(self, name, func, n, count=1, unit='op'): # func returns a coroutine
+        res = []
+        for i in range(0, n):
+            start = time.perf_counter()
+            await func()
+            res.append(time.perf_counter() - start)
+        res.sort()
+        self.add(name, res, count, unit)
+
+    def check(self, name, ok): # record a correctness problem
+        if not ok:
+            print("ERROR: {}".format(name))
+            self.errors.append(name)
+
+def n(suite, count): # number of iterations for the scale, at least 1
+    return max(1, int(count * suite.scale))
+
+def randomName(rand):
+    syllables = ["ka", "ri", "mi", "za", "lu", "no", "gra", "blue", "sky", "fal", "con", "to", "ra", "shi", "ve", "dark", "fire"]
+    return "".join(rand.choice(syllables) for i in range(0, rand.randint(2, 5))).capitalize()
+
+async def benchSave(suite, bot):
+    data = makeSave(n(suite, 5 * 1048576))
+    for k in data: setattr(bot, k, data[k]) # makeSave uses the save section names
+    bot.journal.rebuild(bot.getSaveData())
+    suite.run("save: full snapshot (json)", lambda: bot.save(full=True), 3)
+    uid = next(iter(bot.spark[0]))
+    def journal():
+        bot.spark[0][uid][0] += 1
+        bot.save(sections=['spark'])
+    suite.run("save: journal (spark section)", journal, 10)
+    before = bot.snapshot()
+    suite.run("save: load (drive + journal replay)", lambda: bot.drive.load() and bot.load(), 3)
+    suite.check("save/load round-trip changed the data", bot.snapshot() == before)
+
+def makeGWDB(suite, path, gwid, rand): # GW.sql like file: GW(id), crews (rank, id, name, then the points and totals of each day), players (rank, id, name, points)
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute("CREATE TABLE GW (id INTEGER)")
+    c.execute("INSERT INTO GW VALUES (?)", (gwid,))
+    c.execute("CREATE TABLE crews (ranking INTEGER, id INTEGER, name TEXT, preliminaries INTEGER, day1 INTEGER, total_1 INTEGER, day_2 INTEGER, total_2 INTEGER, day_3 INTEGER, total_3 INTEGER, day_4 INTEGER, total_4 INTEGER)")
+    crews = []
+    for i in range(0, n(suite, 30000)):
+        days = [rand.randint(0, 10**9) for j in range(0, 5)]
+        crews.append([i + 1, 100000 + i, randomName(rand)] + [days[0], days[1], sum(days[:2]), days[2], sum(days[:3]), days[3], sum(days[:4]), days[4], sum(days)])
+    c.executemany("INSERT INTO crews VALUES ({})".format(",".join(["?"] * 12)), crews)
+    c.execute("CREATE TABLE players (ranking INTEGER, id INTEGER, name TEXT, current_total INTEGER)")
+    players = [(i + 1, 1000000 + i, randomName(rand), rand.randint(0, 10**9)) for i in range(0, n(suite, 300000))]
+    c.executemany("INSERT INTO players VALUES (?, ?, ?, ?)", players)
+    conn.commit()
+    conn.close()
+    return crews, players
+
+async def benchGWDB(suite, bot, ctx):
+    gw = bot.get_cog('GW')
+    crews, players = makeGWDB(suite, "gen_GW.sql", 50, suite.rand)
+    makeGWDB(suite, "gen_GW_old.sql", 49, suite.rand)
+    uploadFile(bot, "gen_GW.sql", "GW.sql")
+    uploadFile(bot, "gen_GW_old.sql", "GW_old.sql")
+    await suite.runAsync("gwdb: download + indexes (both files)", gw.loadGWDB, 1)
+    rand = suite.rand
+    names = [r[2] for r in rand.sample(crews, 100)]
+    pnames = [r[2] for r in rand.sample(players, 100)]
+    await suite.runAsync("gwdb: searchGWDBCrew substring", lambda: gw.searchGWDBCrew(ctx, rand.choice(names)[1:5].lower(), 0), 200)
+    await suite.runAsync("gwdb: searchGWDBCrew exact name", lambda: gw.searchGWDBCrew(ctx, rand.choice(names), 1), 200)
+    await suite.runAsync("gwdb: searchGWDBCrew id", lambda: gw.searchGWDBCrew(ctx, rand.choice(crews)[1], 2), 200)
+    await suite.runAsync("gwdb: searchGWDBPlayer substring", lambda: gw.searchGWDBPlayer(ctx, rand.choice(pnames)[1:5].lower(), 0), 200)
+    ids = [r[1] for r in rand.sample(players, 1000)]
+    await suite.runAsync("gwdb: searchGWDBPlayers (1000 ids)", lambda: gw.searchGWDBPlayers(ctx, ids), 20)
+    res = await gw.searchGWDBCrew(ctx, crews[0][1], 2)
+    suite.check("gwdb: crew id search didn't find the crew", res[1] is not None and len(res[1]['result']) == 1 and res[1]['result'][0][2] == crews[0][2])
+    downloads = bot.drive.gdrive.calls.get('download', 0)
+    await suite.runAsync("gwdb: reload (unchanged files)", gw.loadGWDB, 1)
+    suite.check("gwdb: unchanged files downloaded again", bot.drive.gdrive.calls.get('download', 0) == downloads)
+
+async def benchSummon(suite, bot, ctx):
+    util = bot.get_cog('GBF_Utility')
+    rand = suite.rand
+    summons = ["colossus omega", "leviathan omega", "yggdrasil omega", "tiamat omega", "luminiera omega", "celeste omega", "agni", "varuna", "titan", "zephyrus", "zeus", "hades", "bahamut", "lucifer", "shiva", "europa", "alexiel", "grimnir", "metatron", "avatar"]
+    conn = sqlite3.connect("gen_summon.sql")
+    util.buildSumDB(conn)
+    date = datetime.utcnow()
+    batch = []
+    for i in range(0, n(suite, 20000)):
+        s = [(sn, rand.randint(1, 250)) for sn in rand.sample(summons, 10)]
+        batch.append((2000000 + i, randomName(rand), s, str(i)))
+        if len(batch) >= 1000:
+            util.writeSumBatch(conn, batch, date)
+            batch = []
+    util.writeSumBatch(conn, batch, date)
+    conn.close()
+    uploadFile(bot, "gen_summon.sql", "summon.sql")
+    await suite.runAsync("summon: download", util.sumdb.load, 1)
+    await suite.runAsync("summon: $summon name", lambda: call(util.summon, ctx, 'colossus', 'omega'), 100)
+    await suite.runAsync("summon: $summon level + name", lambda: call(util.summon, ctx, '200', rand.choice(summons)), 100)
+    await call(util.summon, ctx, 'colossus', 'omega')
+    suite.check("summon: no result", ctx.embed is not None and len(ctx.embed.fields) == 3)
+
+async def benchProfile(suite, bot):
+    parser = bot.get_cog('GBF_Utility').profileparser
+    rand = random.Random(0)
+    pages = [makePage(rand, i) for i in range(0, n(suite, 200))]
+    suite.run("profile: ProfileParser.parse", lambda: [parser.parse(p) for p in pages], 5, len(pages), 'page')
+    suite.check("profile: no name found", len([p for p in pages if parser.parse(p).name is not None]) > 0)
+
+async def benchRanking(suite, bot):
+    game = bot.get_cog('GBF_Game')
+    rand = suite.rand
+    guild = FakeGuild(3, "Big Guild", n(suite, 20000))
+    bot.spark = [{}, []]
+    for m in guild.members:
+        if rand.random() < 0.8: bot.spark[0][str(m.id)] = [rand.randint(0, 90000), rand.randint(0, 300), rand.randint(0, 30), datetime.utcnow() - timedelta(days=rand.randint(0, 300))]
+    for i in range(0, n(suite, 100000)): # other guilds
+        bot.spark[0][str(10**16 + i)] = [rand.randint(0, 90000), rand.randint(0, 300), rand.randint(0, 30), datetime.utcnow()]
+    bot.spark[1] = [str(m.id) for m in rand.sample(guild.members, len(guild.members) // 100)]
+    ctx = FakeContext(bot, guild, guild.members[-1])
+    await suite.runAsync("rollRanking ({} members)".format(len(guild.members)), lambda: call(game.rollRanking, ctx), 20, len(guild.members), 'member')
+    suite.check("rollRanking: no ranking", ctx.embed is not None and ctx.embed.description.startswith("**#1"))
+
+async def benchHelp(suite, bot, ctx):
+    help = bot.help_command
+    help.context = ctx
+    help.verify_checks = False # the command checks need a real guild, every command is listed
+    await suite.runAsync("help: send_bot_help ({} commands)".format(len(bot.commands)), lambda: help.send_bot_help(None), 20)
+    suite.check("help: nothing sent", ctx.author.sent > 0)
+
+async def benchParser(suite, bot):
+    from cogs.general import evaluate
+    expressions = [("1 + 2 * 3 - 4 / 5", {}), ("(a + b) / c", {'a':1, 'b':2, 'c':3}), ("2 ^ 10 % 7 + 3 * 4", {}), ("((((1.5 + 2.25) * 3) - pi) / e) * -2", {}), ("x * x + y * y - 2 * x * y", {'x':12345.678, 'y':-9876.54321})]
+    count = n(suite, 20000)
+    suite.run("parser: evaluate", lambda: [evaluate(e, v) for i in range(0, count // len(expressions)) for e, v in expressions], 3, count, 'expr')
+    suite.check("parser: wrong result", evaluate("(a + b) / c", {'a':1, 'b':2, 'c':3}) == 1)
+
+async def main(args, bot):
+    suite = Suite(args.scale)
+    only = None if args.only is None else args.only.split(',')
+    guild = FakeGuild(2, "Test Guild", 50)
+    ctx = FakeContext(bot, guild)
+    benchmarks = [('save', lambda: benchSave(suite, bot)), ('gwdb', lambda: benchGWDB(suite, bot, ctx)), ('summon', lambda: benchSummon(suite, bot, ctx)), ('profile', lambda: benchProfile(suite, bot)), ('ranking', lambda: benchRanking(suite, bot)), ('help', lambda: benchHelp(suite, bot, ctx)), ('parser', lambda: benchParser(suite, bot))]
+    for name, func in benchmarks:
+        if only is not None and name not in only: continue
+        try:
+            await func()
+        except Exception as e:
+            suite.check("{} failed: {}".format(name, e), False)
+    return suite
+
+def compare(suite, baseline, tolerance): # return the names of the benchmarks slower than the baseline
+    slower = []
+    for name, r in suite.results.items():
+        if name in baseline and r['avg'] > baseline[name]['avg'] * tolerance:
+            print("REGRESSION: {} {:.3f} ms (baseline {:.3f} ms)".format(name, 1000 * r['avg'], 1000 * baseline[name]['avg']))
+            slower.append(name)
+    return slower
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="MizaBOT offline benchmark suite")
+    ap.add_argument('--scale', type=float, default=1.0, help="data size and iteration multiplier")
+    ap.add_argument('--only', default=None, help="comma separated list of benchmarks")
+    ap.add_argument('--json', default=None, help="write the results to this file")
+    ap.add_argument('--baseline', default=None, help="compare with the results of a previous run")
+    ap.add_argument('--tolerance', type=float, default=1.5, help="maximum slowdown against the baseline")
+    args = ap.parse_args()
+    for k in ['json', 'baseline']: # the suite runs in a temporary folder
+        if getattr(args, k) is not None: setattr(args, k, os.path.abspath(getattr(args, k)))
+    sys.path.insert(0, os.getcwd()) # the cogs
+    folder = tempfile.mkdtemp(prefix='mizabench')
+    os.chdir(folder)
+    print("working folder: {}".format(folder))
+    mod, bot = makeBot({})
+    bot.loadCog("general", "gbf_game.GBF_Game", "gbf_utility.GBF_Utility", "gw.GW", "management", "owner")
+    suite = bot.loop.run_until_complete(main(args, bot))
+    for db in bot.databases.values():
+        if db.conn is not None: db.conn.close()
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(suite.results, f, indent=1)
+    code = 1 if len(suite.errors) > 0 else 0
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            if len(compare(suite, json.load(f), args.tolerance)) > 0: code = 1
+    sys.exit(code)
@@ -1,1024 +1,2011 @@
-﻿import discord
-from discord.ext import commands
-import asyncio
-import signal
-import json
-import random
-from datetime import datetime, timedelta
-from pydrive.auth import GoogleAuth
-from pydrive.drive import GoogleDrive
-import itertools
-import psutil
-import time
-import cogs # our cogs folder
-import logging
-
-#logging.basicConfig(level=logging.INFO)
-
-# ########################################################################################
-# custom help command used by the bot
-class MizabotHelp(commands.DefaultHelpCommand):
-    def __init__(self):
-        super().__init__()
-        self.dm_help = True # force dm only (although our own functions only send in dm, so it should be unneeded)
-
-    async def send_error_message(self, error):
-        destination = self.get_destination()
-        await destination.send(embed=bot.buildEmbed(title="Help Error", description=error))
-
-    async def send_bot_help(self, mapping): # main help command (called when you do $help). this function reuse the code from the commands.DefaultHelpCommand class
-        ctx = self.context # get $help context
-        bot = ctx.bot
-        me = ctx.author.guild.me # bot own user infos
-
-        try:
-            await ctx.message.add_reaction('📬')
-        except:
-            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Unblock me to receive the Help"))
-            return
-
-        if bot.description: # send the bot description first
-            try:
-                await ctx.author.send(embed=bot.buildEmbed(title=me.name + " Help", description=bot.description, thumbnail=me.avatar_url)) # author.send = dm
-            except:
-                await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
-                await ctx.message.remove_reaction('📬', ctx.guild.me)
-                return
-
-        no_category = "No Category:"
-        def get_category(command, *, no_category=no_category): # function to retrieve the command category
-            cog = command.cog
-            return cog.qualified_name + ':' if cog is not None else no_category
-
-        filtered = await self.filter_commands(bot.commands, sort=True, key=get_category) # sort all category and commands
-        to_iterate = itertools.groupby(filtered, key=get_category)
-
-        for category, commands in to_iterate: # iterate on them
-            if category != no_category:
-                commands = sorted(commands, key=lambda c: c.name) if self.sort_commands else list(commands) # sort
-                embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), category[:-1]), color=random.randint(0, 16777216)) # make an embed, random color
-                for c in commands: # fill the embed fields with the command infos
-                    if c.short_doc == "": embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value="No description", inline=False)
-                    else: embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value=c.short_doc, inline=False)
-                    if len(embed) > 5800 or len(embed.fields) > 24: # embeds have a 6000 and 25 fields characters limit, I send and make a new embed if needed
-                        try:
-                            await ctx.author.send(embed=embed) # author.send = dm
-                        except:
-                            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
-                            await ctx.message.remove_reaction('📬', ctx.guild.me)
-                            return
-                        embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), category[:-1]), color=embed.colour)
-                if len(embed.fields) > 0: # only send if there is at least one field
-                    try:
-                        await ctx.author.send(embed=embed) # author.send = dm
-                    except:
-                        await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
-                        await ctx.message.remove_reaction('📬', ctx.guild.me)
-                        return
-
-        # final words
-        await ctx.author.send(embed=bot.buildEmbed(title="{} Need more help?".format(bot.getEmote('question')), description="Use help <command name>\nOr help <category name>"))
-
-        try:
-            await ctx.message.remove_reaction('📬', ctx.guild.me)
-            await ctx.message.add_reaction('✅') # white check mark
-        except:
-            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Did {} delete its message?".format(ctx.author)))
-
-    async def send_command_help(self, command): # same thing, but for a command ($help <command>)
-        ctx = self.context
-        bot = ctx.bot
-        try:
-            await ctx.message.add_reaction('📬')
-        except:
-            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Unblock me to receive the Help"))
-            return
-
-        # send the help
-        embed = discord.Embed(title="{} **{}** Command".format(bot.getEmote('mark'), command.name), description=command.help, color=random.randint(0, 16777216)) # random color
-        embed.add_field(name="Usage", value=self.get_command_signature(command), inline=False)
-
-        try:
-            await ctx.author.send(embed=embed) # author.send = dm
-        except:
-            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
-            await ctx.message.remove_reaction('📬', ctx.guild.me)
-            return
-
-        await ctx.message.remove_reaction('📬', ctx.guild.me)
-        await self.context.message.add_reaction('✅') # white check mark
-
-    async def send_cog_help(self, cog): # category help ($help <category)
-        ctx = self.context
-        bot = ctx.bot
-        try:
-            await ctx.message.add_reaction('📬')
-        except:
-            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Unblock me to receive the Help"))
-            return
-
-        filtered = await self.filter_commands(cog.get_commands(), sort=self.sort_commands) # sort
-        embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), cog.qualified_name), description=cog.description, color=random.randint(0, 16777216)) # random color
-        for c in filtered:
-            if c.short_doc == "": embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value="No description", inline=False)
-            else: embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value=c.short_doc, inline=False)
-            if len(embed) > 5800 or len(embed.fields) > 24: # embeds have a 6000 and 25 fields characters limit, I send and make a new embed if needed
-                try:
-                    await ctx.author.send(embed=embed) # author.send = dm
-                except:
-                    await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
-                    await ctx.message.remove_reaction('📬', ctx.guild.me)
-                    return
-                embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), cog.qualified_name), description=cog.description, color=embed.colour)
-        if len(embed.fields) > 0:
-            try:
-                await ctx.author.send(embed=embed) # author.send = dm
-            except:
-                await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
-                await ctx.message.remove_reaction('📬', ctx.guild.me)
-                return
-
-        await ctx.message.remove_reaction('📬', ctx.guild.me)
-        await self.context.message.add_reaction('✅') # white check mark
-
-# #####################################################################################
-# Google Drive Access (to save/load the data)
-class MizabotDrive():
-    def __init__(self, bot):
-        self.saving = False
-        self.bot = bot # it's the bot
-
-    def login(self): # check credential, update if needed. Run this function on your own once to get the json, before pushing it to heroku
-        try:
-            gauth = GoogleAuth()
-            gauth.LoadCredentialsFile("credentials.json") # load credentials
-            if gauth.credentials is None: # if failed, get them
-                gauth.LocalWebserverAuth()
-            elif gauth.access_token_expired: # or if expired, refresh
-                gauth.Refresh()
-            else:
-                gauth.Authorize() # good
-            gauth.SaveCredentialsFile("credentials.json") # save
-            return GoogleDrive(gauth)
-        except Exception as e:
-            print('Exception: ' + str(e))
-            return None
-
-    def load(self): # load save.json from the folder id in bot.tokens
-        if self.saving: return False
-        drive = self.login()
-        if not drive:
-            print("Can't login into Google Drive")
-            return False
-        try:
-            file_list = drive.ListFile({'q': "'" + self.bot.tokens['drive'] + "' in parents and trashed=false"}).GetList() # get the file list in our folder
-            for s in file_list:
-                if s['title'] == "save.json": s.GetContentFile(s['title']) # iterate until we find save.json and download it
-            return True
-        except Exception as e:
-            print(e)
-            return False
-
-    def save(self, data): # write save.json to the folder id in bot.tokens
-        if self.saving: return False
-        drive = self.login()
-        if not drive: return False
-        try:
-            self.saving = True
-            prev = []
-            # backup
-            file_list = drive.ListFile({'q': "'" + self.bot.tokens['drive'] + "' in parents and trashed=false"}).GetList()
-            if len(file_list) > 9: # delete if we have too many backups
-                for f in file_list:
-                    if f['title'].find('backup') == 0:
-                        f.Delete()
-            for f in file_list: # search the previous save(s)
-                if f['title'] == "save.json":
-                    prev.append(f)
-            # saving
-            s = drive.CreateFile({'title':'save.json', 'mimeType':'text/JSON', "parents": [{"kind": "drive#file", "id": self.bot.tokens['drive']}]})
-            s.SetContentString(data)
-            s.Upload()
-            # rename the previous save(s)
-            for f in prev:
-                f['title'] = "backup_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".json"
-                f.Upload()
-            self.saving = False
-            return True
-        except Exception as e:
-            print(e)
-            self.saving = False
-            return False
-
-    def saveFile(self, data, name, folder): # write a json file to a folder
-        drive = self.login()
-        s = drive.CreateFile({'title':name, 'mimeType':'text/JSON', "parents": [{"kind": "drive#file", "id": folder}]})
-        s.SetContentString(data)
-        s.Upload()
-
-    def saveDiskFile(self, target, mime, name, folder): # write a file from the local storage to a drive folder
-        drive = self.login()
-        s = drive.CreateFile({'title':name, 'mimeType':mime, "parents": [{"kind": "drive#file", "id": folder}]})
-        s.SetContentFile(target)
-        s.Upload()
-
-    def dlFile(self, name, folder): # load a file from a folder
-        drive = self.login()
-        if not drive:
-            print("Can't login into Google Drive")
-            return False
-        try:
-            file_list = drive.ListFile({'q': "'" + folder + "' in parents and trashed=false"}).GetList() # get the file list in our folder
-            for s in file_list:
-                if s['title'] == name:
-                    s.GetContentFile(s['title']) # iterate until we find the file and download it
-                    return True
-            return False
-        except Exception as e:
-            print(e)
-            return False
-
-    def delFiles(self, names, folder): # delete matching files from a folder
-        drive = self.login()
-        if not drive:
-            print("Can't login into Google Drive")
-            return False
-        try:
-            file_list = drive.ListFile({'q': "'" + folder + "' in parents and trashed=false"}).GetList() # get the file list in our folder
-            for s in file_list:
-                if s['title'] in names:
-                    s.Delete()
-            return True
-        except Exception as e:
-            print(e)
-            return False
-
-# #####################################################################################
-# Bot
-class Mizabot(commands.Bot):
-    def __init__(self):
-        self.botversion = "5.59"
-        self.running = True
-        self.boot_flag = False
-        self.starttime = datetime.utcnow() # used to check the uptime
-        self.process = psutil.Process() # script process
-        self.process.cpu_percent() # called once to initialize
-        self.errn = 0 # count the number of errors
-        self.cogn = 0 # will store how many cogs are expected to be in memory
-        self.exit_flag = False # set to true when sigterm is received
-        self.savePending = False # set to true when a change is made to a variable
-        self.tasks = {} # store my tasks
-        self.autosaving = False # set to true during a save
-        self.drive = MizabotDrive(self) # google drive instance
-        self.channels = {} # store my channels
-        self.newserver = {'servers':[], 'owners':[], 'pending':{}} # banned servers, banned owners, pending servers
-        self.gw = {'state':False} # guild war data
-        self.maintenance = {"state" : False, "time" : None, "duration" : "0"} # gbf maintenance data
-        self.spark = [{}, []] # user spark data, banned users
-        self.stream = {'time':None, 'content':[]} # stream command content
-        self.schedule = [] # gbf schedule
-        self.prefixes = {} # guild prefixes
-        self.st = {} # guild strike times
-        self.bot_maintenance = None # bot maintenance day
-        self.reminders = {} # user reminders
-        self.tokens = {} # bot tokens
-        self.baguette = {} # secret, config
-        self.baguette_save = {} # secret, save
-        self.gbfaccount = {} # gbf bot account
-        self.ids = {} # discord ids used by the bot
-        self.gbfids = {} # gbf profile ids linked to discord ids
-        self.summonlast = None # support summon database last update
-        self.permitted = {} # guild permitted channels
-        self.news = {} # guild news channels
-        self.games = {} # bot status messages
-        self.strings = {} # bot strings
-        self.specialstrings = {} # bot special strings
-        self.emotes = {} # bot custom emote ids
-        self.emote_cache = {} # store used emotes
-        self.granblue = {} # store player/crew ids
-        self.extra = {} # extra data storage for plug'n'play cogs
-        self.on_message_high = {} # on message callback (high priority)
-        self.on_message_low = {} # on message callback
-        self.memmonitor = {0, None} # for monitoring the memory
-        # load
-        self.loadConfig()
-        for i in range(0, 100): # try multiple times in case google drive is unresponsive
-            if self.drive.load(): break
-            elif i == 99:
-                print("Google Drive might be unavailable")
-                exit(3)
-            time.sleep(20)
-        if not self.load(): exit(2) # first loading must success
-        super().__init__(command_prefix=self.prefix, case_insensitive=True, description="MizaBOT version {}\nSource code: https://github.com/MizaGBF/MizaBOT.\nDefault command prefix is '$', use $setPrefix to change it on your server.".format(self.botversion), help_command=MizabotHelp(), owner=self.ids['owner'], max_messages=None)
-
-    def loadCog(self, *cog_classes):
-        for c in cog_classes:
-            try:
-                self.add_cog(cogs.cog_get(c, self))
-            except Exception as e:
-                print("import " + c + ": " + str(e))
-                self.errn += 1
-            self.cogn += 1
-
-    def mainLoop(self): # main loop
-        while self.running:
-            try:
-                self.loop.run_until_complete(self.start(self.tokens['discord']))
-            except Exception as e: # handle exceptions here to avoid the bot dying
-                if self.savePending:
-                    self.save()
-                self.errn += 1
-                print("Main Loop Exception: " + str(e))
-        if self.save():
-            print('Autosave Success')
-        else:
-            print('Autosave Failed')
-
-    def prefix(self, client, message): # command prefix check
-        try:
-            id = str(message.guild.id)
-            if id in self.prefixes:
-                return self.prefixes[id] # retrieve the prefix used by the server
-        except:
-            pass
-        return '$' # else, return default prefix is $
-
-    def json_deserial_array(self, array): # deserialize a list from a json
-        a = []
-        for v in array:
-            if isinstance(v, list):
-                a.append(self.json_deserial_array(v))
-            elif isinstance(v, dict):
-                a.append(self.json_deserial_dict(list(v.items())))
-            elif isinstance(v, str):
-                try:
-                    a.append(datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")) # needed for datetimes
-                except ValueError:
-                    a.append(v)
-            else:
-                a.append(v)
-        return a
-
-    def json_deserial_dict(self, pairs): # deserialize a dict from a json
-        d = {}
-        for k, v in pairs:
-            if isinstance(v, list):
-                d[k] = self.json_deserial_array(v)
-            elif isinstance(v, dict):
-                d[k] = self.json_deserial_dict(list(v.items()))
-            elif isinstance(v, str):
-                try:
-                    d[k] = datetime.strptime(v, "%Y-%m-%dT%H:%M:%S") # needed for datetimes
-                except ValueError:
-                    d[k] = v
-            else:
-                d[k] = v
-        return d
-
-    def json_serial(self, obj): # serialize everything including datetime objects
-        if isinstance(obj, datetime):
-            return obj.replace(microsecond=0).isoformat()
-        raise TypeError ("Type %s not serializable" % type(obj))
-
-    def loadConfig(self): # pretty simple
-        try:
-            with open('config.json') as f:
-                data = json.load(f, object_pairs_hook=self.json_deserial_dict) # deserializer here
-                self.tokens = data['tokens']
-                self.baguette = data.get('baguette', {})
-                self.ids = data.get('ids', {})
-                self.games = data.get('games', ['Granblue Fantasy'])
-                self.strings = data.get('strings', {})
-                self.specialstrings = data.get('specialstrings', {})
-                self.emotes = data.get('emotes', {})
-                self.granblue = data.get('granblue', {"gbfgcrew":{}})
-        except Exception as e:
-            print('loadConfig(): {}\nCheck your \'config.json\' for the above error.'.format(e))
-            exit(1) # instant quit if error
-
-    def load(self): # same thing but for save.json
-        try:
-            with open('save.json') as f:
-                data = json.load(f, object_pairs_hook=self.json_deserial_dict) # deserializer here
-                # more check to avoid issues when reloading the file during runtime, if new data was added
-                self.newserver = data.get('newserver', {'servers':[], 'owners':[], 'pending':{}})
-                self.prefixes = data.get('prefixes', {})
-                self.baguette_save = data.get('baguette_save', {})
-                self.gbfaccount = data.get('gbfaccount', {})
-                self.bot_maintenance = data.get('bot_maintenance', None)
-                if 'maintenance' in data:
-                    if data['maintenance'].get('state', False) == True:
-                        self.maintenance = data['maintenance']
-                    else:
-                        self.maintenance = {"state" : False, "time" : None, "duration" : 0}
-                else: self.maintenance = {"state" : False, "time" : None, "duration" : 0}
-                self.stream = data.get('stream', {'time':None, 'content':[]})
-                self.schedule = data.get('schedule', [])
-                self.st = data.get('st', {})
-                self.spark = data.get('spark', [{}, []])
-                self.gw = data.get('gw', {})
-                self.reminders = data.get('reminders', {})
-                self.permitted = data.get('permitted', {})
-                self.news = data.get('news', {})
-                self.extra = data.get('extra', {})
-                self.gbfids = data.get('gbfids', {})
-                self.summonlast = data.get('summonlast', None)
-                return True
-        except Exception as e:
-            self.errn += 1
-            print('load(): {}'.format(e))
-            return False
-
-    def save(self): # saving
-        try:
-            with open('save.json', 'w') as outfile:
-                data = {}
-                data['newserver'] = self.newserver
-                data['prefixes'] = self.prefixes
-                data['baguette_save'] = self.baguette_save
-                data['bot_maintenance'] = self.bot_maintenance
-                data['maintenance'] = self.maintenance
-                data['stream'] = self.stream
-                data['schedule'] = self.schedule
-                data['st'] = self.st
-                data['spark'] = self.spark
-                data['gw'] = self.gw
-                data['reminders'] = self.reminders
-                data['news'] = self.news
-                data['permitted'] = self.permitted
-                data['extra'] = self.extra
-                data['gbfids'] = self.gbfids
-                data['summonlast'] = self.summonlast
-                json.dump(data, outfile, default=self.json_serial) # locally first
-                if not self.drive.save(json.dumps(data, default=self.json_serial)): # sending to the google drive
-                    raise Exception("Couldn't save to google drive")
-            return True
-        except Exception as e:
-            self.errn += 1
-            print('save(): {}'.format(e))
-            return False
-
-    async def autosave(self, discordDump = False): # called when savePending is true by statustask()
-        if self.autosaving: return
-        self.autosaving = True
-        result = False
-        for i in range(0, 3):
-            if self.save():
-                self.savePending = False
-                result = True
-                break
-            await asyncio.sleep(0.001)
-        if not result:
-            await self.send('debug', embed=self.buildEmbed(title="Failed Save", timestamp=datetime.utcnow()))
-            discordDump = True
-        if discordDump:
-            try:
-                with open('save.json', 'r') as infile:
-                    await self.send('debug', 'save.json', file=discord.File(infile))
-            except Exception as e:
-                pass
-        self.autosaving = False
-
-    async def statustask(self): # background task changing the bot status and calling autosave()
-        await self.send('debug', embed=self.buildEmbed(title="statustask() started", timestamp=datetime.utcnow()))
-        while True:
-            try:
-                await asyncio.sleep(1200)
-                await self.change_presence(status=discord.Status.online, activity=discord.activity.Game(name=random.choice(self.games)))
-                # check if it's time for the bot maintenance for me (every 2 weeks or so)
-                c = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                if self.bot_maintenance and c > self.bot_maintenance and c.day == 16:
-                    await self.send('debug', self.get_user(self.ids['owner']).mention + " ▫️ Time for maintenance!")
-                    self.bot_maintenance = c
-                    self.savePending = True
-                # autosave
-                if self.savePending and not self.exit_flag:
-                    await self.autosave()
-            except asyncio.CancelledError:
-                await self.sendError('statustask', 'cancelled')
-                return
-            except Exception as e:
-                await self.sendError('statustask', str(e))
-
-    async def invitetracker(self): # background task to track the invites of the (You) server
-        if 'you_server' not in self.ids or 'gbfg' not in self.ids: return
-        await asyncio.sleep(2)
-        await self.send('debug', embed=self.buildEmbed(title="invitetracker() started", timestamp=datetime.utcnow()))
-        guilds = [self.get_guild(self.ids['you_server']), self.get_guild(self.ids['gbfg'])]
-        log_channels = {self.ids['you_server']:'youlog', self.ids['gbfg']:'gbfglog'}
-        
-        try:
-            invites = {}
-            for g in guilds:
-                res = await g.invites()
-                invites[g.id] = {}
-                for i in res:
-                    invites[g.id][i.code] = i
-        except:
-            await self.sendError('invitetracker', 'cancelled, failed to retrieve a guild data')
-            return
-
-        while True:
-            try:
-                await asyncio.sleep(120)
-                for g in guilds:
-                    res = await g.invites()
-                    currents = {}
-                    for i in res:
-                        currents[i.code] = i
-
-                    for i in currents:
-                        if i in invites[g.id]:
-                            if currents[i].uses is not None and currents[i].uses != invites[g.id][i].uses:
-                                await self.send(log_channels[g.id], embed=bot.buildEmbed(title="Invite `{}` used".format(i), description="**Uses:** {}".format(currents[i].uses), timestamp=datetime.utcnow(), color=0xfcba03))
-                        else:
-                            msg = ""
-                            if currents[i].max_uses != 0: msg += "**Max uses:** {}\n".format(currents[i].max_uses)
-                            if currents[i].inviter is not None:
-                                msg += "**Inviter:** {}\n".format(currents[i].inviter)
-                            if currents[i].max_age != 0:
-                                if currents[i].max_age < 3600: msg += "**Duration:** {} minutes\n".format(currents[i].max_age // 60)
-                                else: msg += "**Duration:** {} hours\n".format(currents[i].max_age // 3600)
-                            msg += "**Channel:** {}\n".format(currents[i].channel.name)
-                            msg += "**Url:** {}\n".format(currents[i].url)
-                            await self.send(log_channels[g.id], embed=bot.buildEmbed(title="New Invite ▫️ `{}`".format(i), description=msg, timestamp=datetime.utcnow(), color=0xfcba03))
-
-                    for i in invites[g.id]:
-                        if i not in currents:
-                            await self.send(log_channels[g.id], embed=bot.buildEmbed(title="Revoked Invite ▫️ `{}`".format(i), timestamp=datetime.utcnow(), color=0xfcba03))
-
-                    invites[g.id] = currents
-            except asyncio.CancelledError:
-                await self.sendError('invitetracker', 'cancelled')
-                return
-            except Exception as e:
-                await self.sendError('invitetracker', str(e))
-                try: invites[g.id] = currents
-                except: pass
-                if str(e).startswith('500 INTERNAL SERVER ERROR'): # assume discord server issues and sleep
-                    await asyncio.sleep(1000)
-
-    def isAuthorized(self, ctx): # check if the command is authorized
-        id = str(ctx.guild.id)
-        if id in self.permitted:
-            if ctx.channel.id in self.permitted[id]:
-                return True
-            return False
-        return True
-
-    def isYouServer(self, ctx): # check if the context is in the (You) guild
-        if ctx.message.author.guild.id == self.ids.get('you_server', -1):
-            return True
-        return False
-
-    def isDebugServer(self, ctx): # check if the context is in the debug guild
-        if ctx.message.author.guild.id == self.ids.get('debug_server', -1):
-            return True
-        return False
-
-    def isMod(self, ctx): # check if the member has the manage_message permission
-        if ctx.author.guild_permissions.manage_messages or ctx.author.id == self.ids.get('owner', -1):
-            return True
-        return False
-
-    def isOwner(self, ctx):
-        if ctx.message.author.id == self.ids.get('owner', -1):
-            return True
-        return False
-
-    def getEmote(self, key): # retrieve a custom emote
-        if key in self.emote_cache:
-            return self.emote_cache[key]
-        elif key in self.emotes:
-            try:
-                e = self.get_emoji(self.emotes[key]) # ids are defined in config.json
-                if e is not None: self.emote_cache[key] = e
-                return e
-            except:
-                return None
-        return None
-
-    async def react(self, ctx, key): # add a reaction using a custom emote defined in config.json
-        try:
-            await ctx.message.add_reaction(self.getEmote(key))
-            return True
-        except Exception as e:
-            await self.sendError('react', str(e))
-            return False
-
-    async def unreact(self, ctx, key): # remove a reaction using a custom emote defined in config.json
-        try:
-            await ctx.message.remove_reaction(self.getEmote(key), ctx.guild.me)
-            return True
-        except Exception as e:
-            await self.sendError('unreact', str(e))
-            return False
-
-    def buildEmbed(self, **options): # make a full embed
-        embed = discord.Embed(title=options.get('title'), description=options.pop('description', ""), url=options.pop('url', ""), color=options.pop('color', random.randint(0, 16777216)))
-        fields = options.pop('fields', [])
-        inline = options.pop('inline', False)
-        for f in fields:
-            embed.add_field(name=f.get('name'), value=f.get('value'), inline=f.pop('inline', inline))
-        buffer = options.pop('thumbnail', None)
-        if buffer is not None: embed.set_thumbnail(url=buffer)
-        buffer1 = options.pop('footer', None)
-        buffer2 = options.pop('footer_url', None)
-        if buffer1 is not None and buffer2 is not None: embed.set_footer(text=buffer1, icon_url=buffer2)
-        elif buffer1 is not None: embed.set_footer(text=buffer1)
-        elif buffer2 is not None: embed.set_footer(icon_url=buffer2)
-        buffer = options.pop('image', None)
-        if buffer is not None: embed.set_image(url=buffer)
-        buffer = options.pop('timestamp', None)
-        if buffer is not None: embed.timestamp=buffer
-        if 'author' in options:
-            embed.set_author(name=options['author'].pop('name', ""), url=options['author'].pop('url', ""), icon_url=options['author'].pop('icon_url', ""))
-        return embed
-
-    def runTask(self, name, func): # start a task (cancel a previous one with the same name)
-        self.cancelTask(name)
-        self.tasks[name] = self.loop.create_task(func())
-
-    def cancelTask(self, name): # cancel a task
-        if name in self.tasks:
-            self.tasks[name].cancel()
-
-    def startTasks(self): # start our tasks
-        self.runTask('status', self.statustask)
-        self.runTask('invitetracker', self.invitetracker)
-        for c in self.cogs:
-            try:
-                self.get_cog(c).startTasks()
-            except:
-                pass
-
-    def setOnMessageCallback(self, name, callback, high_prio=False): # register a function to be called by on_message (high prio ones will be called first). Must return True (or False to interrupt on_message) and take message as parameter
-        if high_prio:
-            self.on_message_high[name] = callback
-        else:
-            self.on_message_low[name] = callback
-
-    async def runOnMessageCallback(self, message):
-        for name in self.on_message_high:
-            try:
-                if not await self.on_message_high[name](message): return False
-            except:
-                pass
-        for name in self.on_message_low:
-            try:
-                if not await self.on_message_low[name](message): return False
-            except:
-                pass
-        return True
-
-    def setChannel(self, name, id_key : str): # "register" a channel to use with send()
-        try:
-            c = self.get_channel(self.ids[id_key])
-            if c is not None: self.channels[name] = c
-        except:
-            self.errn += 1
-            print("Invalid key: {}".format(id_key))
-
-    def setChannelID(self, name, id : int): # same but using an id instead of an id defined in config.json
-        try:
-            c = self.get_channel(id)
-            if c is not None: self.channels[name] = c
-        except:
-            self.errn += 1
-            print("Invalid ID: {}".format(id))
-
-    async def callCommand(self, ctx, command, cog, *args, **kwargs): #call a command in a cog
-        cmds = self.get_cog(cog).get_commands()
-        for c in cmds:
-            if c.name == command:
-                await ctx.invoke(c, *args, **kwargs)
-                return
-        raise Exception("Command `{}` not found".format(command))
-
-    async def send(self, channel_name : str, msg : str = "", embed : discord.Embed = None, file : discord.File = None): # send something to a channel
-        try:
-            await self.channels[channel_name].send(msg, embed=embed, file=file)
-        except Exception as e:
-            self.errn += 1
-            print("Channel {} error: {}".format(channel_name, e))
-
-    async def sendMulti(self, channel_names : list, msg : str = "", embed : discord.Embed = None, file : discord.File = None): # send to multiple channel at the same time
-        for c in channel_names:
-            await self.send(c, msg, embed, file)
-
-    async def sendError(self, func_name : str, msg : str, id = None): # send an error to the debug channel
-        if msg.startswith("403 FORBIDDEN"): return # I'm tired of those errors because people didn't set their channel permissions right
-        if self.errn >= 30: return # disable error messages if too many messages got sent
-        if id is None: id = ""
-        else: id = " {}".format(id)
-        self.errn += 1
-        await self.send('debug', embed=self.buildEmbed(title="Error in {}() {}".format(func_name, id), description=msg, timestamp=datetime.utcnow()))
-
-    def getJST(self, nomicro=False): # get the time in jst
-        if nomicro: return datetime.utcnow().replace(microsecond=0) + timedelta(seconds=32400) - timedelta(seconds=30)
-        return datetime.utcnow() + timedelta(seconds=32400) - timedelta(seconds=30)
-
-    def uptime(self, string=True): # get the uptime
-        delta = datetime.utcnow() - self.starttime
-        if string: return "{}".format(self.getTimedeltaStr(delta, None))
-        else: return delta
-
-    def getTimedeltaStr(self, delta, day=False):
-        if day is None: return "{}d{}h{}m{}s".format(delta.days, delta.seconds // 3600, (delta.seconds // 60) % 60, delta.seconds % 60)
-        elif day: return "{}d{}h{}m".format(delta.days, delta.seconds // 3600, (delta.seconds // 60) % 60)
-        else: return "{}h{}m".format(delta.seconds // 3600, (delta.seconds // 60) % 60)
-
-    # function to build a timedelta from a string (for $remind)
-    def makeTimedelta(self, d): # return None if error
-        flags = {'d':False,'h':False,'m':False}
-        tmp = 0 # buffer
-        sum = 0 # delta in seconds
-        for i in range(0, len(d)):
-            if d[i].isdigit():
-                tmp = (tmp * 10) + int(d[i])
-            elif d[i].lower() in flags:
-                c = d[i].lower()
-                if flags[c]:
-                    return None
-                if tmp < 0:
-                    return None
-                flags[c] = True
-                if c == 'd':
-                    sum += tmp * 86400
-                elif c == 'h':
-                    sum += tmp * 3600
-                elif c == 'm':
-                    sum += tmp * 60
-                tmp = 0
-            else:
-                return None
-        if tmp != 0: return None
-        return timedelta(days=sum//86400, seconds=sum%86400)
-
-# #####################################################################################
-# GracefulExit
-class GracefulExit: # when heroku force the bot to shutdown
-  def __init__(self, bot):
-    self.bot = bot
-    signal.signal(signal.SIGTERM, self.exit_gracefully)
-
-  def exit_gracefully(self,signum, frame):
-    self.bot.exit_flag = True
-    if self.bot.savePending:
-        self.bot.autosaving = False
-        if self.bot.save():
-            print('Autosave Success')
-        else:
-            print('Autosave Failed')
-    exit(0)
-
-# #####################################################################################
-# Start
-# make the bot instance
-bot = Mizabot()
-
-# bot events
-@bot.event
-async def on_ready(): # when the bot starts or reconnects
-    await bot.change_presence(status=discord.Status.online, activity=discord.activity.Game(name=random.choice(bot.games)))
-    if not bot.boot_flag:
-        # send a pretty message
-        bot.setChannel('debug', 'debug_channel') # set our debug channel
-        bot.setChannel('pinned', 'you_pinned') # set (you) pinned channel
-        bot.setChannel('gbfglog', 'gbfg_log') # set /gbfg/ lucilius log channel
-        bot.setChannel('youlog', 'you_log') # set (you) log channel
-        bot.startTasks() # start the tasks
-        await bot.send('debug', embed=bot.buildEmbed(title="{} is Ready".format(bot.user.display_name), description="**Version** {}\n**CPU**▫️{}%\n**Memory**▫️{}MB\n**Tasks Count**▫️{}\n**Servers Count**▫️{}\n**Pending Servers**▫️{}\n**Cogs Loaded**▫️{}/{}".format(bot.botversion, bot.process.cpu_percent(), bot.process.memory_full_info().uss >> 20, len(asyncio.all_tasks()), len(bot.guilds), len(bot.newserver['pending']), len(bot.cogs), bot.cogn), thumbnail=bot.user.avatar_url, timestamp=datetime.utcnow()))
-        bot.boot_flag = True
-
-@bot.event
-async def on_guild_join(guild): # when the bot joins a new guild
-    id = str(guild.id)
-    if id == str(bot.ids['debug_server']):
-        return
-    elif id in bot.newserver['servers'] or str(guild.owner.id) in bot.newserver['owners']: # leave if the server is blacklisted
-        try:
-            await bot.send('debug', embed=bot.buildEmbed(title="Banned guild request", description="{} ▫️ {}".format(guild.name, id), thumbnail=guild.icon_url, footer="Owner: {} ▫️ {}".format(guild.owner.name, guild.owner.id)))
-        except Exception as e:
-            await bot.send('debug', "on_guild_join(): {}".format(e))
-        await guild.leave()
-    else: # notify me and add to the pending servers
-        bot.newserver['pending'][id] = guild.name
-        bot.savePending = True
-        await guild.owner.send(embed=bot.buildEmbed(title="Pending guild request", description="Wait until my owner approve the new server", thumbnail=guild.icon_url))
-        await bot.send('debug', embed=bot.buildEmbed(title="Pending guild request", description="{} ▫️ {}".format(guild.name, id), thumbnail=guild.icon_url, footer="Owner: {} ▫️ {}".format(guild.owner.name, guild.owner.id)))
-
-@bot.event
-async def on_message(message): # to do something with a message
-    if await bot.runOnMessageCallback(message):
-        await bot.process_commands(message) # don't forget
-
-@bot.check # authorize or not a command on a global scale
-async def global_check(ctx):
-    id = str(ctx.guild.id)
-    if id in bot.newserver['servers'] or str(ctx.guild.owner.id) in bot.newserver['owners']: # ban check
-        await ctx.guild.leave() # leave the server if banned
-        return False
-    if id in bot.newserver['pending']: # pending check
-        await bot.react(ctx, 'cooldown')
-        return False
-    return True
-
-@bot.event # if an error happens
-async def on_command_error(ctx, error):
-    msg = str(error)
-    if msg.find('You are on cooldown.') == 0:
-        await bot.react(ctx, 'cooldown')
-    elif msg.find('required argument that is missing') != -1:
-        return
-    elif msg.find('check functions for command') != -1:
-        return
-    elif msg.find('Member "') == 0 or msg.find('Command "') == 0 or msg.startswith('Command raised an exception: Forbidden: 403'):
-        return
-    else:
-        bot.errn += 1
-        await bot.send('debug', embed=bot.buildEmbed(title="⚠ Error caused by {}".format(ctx.message.author), thumbnail=ctx.author.avatar_url, fields=[{"name":"Command", "value":'`{}`'.format(ctx.message.content)}, {"name":"Server", "value":ctx.message.author.guild.name}, {"name":"Message", "value":msg}], timestamp=datetime.utcnow()))
-
-# (You) pin board system
-@bot.event
-async def on_raw_reaction_add(payload):
-    try:
-        if payload.channel_id != bot.ids.get('you_general', -1):
-            return
-        message = await bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
-        reactions = message.reactions
-    except Exception as e:
-        await bot.sendError('raw_react', str(e))
-        return
-    me = message.guild.me
-    role = message.guild.get_role(bot.ids.get('you_member', 0))
-    if role is None: return
-    for reaction in reactions:
-        if reaction.emoji == '📌':
-            users = await reaction.users().flatten()
-            guild = message.guild
-            content = message.content
-            isMod = False
-            count = 0
-            for u in users:
-                if u.id == me.id:
-                    return
-                m = guild.get_member(u.id)
-                if m.guild_permissions.manage_messages:
-                    isMod = True
-                    break
-                elif role in m.roles:
-                    count += 1
-            if not isMod and count < 3:
-                return
-
-            await message.add_reaction('📌')
-
-            dict = {}
-            dict['color'] = 0xf20252
-            dict['title'] = str(message.author)
-            if len(content) != 0: dict['description'] = content + "\n\n"
-            else: dict['description'] = ""
-            dict['description'] += ":earth_asia: [**Link**](https://discordapp.com/channels/{}/{}/{})\n".format(message.guild.id, message.channel.id, message.id)
-            dict['thumbnail'] = {'url':str(message.author.avatar_url)}
-            dict['fields'] = []
-
-            # for attachments
-            if message.attachments:
-                for file in message.attachments:
-                    if file.is_spoiler():
-                        dict['fields'].append({'inline': True, 'name':'Attachment', 'value':f'[{file.filename}]({file.url})'})
-                    elif file.url.lower().endswith(('.png', '.jpeg', '.jpg', '.gif', '.webp')) and 'image' not in dict:
-                        dict['image'] = {'url':file.url}
-                    else:
-                        dict['fields'].append({'inline': True, 'name':'Attachment', 'value':f'[{file.filename}]({file.url})'})
-            embed = discord.Embed.from_dict(dict)
-            embed.timestamp=message.created_at
-            await bot.send('pinned', embed=embed)
-            return
-
-# used by /gbfg/ and (You)
-@bot.event
-async def on_member_update(before, after):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if before.guild.id in guilds:
-        channel = guilds[before.guild.id]
-        if before.display_name != after.display_name:
-                await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Name change".format(after.display_name), 'icon_url':after.avatar_url}, description="{}\n**Before** ▫️ {}\n**After** ▫️ {}".format(after.mention, before.display_name, after.display_name), footer="User ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-        elif len(before.roles) < len(after.roles):
-            for r in after.roles:
-                if r not in before.roles:
-                    await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Role added".format(after.name), 'icon_url':after.avatar_url}, description="{} was given the `{}` role".format(after.mention, r.name), footer="User ID: {}".format(after.id), color=0x1b55b3, timestamp=datetime.utcnow()))
-                    break
-        elif len(before.roles) > len(after.roles):
-            for r in before.roles:
-                if r not in after.roles:
-                    await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Role removed".format(after.name), 'icon_url':after.avatar_url}, description="{} was removed from the `{}` role".format(after.mention, r.name), footer="User ID: {}".format(after.id), color=0x0b234a, timestamp=datetime.utcnow()))
-                    break
-
-@bot.event
-async def on_member_remove(member):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if member.guild.id in guilds:
-        await bot.send(guilds[member.guild.id], embed=bot.buildEmbed(author={'name':"{} ▫️ Left the server".format(member.name), 'icon_url':member.avatar_url}, footer="User ID: {}".format(member.id), timestamp=datetime.utcnow(), color=0xff0000))
-
-@bot.event
-async def on_member_join(member):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if member.guild.id in guilds:
-        channel = guilds[member.guild.id]
-        await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Joined the server".format(member.name), 'icon_url':member.avatar_url}, footer="User ID: {}".format(member.id), timestamp=datetime.utcnow(), color=0x00ff3c))
-
-@bot.event
-async def on_member_ban(guild, user):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if guild.id in guilds:
-        await bot.send(guilds[guild.id], embed=bot.buildEmbed(author={'name':"{} ▫️ Banned from the server".format(user.name), 'icon_url':user.avatar_url}, footer="User ID: {}".format(user.id), timestamp=datetime.utcnow(), color=0xff0000))
-
-@bot.event
-async def on_member_unban(guild, user):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if guild.id in guilds:
-        await bot.send(guilds[guild.id], embed=bot.buildEmbed(author={'name':"{} ▫️ Unbanned from the server".format(user.name), 'icon_url':user.avatar_url}, footer="User ID: {}".format(user.id), timestamp=datetime.utcnow(), color=0x00ff3c))
-
-@bot.event
-async def on_guild_emojis_update(guild, before, after):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if guild.id in guilds:
-        channel = guilds[guild.id]
-        if len(before) < len(after):
-            for e in after:
-                if e not in before:
-                    await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Emoji added".format(e.name), 'icon_url':e.url}, footer="Emoji ID: {}".format(e.id), timestamp=datetime.utcnow(), color=0x00ff3c))
-                    break
-        else:
-            for e in before:
-                if e not in after:
-                    await bot.send(channel, embed=bot.buildEmbed(author={'name':" ▫️ Emoji removed".format(e.name), 'icon_url':e.url}, footer="Emoji ID: {}".format(e.id), timestamp=datetime.utcnow(), color=0xff0000))
-                    break
-
-@bot.event
-async def on_guild_role_create(role):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if role.guild.id in guilds:
-        channel = guilds[role.guild.id]
-        await bot.send(channel, embed=bot.buildEmbed(title="Role created ▫️ `{}`".format(role.name), footer="Role ID: {}".format(role.id), timestamp=datetime.utcnow(), color=0x00ff3c))
-
-@bot.event
-async def on_guild_role_delete(role):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if role.guild.id in guilds:
-        channel = guilds[role.guild.id]
-        await bot.send(channel, embed=bot.buildEmbed(title="Role deleted ▫️ `{}`".format(role.name), footer="Role ID: {}".format(role.id), timestamp=datetime.utcnow(), color=0xff0000))
-
-@bot.event
-async def on_guild_role_update(before, after):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if before.guild.id in guilds:
-        channel = guilds[before.guild.id]
-        if before.name != after.name:
-            await bot.send(channel, embed=bot.buildEmbed(title="Role name updated", fields=[{'name':"Before", 'value':before.name}, {'name':"After", 'value':after.name}], footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-        elif before.colour != after.colour:
-            await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `" + after.name + "`", description="Color changed", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-        elif before.hoist != after.hoist:
-            if after.hoist:
-                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role is displayed separately from other members", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-            else:
-                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role is displayed as the other members", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-        elif before.mentionable != after.mentionable:
-            if after.mentionable:
-                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role is mentionable", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-            else:
-                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role isn't mentionable", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
-
-@bot.event
-async def on_guild_channel_create(channel):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if channel.guild.id in guilds:
-        await bot.send(guilds[channel.guild.id], embed=bot.buildEmbed(title="Channel created ▫️ `{}`".format(channel.name), footer="Channel ID: {}".format(channel.id), timestamp=datetime.utcnow(), color=0xebe007))
-
-@bot.event
-async def on_guild_channel_delete(channel):
-    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
-    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
-    if channel.guild.id in guilds:
-        await bot.send(guilds[channel.guild.id], embed=bot.buildEmbed(title="Channel deleted ▫️ `{}`".format(channel.name), footer="Channel ID: {}".format(channel.id), timestamp=datetime.utcnow(), color=0x8a8306))
-
-# create the graceful exit
-grace = GracefulExit(bot)
-
-# load cogs from the cogs folder
-bot.loadCog("general", "gbf_game.GBF_Game", "gbf_utility.GBF_Utility", "gw.GW", "management", "owner", "baguette")
-
-# start the loop
+﻿import discord
+from discord.ext import commands
+import asyncio
+import aiohttp
+import signal
+import json
+import random
+from datetime import datetime, timedelta
+from pydrive.auth import GoogleAuth
+from pydrive.drive import GoogleDrive
+import itertools
+import psutil
+import time
+import os
+import hashlib
+import re
+import struct
+import copy
+import heapq
+import bisect
+import collections
+import sqlite3
+import functools
+import contextlib
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+import cogs # our cogs folder
+import logging
+
+#logging.basicConfig(level=logging.INFO)
+
+# ########################################################################################
+# custom help command used by the bot
+class MizabotHelp(commands.DefaultHelpCommand):
+    def __init__(self):
+        super().__init__()
+        self.dm_help = True # force dm only (although our own functions only send in dm, so it should be unneeded)
+
+    async def send_error_message(self, error):
+        destination = self.get_destination()
+        await destination.send(embed=bot.buildEmbed(title="Help Error", description=error))
+
+    async def send_bot_help(self, mapping): # main help command (called when you do $help). this function reuse the code from the commands.DefaultHelpCommand class
+        ctx = self.context # get $help context
+        bot = ctx.bot
+        me = ctx.author.guild.me # bot own user infos
+
+        try:
+            await ctx.message.add_reaction('📬')
+        except:
+            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Unblock me to receive the Help"))
+            return
+
+        if bot.description: # send the bot description first
+            try:
+                await ctx.author.send(embed=bot.buildEmbed(title=me.name + " Help", description=bot.description, thumbnail=me.avatar_url)) # author.send = dm
+            except:
+                await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
+                await ctx.message.remove_reaction('📬', ctx.guild.me)
+                return
+
+        no_category = "No Category:"
+        def get_category(command, *, no_category=no_category): # function to retrieve the command category
+            cog = command.cog
+            return cog.qualified_name + ':' if cog is not None else no_category
+
+        filtered = await self.filter_commands(bot.commands, sort=True, key=get_category) # sort all category and commands
+        to_iterate = itertools.groupby(filtered, key=get_category)
+
+        for category, commands in to_iterate: # iterate on them
+            if category != no_category:
+                commands = sorted(commands, key=lambda c: c.name) if self.sort_commands else list(commands) # sort
+                embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), category[:-1]), color=random.randint(0, 16777216)) # make an embed, random color
+                for c in commands: # fill the embed fields with the command infos
+                    if c.short_doc == "": embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value="No description", inline=False)
+                    else: embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value=c.short_doc, inline=False)
+                    if len(embed) > 5800 or len(embed.fields) > 24: # embeds have a 6000 and 25 fields characters limit, I send and make a new embed if needed
+                        try:
+                            await ctx.author.send(embed=embed) # author.send = dm
+                        except:
+                            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
+                            await ctx.message.remove_reaction('📬', ctx.guild.me)
+                            return
+                        embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), category[:-1]), color=embed.colour)
+                if len(embed.fields) > 0: # only send if there is at least one field
+                    try:
+                        await ctx.author.send(embed=embed) # author.send = dm
+                    except:
+                        await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
+                        await ctx.message.remove_reaction('📬', ctx.guild.me)
+                        return
+
+        # final words
+        await ctx.author.send(embed=bot.buildEmbed(title="{} Need more help?".format(bot.getEmote('question')), description="Use help <command name>\nOr help <category name>"))
+
+        try:
+            await ctx.message.remove_reaction('📬', ctx.guild.me)
+            await ctx.message.add_reaction('✅') # white check mark
+        except:
+            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Did {} delete its message?".format(ctx.author)))
+
+    async def send_command_help(self, command): # same thing, but for a command ($help <command>)
+        ctx = self.context
+        bot = ctx.bot
+        try:
+            await ctx.message.add_reaction('📬')
+        except:
+            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Unblock me to receive the Help"))
+            return
+
+        # send the help
+        embed = discord.Embed(title="{} **{}** Command".format(bot.getEmote('mark'), command.name), description=command.help, color=random.randint(0, 16777216)) # random color
+        embed.add_field(name="Usage", value=self.get_command_signature(command), inline=False)
+
+        try:
+            await ctx.author.send(embed=embed) # author.send = dm
+        except:
+            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
+            await ctx.message.remove_reaction('📬', ctx.guild.me)
+            return
+
+        await ctx.message.remove_reaction('📬', ctx.guild.me)
+        await self.context.message.add_reaction('✅') # white check mark
+
+    async def send_cog_help(self, cog): # category help ($help <category)
+        ctx = self.context
+        bot = ctx.bot
+        try:
+            await ctx.message.add_reaction('📬')
+        except:
+            await ctx.send(embed=bot.buildEmbed(title="Help Error", description="Unblock me to receive the Help"))
+            return
+
+        filtered = await self.filter_commands(cog.get_commands(), sort=self.sort_commands) # sort
+        embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), cog.qualified_name), description=cog.description, color=random.randint(0, 16777216)) # random color
+        for c in filtered:
+            if c.short_doc == "": embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value="No description", inline=False)
+            else: embed.add_field(name="{} ▫ {}".format(c.name, self.get_command_signature(c)), value=c.short_doc, inline=False)
+            if len(embed) > 5800 or len(embed.fields) > 24: # embeds have a 6000 and 25 fields characters limit, I send and make a new embed if needed
+                try:
+                    await ctx.author.send(embed=embed) # author.send = dm
+                except:
+                    await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
+                    await ctx.message.remove_reaction('📬', ctx.guild.me)
+                    return
+                embed = discord.Embed(title="{} **{}** Category".format(bot.getEmote('mark'), cog.qualified_name), description=cog.description, color=embed.colour)
+        if len(embed.fields) > 0:
+            try:
+                await ctx.author.send(embed=embed) # author.send = dm
+            except:
+                await ctx.send(embed=bot.buildEmbed(title="Help Error", description="I can't send you a direct message"))
+                await ctx.message.remove_reaction('📬', ctx.guild.me)
+                return
+
+        await ctx.message.remove_reaction('📬', ctx.guild.me)
+        await self.context.message.add_reaction('✅') # white check mark
+
+# #####################################################################################
+# Local Google Drive stand-in (offline testing and benchmarking, set "drive_backend" to "local" in the config tokens)
+class MizabotLocalFile(dict):
+    def __init__(self, drive, metadata):
+        super().__init__(metadata)
+        self.drive = drive
+        self.content = None
+
+    def SetContentString(self, data):
+        self.content = data.encode('utf-8')
+
+    def SetContentFile(self, target):
+        with open(target, 'rb') as f:
+            self.content = f.read()
+
+    def GetContentFile(self, target):
+        self.drive.count('download')
+        with open(target, 'wb') as f:
+            f.write(self.drive.files[self['id']].content)
+
+    def Upload(self):
+        self.drive.count('upload')
+        if 'id' not in self:
+            self.drive.nextid += 1
+            self['id'] = str(self.drive.nextid)
+        if self.content is None: self.content = self.drive.files[self['id']].content if self['id'] in self.drive.files else b''
+        self['md5Checksum'] = hashlib.md5(self.content).hexdigest() # set by google drive for the uploaded files
+        self.drive.files[self['id']] = self
+
+    def Delete(self):
+        self.drive.count('delete')
+        self.drive.files.pop(self.get('id', None), None)
+
+class MizabotLocalDrive():
+    def __init__(self):
+        self.files = {} # file id: MizabotLocalFile
+        self.nextid = 0
+        self.calls = {} # round-trip counters
+        self.query = None
+
+    def count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def ListFile(self, param):
+        self.query = param['q'].split("'")[1] # folder id
+        return self
+
+    def GetList(self):
+        self.count('list')
+        return [f for f in self.files.values() if self.query in [p['id'] for p in f.get('parents', [])]]
+
+    def CreateFile(self, metadata):
+        return MizabotLocalFile(self, metadata)
+
+# #####################################################################################
+# Google Drive Access (to save/load the data)
+class MizabotDrive():
+    def __init__(self, bot):
+        self.saving = False
+        self.bot = bot # it's the bot
+        self.gauth = None # authentification, kept between calls
+        self.gdrive = None # drive instance, kept between calls
+        self.listing = {} # cached folder listings (folder id: list of files)
+
+    def login(self): # check credential, update if needed. Run this function on your own once to get the json, before pushing it to heroku
+        try:
+            if self.bot.tokens.get('drive_backend', None) == 'local': # offline mode
+                if self.gdrive is None: self.gdrive = MizabotLocalDrive()
+                return self.gdrive
+            if self.gdrive is not None: # reuse the previous session
+                if self.gauth.access_token_expired: # refresh if needed
+                    self.gauth.Refresh()
+                    self.gauth.SaveCredentialsFile("credentials.json")
+                return self.gdrive
+            gauth = GoogleAuth()
+            gauth.LoadCredentialsFile("credentials.json") # load credentials
+            if gauth.credentials is None: # if failed, get them
+                gauth.LocalWebserverAuth()
+            elif gauth.access_token_expired: # or if expired, refresh
+                gauth.Refresh()
+            else:
+                gauth.Authorize() # good
+            gauth.SaveCredentialsFile("credentials.json") # save
+            self.gauth = gauth
+            self.gdrive = GoogleDrive(gauth)
+            return self.gdrive
+        except Exception as e:
+            print('Exception: ' + str(e))
+            self.logout()
+            return None
+
+    def logout(self): # forget the session and the cached listings (after an error)
+        self.gauth = None
+        self.gdrive = None
+        self.listing = {}
+
+    def getList(self, drive, folder): # return the file list of a folder (cached)
+        if folder not in self.listing:
+            self.listing[folder] = drive.ListFile({'q': "'" + folder + "' in parents and trashed=false"}).GetList()
+        return self.listing[folder]
+
+    def getFile(self, drive, name, folder): # return the first file with a matching title in a folder
+        for f in self.getList(drive, folder):
+            if f['title'] == name:
+                return f
+        return None
+
+    def upload(self, drive, f, folder): # upload a file and keep the folder listing up to date
+        f.Upload()
+        if folder in self.listing and f not in self.listing[folder]:
+            self.listing[folder].append(f)
+
+    def delete(self, f, folder): # delete a file and keep the folder listing up to date
+        f.Delete()
+        if folder in self.listing and f in self.listing[folder]:
+            self.listing[folder].remove(f)
+
+    def load(self): # load save.json from the folder id in bot.tokens
+        if self.saving: return False
+        drive = self.login()
+        if not drive:
+            print("Can't login into Google Drive")
+            return False
+        try:
+            self.listing.pop(self.bot.tokens['drive'], None) # always get a fresh list when loading
+            file_list = self.getList(drive, self.bot.tokens['drive']) # get the file list in our folder
+            journal = False
+            for s in file_list:
+                if s['title'] in ["save.json", "save.bin"]: # iterate until we find the save and download it
+                    s.GetContentFile(s['title'])
+                    for other in ["save.json", "save.bin"]: # remove the local save of the other format
+                        if other == s['title']: continue
+                        try: os.remove(other)
+                        except: pass
+                elif s['title'] == "save.journal": # and the journal of the changes made since
+                    s.GetContentFile(s['title'])
+                    journal = True
+            if not journal: # the remote save.json is a full snapshot, discard any local journal
+                try: os.remove("save.journal")
+                except: pass
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            return False
+
+    def save(self, target): # upload the local save file (save.json or save.bin) to the folder id in bot.tokens
+        if self.saving: return False
+        drive = self.login()
+        if not drive: return False
+        folder = self.bot.tokens['drive']
+        try:
+            self.saving = True
+            prev = []
+            journals = []
+            # backup
+            file_list = self.getList(drive, folder)
+            if len(file_list) > 9: # delete if we have too many backups
+                for f in list(file_list):
+                    if f['title'].find('backup') == 0:
+                        self.delete(f, folder)
+            for f in list(file_list): # search the previous save(s)
+                if f['title'] in ["save.json", "save.bin"]:
+                    prev.append(f)
+                elif f['title'] == "save.journal": # the journal is merged into the new snapshot
+                    journals.append(f)
+            # saving
+            s = drive.CreateFile({'title':target, 'mimeType':('application/octet-stream' if target.endswith('.bin') else 'text/JSON'), "parents": [{"kind": "drive#file", "id": folder}]})
+            s.SetContentFile(target)
+            self.upload(drive, s, folder)
+            # rename the previous save(s)
+            for f in prev:
+                f['title'] = "backup_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + f['title'][4:]
+                f.Upload()
+            # the journal is only removed once the new snapshot is on the drive
+            for f in journals:
+                try:
+                    self.delete(f, folder)
+                except: # an old journal must not be replayed on top of the new snapshot
+                    f.SetContentString("")
+                    f.Upload()
+            self.saving = False
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            self.saving = False
+            return False
+
+    def saveJournal(self, data): # write save.journal to the folder id in bot.tokens (replace the previous one)
+        if self.saving: return False
+        drive = self.login()
+        if not drive: return False
+        folder = self.bot.tokens['drive']
+        try:
+            self.saving = True
+            s = self.getFile(drive, "save.journal", folder)
+            if s is None: s = drive.CreateFile({'title':'save.journal', 'mimeType':'text/plain', "parents": [{"kind": "drive#file", "id": folder}]})
+            s.SetContentString(data)
+            self.upload(drive, s, folder)
+            self.saving = False
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            self.saving = False
+            return False
+
+    def overwriteDiskFile(self, target, mime, name, folder): # same as saveDiskFile() but replace the file if it already exists
+        drive = self.login()
+        if not drive: return False
+        try:
+            s = self.getFile(drive, name, folder)
+            if s is None: s = drive.CreateFile({'title':name, 'mimeType':mime, "parents": [{"kind": "drive#file", "id": folder}]})
+            s.SetContentFile(target)
+            self.upload(drive, s, folder)
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            return False
+
+    def saveFile(self, data, name, folder): # write a json file to a folder
+        drive = self.login()
+        if not drive: return False
+        try:
+            s = drive.CreateFile({'title':name, 'mimeType':'text/JSON', "parents": [{"kind": "drive#file", "id": folder}]})
+            s.SetContentString(data)
+            self.upload(drive, s, folder)
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            return False
+
+    def saveDiskFile(self, target, mime, name, folder): # write a file from the local storage to a drive folder
+        drive = self.login()
+        if not drive: return False
+        try:
+            s = drive.CreateFile({'title':name, 'mimeType':mime, "parents": [{"kind": "drive#file", "id": folder}]})
+            s.SetContentFile(target)
+            self.upload(drive, s, folder)
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            return False
+
+    def dlFile(self, name, folder, target=None, md5=None): # load a file from a folder (saved under target if set). return None without downloading if md5 matches the drive file
+        drive = self.login()
+        if not drive:
+            print("Can't login into Google Drive")
+            return False
+        try:
+            self.listing.pop(folder, None) # the folder can be modified outside of the bot, always get a fresh list
+            s = self.getFile(drive, name, folder) # find the file in our folder
+            if s is None: return False
+            if md5 is not None and s.get('md5Checksum', None) == md5: return None # unchanged
+            s.GetContentFile(s['title'] if target is None else target) # and download it
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            return False
+
+    def delFiles(self, names, folder): # delete matching files from a folder
+        drive = self.login()
+        if not drive:
+            print("Can't login into Google Drive")
+            return False
+        try:
+            for s in list(self.getList(drive, folder)): # get the file list in our folder
+                if s['title'] in names:
+                    self.delete(s, folder)
+            return True
+        except Exception as e:
+            print(e)
+            self.logout()
+            return False
+
+# #####################################################################################
+# JSON codec (datetimes are stored as "%Y-%m-%dT%H:%M:%S" strings)
+class MizabotCodec():
+    def __init__(self):
+        self.datere = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d$') # exact shape of a serialized datetime
+
+    def decodeString(self, v): # return a datetime if the string looks like one
+        if len(v) == 19 and v[10] == 'T' and self.datere.match(v) is not None: # cheap checks first
+            try: return datetime.fromisoformat(v)
+            except ValueError: pass # wrong date like 2020-13-45
+        return v
+
+    def decodeList(self, array): # lists aren't passed to the hook, nested dicts are already decoded
+        for i, v in enumerate(array):
+            if isinstance(v, str): array[i] = self.decodeString(v)
+            elif isinstance(v, list): self.decodeList(v)
+        return array
+
+    def hook(self, pairs): # object_pairs_hook, called once per dict (innermost first)
+        d = {}
+        for k, v in pairs:
+            if isinstance(v, str): d[k] = self.decodeString(v)
+            elif isinstance(v, list): d[k] = self.decodeList(v)
+            else: d[k] = v
+        return d
+
+    def default(self, obj): # serialize everything including datetime objects
+        if isinstance(obj, datetime):
+            return obj.replace(microsecond=0).isoformat()
+        raise TypeError ("Type %s not serializable" % type(obj))
+
+    def loads(self, data):
+        res = json.loads(data, object_pairs_hook=self.hook)
+        if isinstance(res, list): self.decodeList(res)
+        elif isinstance(res, str): res = self.decodeString(res)
+        return res
+
+    def load(self, f):
+        return self.loads(f.read())
+
+    def dumps(self, data):
+        return json.dumps(data, default=self.default)
+
+    def dump(self, data, f):
+        json.dump(data, f, default=self.default)
+
+# #####################################################################################
+# Binary snapshot (compact alternative to save.json, set "save_format" to "binary" in the config tokens)
+# layout: header, string table (every distinct string and key, stored once), then the tagged value tree
+class MizabotBinary():
+    HEADER = b'MZSV'
+    VERSION = 1
+    NONE, FALSE, TRUE, INT, FLOAT, STR, LIST, DICT, DATE, NUMSTR = range(10) # value tags
+
+    def writeVarint(self, out, n): # unsigned LEB128
+        while n > 0x7f:
+            out.append((n & 0x7f) | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def readVarint(self, data, pos):
+        n = 0
+        shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80: return n, pos
+            shift += 7
+
+    def isNumStr(self, v): # numeric strings (discord ids) are stored as integers
+        return 0 < len(v) <= 20 and v.isdigit() and v.isascii() and (v[0] != '0' or len(v) == 1)
+
+    def keyStr(self, k): # dict keys are converted to strings, like in save.json
+        if isinstance(k, str): return k
+        if k is None or isinstance(k, (bool, int, float)): return json.dumps(k)
+        raise TypeError ("Key type %s not serializable" % type(k))
+
+    def encode(self, out, v, strings):
+        if v is None: out.append(self.NONE)
+        elif v is True: out.append(self.TRUE)
+        elif v is False: out.append(self.FALSE)
+        elif isinstance(v, int):
+            out.append(self.INT)
+            self.writeVarint(out, (v << 1) if v >= 0 else ((-v << 1) - 1)) # zigzag
+        elif isinstance(v, float):
+            out.append(self.FLOAT)
+            out += struct.pack('<d', v)
+        elif isinstance(v, str):
+            if self.isNumStr(v):
+                out.append(self.NUMSTR)
+                self.writeVarint(out, int(v))
+            else:
+                out.append(self.STR)
+                self.writeVarint(out, strings.setdefault(v, len(strings)))
+        elif isinstance(v, datetime):
+            out.append(self.DATE)
+            s = int((v.replace(microsecond=0) - datetime(1970, 1, 1)).total_seconds())
+            self.writeVarint(out, (s << 1) if s >= 0 else ((-s << 1) - 1))
+        elif isinstance(v, (list, tuple)):
+            out.append(self.LIST)
+            self.writeVarint(out, len(v))
+            for e in v: self.encode(out, e, strings)
+        elif isinstance(v, dict):
+            out.append(self.DICT)
+            self.writeVarint(out, len(v))
+            for k in v:
+                self.encode(out, self.keyStr(k), strings)
+                self.encode(out, v[k], strings)
+        else:
+            raise TypeError ("Type %s not serializable" % type(v))
+
+    def decode(self, data, pos, strings):
+        t = data[pos]
+        pos += 1
+        if t == self.NONE: return None, pos
+        elif t == self.TRUE: return True, pos
+        elif t == self.FALSE: return False, pos
+        elif t == self.INT or t == self.DATE:
+            n, pos = self.readVarint(data, pos)
+            n = (n >> 1) if not (n & 1) else -((n + 1) >> 1)
+            if t == self.DATE: return datetime(1970, 1, 1) + timedelta(seconds=n), pos
+            return n, pos
+        elif t == self.FLOAT: return struct.unpack_from('<d', data, pos)[0], pos + 8
+        elif t == self.STR:
+            n, pos = self.readVarint(data, pos)
+            return strings[n], pos
+        elif t == self.NUMSTR:
+            n, pos = self.readVarint(data, pos)
+            return str(n), pos
+        elif t == self.LIST:
+            n, pos = self.readVarint(data, pos)
+            l = []
+            for i in range(0, n):
+                v, pos = self.decode(data, pos, strings)
+                l.append(v)
+            return l, pos
+        elif t == self.DICT:
+            n, pos = self.readVarint(data, pos)
+            d = {}
+            for i in range(0, n):
+                k, pos = self.decode(data, pos, strings)
+                d[k], pos = self.decode(data, pos, strings)
+            return d, pos
+        raise ValueError("Invalid tag {} at position {}".format(t, pos - 1))
+
+    def dumps(self, data): # return the snapshot bytes
+        strings = {}
+        body = bytearray()
+        self.encode(body, data, strings)
+        out = bytearray(self.HEADER)
+        out.append(self.VERSION)
+        self.writeVarint(out, len(strings))
+        for k in strings: # dicts keep the insertion order, which is the index order
+            b = k.encode('utf-8')
+            self.writeVarint(out, len(b))
+            out += b
+        return bytes(out + body)
+
+    def loads(self, data): # read the snapshot bytes
+        if data[:4] != self.HEADER: raise ValueError("Not a binary snapshot")
+        if data[4] != self.VERSION: raise ValueError("Unsupported snapshot version {}".format(data[4]))
+        n, pos = self.readVarint(data, 5)
+        strings = []
+        for i in range(0, n):
+            l, pos = self.readVarint(data, pos)
+            strings.append(data[pos:pos+l].decode('utf-8'))
+            pos += l
+        return self.decode(data, pos, strings)[0]
+
+    def convert(self, src, dst, codec): # convert a save file between the two formats (direction chosen from the file extensions)
+        if src.endswith('.bin'):
+            with open(src, 'rb') as f:
+                data = self.loads(f.read())
+        else:
+            with open(src) as f:
+                data = codec.load(f)
+        if dst.endswith('.bin'):
+            with open(dst, 'wb') as f:
+                f.write(self.dumps(data))
+        else:
+            with open(dst, 'w') as f:
+                codec.dump(data, f)
+
+# #####################################################################################
+# Save Journal (append-only log of the modified save.json sections)
+class MizabotJournal():
+    def __init__(self, bot, ratio=0.5):
+        self.bot = bot # it's the bot
+        self.path = "save.journal" # local journal file, uploaded alongside save.json
+        self.ratio = ratio # the journal is compacted into save.json once it's bigger than this fraction of the save
+        self.count = 0 # number of entries in the journal
+        self.size = 0 # size of the journal, in bytes
+        self.digests = {} # digest of each section, as last written
+        self.sizes = {} # serialized size of each section, as last written
+        self.unsent = False # True if the local journal has entries not uploaded yet
+
+    def digest(self, value): # fingerprint of a serialized section
+        return hashlib.sha1(value.encode('utf-8')).digest()
+
+    def rebuild(self, data): # fingerprint every section of data
+        self.digests = {}
+        self.sizes = {}
+        for k in data:
+            v = self.bot.codec.dumps(data[k])
+            self.digests[k] = self.digest(v)
+            self.sizes[k] = len(v)
+
+    def reset(self, data): # called after a full snapshot: the journal is emptied and the digests rebuilt
+        self.rebuild(data)
+        self.count = 0
+        self.size = 0
+        self.unsent = False
+        try: os.remove(self.path)
+        except: pass
+
+    def changes(self, data, sections=None): # return the serialized sections which changed since the last write
+        res = {}
+        for k in (data if sections is None else sections):
+            if k not in data: continue
+            s = self.bot.codec.dumps(data[k])
+            d = self.digest(s)
+            if self.digests.get(k, None) != d:
+                res[k] = (s, d)
+        return res
+
+    def fits(self, changes): # True if the changes can be added without making the journal too big compared to the save
+        return self.size + sum([len(changes[k][0]) for k in changes]) <= self.ratio * sum(self.sizes.values())
+
+    def full(self, sections): # same as fits() but estimated from the last written size of the sections (before serializing them)
+        return self.size + sum([self.sizes.get(k, 0) for k in sections]) > self.ratio * sum(self.sizes.values())
+
+    def append(self, changes): # write the entries at the end of the journal
+        with open(self.path, 'a') as f:
+            for k in changes:
+                line = '{{"k":{},"v":{}}}\n'.format(json.dumps(k), changes[k][0])
+                f.write(line)
+                self.size += len(line)
+        for k in changes:
+            self.digests[k] = changes[k][1]
+            self.sizes[k] = len(changes[k][0])
+        self.count += len(changes)
+        self.unsent = True
+
+    def replay(self, data): # apply the journal entries on top of a save.json content, return the number of entries
+        self.count = 0
+        self.size = 0
+        self.unsent = False # downloaded with the save
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    self.size += len(line)
+                    line = line.strip()
+                    if line == "": continue
+                    try:
+                        e = self.bot.codec.loads(line)
+                        data[e['k']] = e['v']
+                        self.count += 1
+                    except: # truncated entry (crash during a write), everything after it is ignored
+                        break
+        except FileNotFoundError:
+            pass
+        return self.count
+
+    def content(self): # journal file content, for the google drive
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except:
+            return ""
+
+# #####################################################################################
+# Scheduler (coroutines called at a given JST date, used for the announcements)
+class MizabotScheduler():
+    def __init__(self, bot):
+        self.bot = bot # it's the bot
+        self.queue = [] # heap of [date, sequence, group, callback, args, active]
+        self.groups = {} # group name: active entries, for the cancellation
+        self.count = 0 # sequence number, to keep the insertion order between identical dates
+        self.event = None # wake up run() when an earlier entry is added
+        self.dead = 0 # cancelled entries still in the heap
+        self.stats = {'called':0, 'cancelled':0, 'late':0.0} # late is the delay of the last call, in seconds
+
+    def now(self): # current JST time (getJST() is 30 seconds behind)
+        return datetime.utcnow() + timedelta(seconds=32400)
+
+    def add(self, date, group, callback, *args): # call the callback coroutine with args at the JST date, return the entry
+        self.count += 1
+        entry = [date, self.count, group, callback, args, True]
+        heapq.heappush(self.queue, entry)
+        self.groups.setdefault(group, []).append(entry)
+        if self.event is not None and self.queue[0] is entry: # new earliest entry
+            self.event.set()
+        return entry
+
+    def cancel(self, entry): # the entry is removed from the heap once it reaches the top
+        if not entry[5]: return
+        entry[5] = False
+        self.dead += 1
+        self.stats['cancelled'] += 1
+        try: self.groups[entry[2]].remove(entry)
+        except: pass
+        self.clean()
+
+    def cancelGroup(self, group): # cancel every entry of a group
+        for entry in self.groups.pop(group, []):
+            entry[5] = False
+            self.dead += 1
+            self.stats['cancelled'] += 1
+        self.clean()
+
+    def clean(self): # rebuild the heap if it's mostly made of cancelled entries
+        if self.dead > 100 and self.dead * 2 > len(self.queue):
+            self.queue = [e for e in self.queue if e[5]]
+            heapq.heapify(self.queue)
+            self.dead = 0
+
+    def pending(self, group): # active entries of a group, sorted by date
+        return sorted(self.groups.get(group, []))
+
+    async def run(self): # background task calling the entries when they are due
+        self.event = asyncio.Event()
+        while True:
+            try:
+                while len(self.queue) > 0 and not self.queue[0][5]: # drop the cancelled entries
+                    heapq.heappop(self.queue)
+                    self.dead -= 1
+                self.event.clear()
+                if len(self.queue) == 0:
+                    await self.event.wait()
+                    continue
+                delay = (self.queue[0][0] - self.now()).total_seconds()
+                if delay > 0:
+                    try: await asyncio.wait_for(self.event.wait(), min(delay, 60)) # short sleeps to follow the clock
+                    except asyncio.TimeoutError: pass
+                    continue
+                entry = heapq.heappop(self.queue)
+                entry[5] = False
+                try: self.groups[entry[2]].remove(entry)
+                except: pass
+                if len(self.groups.get(entry[2], [None])) == 0: self.groups.pop(entry[2])
+                self.stats['called'] += 1
+                self.stats['late'] = -delay
+                try:
+                    await entry[3](*entry[4])
+                except Exception as e:
+                    await self.bot.sendError('scheduler', "{}: {}".format(entry[2], e))
+            except asyncio.CancelledError:
+                await self.bot.sendError('scheduler', 'cancelled')
+                return
+            except Exception as e:
+                await self.bot.sendError('scheduler', str(e))
+                await asyncio.sleep(10)
+
+# #####################################################################################
+# Cache (limited size, the least recently used entries are evicted first, each entry can expire)
+class MizabotCache():
+    def __init__(self, size=1000, ttl=None):
+        self.size = size # maximum number of entries
+        self.ttl = ttl # default time to live of an entry, in seconds (None to never expire)
+        self.data = collections.OrderedDict() # key: [value, expiration (monotonic time) or None], least recently used first
+        self.stats = {'hit':0, 'miss':0, 'expired':0, 'evicted':0}
+
+    def get(self, key, default=None): # return the value or default if missing or expired
+        e = self.data.get(key, None)
+        if e is not None and e[1] is not None and e[1] <= time.monotonic():
+            del self.data[key]
+            self.stats['expired'] += 1
+            e = None
+        if e is None:
+            self.stats['miss'] += 1
+            return default
+        self.data.move_to_end(key)
+        self.stats['hit'] += 1
+        return e[0]
+
+    def set(self, key, value, ttl=None): # add or replace an entry (ttl is in seconds, the default one is used if None)
+        if ttl is None: ttl = self.ttl
+        self.data[key] = [value, None if ttl is None else time.monotonic() + ttl]
+        self.data.move_to_end(key)
+        while len(self.data) > self.size:
+            self.data.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def pop(self, key): # remove an entry
+        self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def status(self): # string describing the cache
+        total = self.stats['hit'] + self.stats['miss']
+        return "{}/{} entries, {} hits, {} misses ({:.0f}% hit rate), {} expired, {} evicted".format(len(self.data), self.size, self.stats['hit'], self.stats['miss'], 100 * self.stats['hit'] / total if total > 0 else 0, self.stats['expired'], self.stats['evicted'])
+
+# #####################################################################################
+# HTTP client (one connection pool shared by the cogs)
+class MizabotWeb():
+    def __init__(self, bot):
+        self.bot = bot # it's the bot
+        self.session = None # created on the first request (it needs the event loop)
+        self.settings = {'limit':100, 'limit_per_host':10, 'keepalive':30, 'timeout':20, 'connect':10} # total connections, connections per host, idle keep-alive seconds, request timeout, connection timeout
+        self.stats = {} # host: {'count', 'failed', 'total', 'max'} (requests, exceptions, total and maximum time to the response headers)
+
+    def getSession(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.settings['limit'], limit_per_host=self.settings['limit_per_host'], keepalive_timeout=self.settings['keepalive'], ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.settings['timeout'], connect=self.settings['connect']))
+        return self.session
+
+    @contextlib.asynccontextmanager
+    async def request(self, method, url, **kwargs): # use with "async with", like aiohttp.ClientSession.request()
+        host = urlsplit(url).netloc
+        if host not in self.stats: self.stats[host] = {'count':0, 'failed':0, 'total':0.0, 'max':0.0}
+        stats = self.stats[host]
+        stats['count'] += 1
+        start = time.monotonic()
+        try:
+            r = await self.getSession().request(method, url, **kwargs)
+        except Exception:
+            stats['failed'] += 1
+            raise
+        elapsed = time.monotonic() - start
+        stats['total'] += elapsed
+        if elapsed > stats['max']: stats['max'] = elapsed
+        try:
+            yield r
+        finally:
+            r.release() # the connection goes back to the pool
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def status(self): # string describing the requests per host
+        msg = ""
+        for host in self.stats:
+            s = self.stats[host]
+            msg += "**{}** ▫️ {} request(s), {} failed, {:.0f} ms average, {:.0f} ms max\n".format(host, s['count'], s['failed'], 1000 * s['total'] / max(1, s['count'] - s['failed']), 1000 * s['max'])
+        if msg == "": msg = "No requests"
+        return msg
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+# #####################################################################################
+# Metrics (event loop lag, latency histograms of the commands, events and tasks, slow callbacks)
+class MizabotMetrics():
+    buckets = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 30, 60) # histogram upper bounds, in seconds (plus one bucket for the slower ones)
+
+    def __init__(self, bot):
+        self.bot = bot # it's the bot
+        self.interval = 0.5 # event loop lag sampling period, in seconds
+        self.slow = 0.1 # lag or asyncio callback duration reported as a stall, in seconds
+        self.debug = False # True if the asyncio debug mode is used to catch the slow callbacks
+        self.reset()
+
+    def reset(self):
+        self.since = datetime.utcnow()
+        self.data = {} # kind ('loop', 'command', 'event', 'task'): {name: [count, total, max, histogram]}
+        self.stalls = collections.deque(maxlen=50) # latest stalls: [utc date, description, duration]
+
+    def record(self, kind, name, elapsed): # add a duration (in seconds) to the histogram of kind/name
+        k = self.data.get(kind, None)
+        if k is None: k = self.data[kind] = {}
+        e = k.get(name, None)
+        if e is None: e = k[name] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+        e[0] += 1
+        e[1] += elapsed
+        if elapsed > e[2]: e[2] = elapsed
+        e[3][bisect.bisect_left(self.buckets, elapsed)] += 1
+
+    @contextlib.contextmanager
+    def timer(self, kind, name): # use with "with", record the duration of the block
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - start)
+
+    async def run(self): # sample the event loop lag: how late a sleep wakes up
+        while True:
+            try:
+                start = time.perf_counter()
+                await asyncio.sleep(self.interval)
+                lag = max(0, time.perf_counter() - start - self.interval)
+                self.record('loop', 'lag', lag)
+                if lag >= self.slow: self.stalls.append([datetime.utcnow(), 'event loop lag', lag])
+            except asyncio.CancelledError:
+                return
+
+    def setDebug(self, state): # asyncio logs the callbacks slower than self.slow in debug mode, they are added to the stalls
+        if state == self.debug: return
+        self.debug = state
+        logger = logging.getLogger('asyncio')
+        if state: logger.addFilter(self.catchSlowCallback)
+        else: logger.removeFilter(self.catchSlowCallback)
+        self.bot.loop.slow_callback_duration = self.slow
+        self.bot.loop.set_debug(state)
+
+    def catchSlowCallback(self, record): # logging filter
+        if record.msg.startswith('Executing') and len(record.args) >= 2:
+            self.stalls.append([datetime.utcnow(), str(record.args[0])[:200], record.args[1]])
+        return True
+
+    def percentile(self, e, p): # upper bound of the bucket containing the p percentile
+        n = e[0] * p
+        c = 0
+        for i in range(0, len(e[3])):
+            c += e[3][i]
+            if c >= n: return self.buckets[i] if i < len(self.buckets) else e[2]
+        return e[2]
+
+    def status(self, limit=8): # string describing the slowest entries of each kind
+        msg = "Since {} UTC\n".format(self.since.strftime("%Y-%m-%d %H:%M"))
+        for kind in self.data:
+            msg += "**{}**\n".format(kind.capitalize())
+            for name, e in sorted(self.data[kind].items(), key=lambda x: x[1][1], reverse=True)[:limit]:
+                msg += "{} ▫️ {} × {:.1f} ms avg, p50 < {:.0f} ms, p95 < {:.0f} ms, {:.0f} ms max\n".format(name, e[0], 1000 * e[1] / e[0], 1000 * self.percentile(e, 0.5), 1000 * self.percentile(e, 0.95), 1000 * e[2])
+        msg += "**Stalls** ▫️ {} (asyncio debug {})\n".format(len(self.stalls), "on" if self.debug else "off")
+        for st in list(self.stalls)[-5:]:
+            msg += "{} ▫️ {:.0f} ms ▫️ `{}`\n".format(st[0].strftime("%H:%M:%S"), 1000 * st[2], st[1][:80])
+        return msg
+
+    def dump(self): # everything, json serializable
+        return {'since':self.since.strftime("%Y-%m-%dT%H:%M:%S"), 'buckets':list(self.buckets), 'data':copy.deepcopy(self.data), 'stalls':[[st[0].strftime("%Y-%m-%dT%H:%M:%S"), st[1], st[2]] for st in self.stalls]}
+
+    def write(self, data, filename='metrics.json'): # append a dump to a local file, one json object per line (blocking, use callWorker)
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(data) + '\n')
+
+# #####################################################################################
+# Database loader (sqlite files stored in the files folder of the google drive)
+class MizabotDB():
+    def __init__(self, bot, name, opener=None):
+        self.bot = bot # it's the bot
+        self.name = name # file name on the drive and on the disk
+        self.opener = opener # function(conn) run in a thread on a new connection (to build indexes, etc...), return a dict stored in info
+        self.conn = None # current connection
+        self.info = {} # opener result for the current connection
+        self.state = None # None = not loaded (or error), False = not on the drive, True = ready
+        self.version = 0 # incremented each time the connection is replaced
+        self.loading = None # task of the download in progress
+        self.md5 = None # checksum of the file in use, the download is skipped if the drive file is the same
+
+    def prepare(self, path): # open the file and call the opener (run in a thread). the checksum is computed before the opener modifies the file
+        h = hashlib.md5()
+        if os.path.isfile(path): # else a new database is created
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1048576), b''): h.update(chunk)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            info = {} if self.opener is None else self.opener(conn)
+        except:
+            conn.close()
+            raise
+        return conn, (info if info is not None else {}), h.hexdigest()
+
+    def swap(self, conn, info, md5=None): # replace the connection. done on the event loop so a query never sees a closed connection
+        old = self.conn
+        self.conn = conn
+        self.info = info
+        self.md5 = md5
+        self.state = True
+        self.version += 1
+        if old is not None:
+            try: old.close()
+            except: pass
+
+    async def open(self): # use the file already on the disk
+        conn, info, md5 = await self.bot.callWorker(self.prepare, self.name)
+        self.swap(conn, info, md5)
+
+    def load(self): # download the file, or join the download in progress. return an awaitable, True if the database in use is the one on the drive
+        if self.loading is None:
+            self.loading = asyncio.ensure_future(self.download())
+        return asyncio.shield(self.loading) # a cancelled caller doesn't cancel the others
+
+    async def download(self):
+        try:
+            tmp = self.name + '.tmp'
+            res = await self.bot.callThread(self.bot.drive.dlFile, self.name, self.bot.tokens['files'], tmp, (self.md5 if self.conn is not None else None))
+            if res is None: return True # same file, the current connection and its indexes are kept
+            if not res:
+                if self.conn is None: self.state = False
+                return False
+            os.replace(tmp, self.name) # the current connection keeps reading the previous file until the swap
+            await self.open()
+            return True
+        except Exception as e:
+            if self.conn is None: self.state = None
+            await self.bot.sendError('load {}'.format(self.name), str(e))
+            return False
+        finally:
+            self.loading = None
+
+    async def ready(self): # True if the database can be used, wait for the download if needed
+        if self.loading is not None: await asyncio.shield(self.loading)
+        elif self.state is None: await self.load()
+        return self.state == True
+
+# #####################################################################################
+# Guild policies and on_message callbacks (looked up for each message)
+class MizabotPolicy():
+    __slots__ = ['prefix', 'banned', 'pending', 'channels']
+
+    def __init__(self, prefix='$', banned=False, pending=False, channels=None):
+        self.prefix = prefix # command prefix
+        self.banned = banned # True if the guild is banned
+        self.pending = pending # True if the guild is waiting for approval
+        self.channels = channels # frozenset of the channel ids permitted to use all commands, None if all are
+
+    def isAuthorized(self, channel_id):
+        return self.channels is None or channel_id in self.channels
+
+class MizabotCallback():
+    __slots__ = ['name', 'callback', 'high', 'guild', 'channel', 'author', 'active', 'count', 'skipped', 'failed', 'total', 'max']
+
+    def __init__(self, name, callback, high, guild, channel, author, active):
+        self.name = name
+        self.callback = callback # coroutine function, take the message as parameter
+        self.high = high # True if high priority
+        self.guild = guild # only called for the messages of this guild id (None for all)
+        self.channel = channel # only called for the messages of this channel id (None for all)
+        self.author = author # only called for the messages of this user id (None for all)
+        self.active = active # function returning False when the callback has nothing to do (None if always active)
+        self.count = 0 # calls
+        self.skipped = 0 # messages ignored because of author or active
+        self.failed = 0 # calls raising an exception
+        self.total = 0.0 # total time spent in the callback, in seconds
+        self.max = 0.0 # longest call, in seconds
+
+    def matches(self, message):
+        if self.author is not None and message.author.id != self.author: return False
+        if self.active is not None and not self.active(): return False
+        return True
+
+# #####################################################################################
+# Bot
+class Mizabot(commands.Bot):
+    def __init__(self):
+        self.botversion = "5.59"
+        self.running = True
+        self.boot_flag = False
+        self.starttime = datetime.utcnow() # used to check the uptime
+        self.process = psutil.Process() # script process
+        self.process.cpu_percent() # called once to initialize
+        self.errn = 0 # count the number of errors
+        self.cogn = 0 # will store how many cogs are expected to be in memory
+        self.exit_flag = False # set to true when sigterm is received
+        self.dirty = set() # save sections modified since the last save (None means unknown, everything is checked)
+        self.dirtyTime = None # time of the first modification since the last save
+        self.lastMark = None # time of the latest modification
+        self.saveEvent = None # wake up the save task (created with the task)
+        self.saveStats = {'count':0, 'failed':0, 'last':None, 'total':0.0} # number of saves, failures, last and total save durations
+        self.tasks = {} # store my tasks
+        self.autosaving = False # set to true during a save
+        self.saving = set() # sections being written by autosave()
+        self.drive = MizabotDrive(self) # google drive instance
+        self.codec = MizabotCodec() # json (de)serializer
+        self.binary = MizabotBinary() # binary snapshot (de)serializer
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mizabot') # thread for the google drive calls and the save. only one, the drive session isn't thread safe
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mizaworker') # thread for the other blocking calls (sqlite, disk), so they never delay a save
+        self.channels = {} # store my channels
+        self.newserver = {'servers':[], 'owners':[], 'pending':{}} # banned servers, banned owners, pending servers
+        self.gw = {'state':False} # guild war data
+        self.maintenance = {"state" : False, "time" : None, "duration" : "0"} # gbf maintenance data
+        self.spark = [{}, []] # user spark data, banned users
+        self.stream = {'time':None, 'content':[]} # stream command content
+        self.schedule = [] # gbf schedule
+        self.prefixes = {} # guild prefixes
+        self.st = {} # guild strike times
+        self.bot_maintenance = None # bot maintenance day
+        self.reminders = {} # user reminders
+        self.tokens = {} # bot tokens
+        self.baguette = {} # secret, config
+        self.baguette_save = {} # secret, save
+        self.gbfaccount = {} # gbf bot account
+        self.ids = {} # discord ids used by the bot
+        self.gbfids = {} # gbf profile ids linked to discord ids
+        self.summonlast = None # support summon database last update
+        self.permitted = {} # guild permitted channels
+        self.policies = None # MizabotPolicy of each guild with settings, per integer guild id (None when it must be rebuilt)
+        self.defaultPolicy = MizabotPolicy() # policy of the other guilds
+        self.bannedOwners = frozenset() # integer ids of the banned owners
+        self.news = {} # guild news channels
+        self.games = {} # bot status messages
+        self.strings = {} # bot strings
+        self.specialstrings = {} # bot special strings
+        self.emotes = {} # bot custom emote ids
+        self.emote_cache = {} # store used emotes
+        self.granblue = {} # store player/crew ids
+        self.extra = {} # extra data storage for plug'n'play cogs
+        self.on_message = {} # on message callbacks (name: MizabotCallback)
+        self.on_message_plans = {} # callbacks which can match a message of a channel, in call order (channel id: tuple), rebuilt when a callback is set
+        self.memmonitor = {0, None} # for monitoring the memory
+        self.journal = MizabotJournal(self) # save.json change journal
+        self.scheduler = MizabotScheduler(self) # timed announcements
+        self.databases = {} # sqlite databases downloaded from the drive (file name: MizabotDB)
+        self.caches = {} # caches used by the cogs (name: MizabotCache)
+        self.metrics = MizabotMetrics(self) # latency instrumentation
+        self.web = MizabotWeb(self) # http client of the cogs
+        self.saveDebounce = 30 # seconds without modification before saving
+        self.saveMaxLatency = 300 # maximum seconds between a modification and its save
+        # load
+        self.loadConfig()
+        for i in range(0, 100): # try multiple times in case google drive is unresponsive
+            if self.drive.load(): break
+            elif i == 99:
+                print("Google Drive might be unavailable")
+                exit(3)
+            time.sleep(20)
+        if not self.load(): exit(2) # first loading must success
+        super().__init__(command_prefix=self.prefix, case_insensitive=True, description="MizaBOT version {}\nSource code: https://github.com/MizaGBF/MizaBOT.\nDefault command prefix is '$', use $setPrefix to change it on your server.".format(self.botversion), help_command=MizabotHelp(), owner=self.ids['owner'], max_messages=None)
+
+    def loadCog(self, *cog_classes):
+        for c in cog_classes:
+            try:
+                self.add_cog(cogs.cog_get(c, self))
+            except Exception as e:
+                print("import " + c + ": " + str(e))
+                self.errn += 1
+            self.cogn += 1
+
+    def mainLoop(self): # main loop
+        while self.running:
+            try:
+                self.loop.run_until_complete(self.start(self.tokens['discord']))
+            except Exception as e: # handle exceptions here to avoid the bot dying
+                if self.savePending:
+                    self.save()
+                self.errn += 1
+                print("Main Loop Exception: " + str(e))
+        try: self.loop.run_until_complete(self.web.close())
+        except: pass
+        if self.save():
+            print('Autosave Success')
+        else:
+            print('Autosave Failed')
+
+    async def close(self): # called by logout()
+        await self.web.close()
+        await super().close()
+
+    def prefix(self, client, message): # command prefix check
+        return self.policy(message.guild).prefix # retrieve the prefix used by the server ($ by default)
+
+    def buildPolicies(self): # compile prefixes, newserver and permitted into one policy per guild
+        policies = {}
+        for id in set(self.prefixes) | set(self.newserver['servers']) | set(self.newserver['pending']) | set(self.permitted):
+            try: gid = int(id)
+            except: continue
+            channels = self.permitted.get(id, None)
+            policies[gid] = MizabotPolicy(self.prefixes.get(id, '$'), id in self.newserver['servers'], id in self.newserver['pending'], None if channels is None else frozenset(channels))
+        owners = []
+        for id in self.newserver['owners']:
+            try: owners.append(int(id))
+            except: pass
+        self.bannedOwners = frozenset(owners)
+        self.policies = policies
+
+    def policy(self, guild): # policy of a guild (the default one for direct messages)
+        if guild is None: return self.defaultPolicy
+        if self.policies is None: self.buildPolicies()
+        return self.policies.get(guild.id, self.defaultPolicy)
+
+    def loadConfig(self): # pretty simple
+        try:
+            with open('config.json') as f:
+                data = self.codec.load(f) # deserializer here
+                self.tokens = data['tokens']
+                self.baguette = data.get('baguette', {})
+                self.ids = data.get('ids', {})
+                self.games = data.get('games', ['Granblue Fantasy'])
+                self.strings = data.get('strings', {})
+                self.specialstrings = data.get('specialstrings', {})
+                self.emotes = data.get('emotes', {})
+                self.granblue = data.get('granblue', {"gbfgcrew":{}})
+                self.saveDebounce = self.tokens.get('save_debounce', self.saveDebounce)
+                self.saveMaxLatency = self.tokens.get('save_maxlatency', self.saveMaxLatency)
+        except Exception as e:
+            print('loadConfig(): {}\nCheck your \'config.json\' for the above error.'.format(e))
+            exit(1) # instant quit if error
+
+    def load(self): # same thing but for the save (save.bin if it exists, else save.json)
+        try:
+            if os.path.isfile('save.bin'):
+                with open('save.bin', 'rb') as f:
+                    data = self.binary.loads(f.read())
+            else:
+                with open('save.json') as f:
+                    data = self.codec.load(f) # deserializer here
+            self.journal.replay(data) # apply the changes made since the last snapshot
+            # more check to avoid issues when reloading the file during runtime, if new data was added
+            self.newserver = data.get('newserver', {'servers':[], 'owners':[], 'pending':{}})
+            self.prefixes = data.get('prefixes', {})
+            self.baguette_save = data.get('baguette_save', {})
+            self.gbfaccount = data.get('gbfaccount', {})
+            self.bot_maintenance = data.get('bot_maintenance', None)
+            if 'maintenance' in data:
+                if data['maintenance'].get('state', False) == True:
+                    self.maintenance = data['maintenance']
+                else:
+                    self.maintenance = {"state" : False, "time" : None, "duration" : 0}
+            else: self.maintenance = {"state" : False, "time" : None, "duration" : 0}
+            self.stream = data.get('stream', {'time':None, 'content':[]})
+            self.schedule = data.get('schedule', [])
+            self.st = data.get('st', {})
+            self.spark = data.get('spark', [{}, []])
+            self.gw = data.get('gw', {})
+            self.reminders = data.get('reminders', {})
+            self.permitted = data.get('permitted', {})
+            self.news = data.get('news', {})
+            self.extra = data.get('extra', {})
+            self.gbfids = data.get('gbfids', {})
+            self.summonlast = data.get('summonlast', None)
+            self.policies = None
+            self.journal.rebuild(self.getSaveData()) # fingerprint what we just loaded
+            return True
+        except Exception as e:
+            self.errn += 1
+            print('load(): {}'.format(e))
+            return False
+
+    def getSaveData(self): # build the content of save.json
+        data = {}
+        data['newserver'] = self.newserver
+        data['prefixes'] = self.prefixes
+        data['baguette_save'] = self.baguette_save
+        data['bot_maintenance'] = self.bot_maintenance
+        data['maintenance'] = self.maintenance
+        data['stream'] = self.stream
+        data['schedule'] = self.schedule
+        data['st'] = self.st
+        data['spark'] = self.spark
+        data['gw'] = self.gw
+        data['reminders'] = self.reminders
+        data['news'] = self.news
+        data['permitted'] = self.permitted
+        data['extra'] = self.extra
+        data['gbfids'] = self.gbfids
+        data['summonlast'] = self.summonlast
+        return data
+
+    @property
+    def savePending(self): # true if a save is needed, or in progress
+        return len(self.dirty) > 0 or len(self.saving) > 0
+
+    @savePending.setter
+    def savePending(self, value): # kept for compatibility, setting it to True is the same as markDirty()
+        if value: self.markDirty()
+        else:
+            self.dirty = set()
+            self.dirtyTime = None
+
+    def markDirty(self, section=None): # flag a section of the save as modified (see getSaveData() for the names). the save task will write it
+        now = time.monotonic()
+        if len(self.dirty) == 0: self.dirtyTime = now
+        self.lastMark = now
+        self.dirty.add(section)
+        if section is None or section in ('prefixes', 'newserver', 'permitted'): self.policies = None # rebuilt on the next message
+        if self.saveEvent is not None: self.saveEvent.set()
+
+    def saveStatus(self): # string describing the save queue
+        msg = "{} section(s)".format(len(self.dirty))
+        if self.dirtyTime is not None: msg += ", oldest {:.0f}s ago".format(time.monotonic() - self.dirtyTime)
+        if self.saveStats['last'] is not None: msg += ", last save {:.2f}s".format(self.saveStats['last'])
+        if self.saveStats['count'] > 0: msg += ", avg {:.2f}s over {}".format(self.saveStats['total'] / self.saveStats['count'], self.saveStats['count'])
+        if self.saveStats['failed'] > 0: msg += ", {} failed".format(self.saveStats['failed'])
+        return msg
+
+    def snapshot(self, sections=None): # copy of the save data (or only of some sections), so it can be serialized outside of the event loop
+        data = self.getSaveData()
+        if sections is not None: data = {k: data[k] for k in sections if k in data}
+        return copy.deepcopy(data)
+
+    def saveFile(self): # name of the save file, depending on the format in the config
+        return 'save.bin' if self.tokens.get('save_format', 'json') == 'binary' else 'save.json'
+
+    def save(self, full=False, data=None, sections=None): # saving. only the modified sections are written to the journal, unless a full snapshot is needed
+        try:
+            partial = data is not None and sections is not None # data only contains the modified sections
+            if data is None: data = self.getSaveData()
+            if not full:
+                changes = self.journal.changes(data, sections)
+                if len(changes) == 0 and not self.journal.unsent: return True # nothing to do
+                if partial or self.journal.fits(changes): # partial data can't be compacted, the next save will do it
+                    if len(changes) > 0: self.journal.append(changes) # locally first
+                    if not self.drive.saveJournal(self.journal.content()): # sending to the google drive (the digests are already updated, unsent makes the next save retry)
+                        raise Exception("Couldn't save the journal to google drive")
+                    self.journal.unsent = False
+                    return True
+            # full snapshot (compaction)
+            target = self.saveFile()
+            if target == 'save.bin':
+                with open(target, 'wb') as outfile:
+                    outfile.write(self.binary.dumps(data)) # locally first
+            else:
+                with open(target, 'w') as outfile:
+                    self.codec.dump(data, outfile) # locally first
+            for other in ['save.json', 'save.bin']: # only keep one local save
+                if other == target: continue
+                try: os.remove(other)
+                except: pass
+            if not self.drive.save(target): # sending to the google drive
+                raise Exception("Couldn't save to google drive")
+            self.journal.reset(data)
+            return True
+        except Exception as e:
+            self.errn += 1
+            print('save(): {}'.format(e))
+            return False
+
+    async def autosave(self, discordDump = False): # called by savetask() when sections are modified
+        if self.autosaving: return False
+        self.autosaving = True
+        result = False
+        pending = self.dirty # the sections modified from now on will be saved next time
+        first = self.dirtyTime
+        self.dirty = set()
+        self.saving = pending
+        self.dirtyTime = None
+        sections = None if (None in pending or discordDump) else list(pending)
+        if sections is not None and self.journal.full(sections): sections = None # a full snapshot will be needed
+        start = time.monotonic()
+        data = self.snapshot(sections) # the loop is only blocked during the copy
+        for i in range(0, 3):
+            if await self.callThread(self.save, discordDump, data, sections): # full snapshot if we dump the file on discord
+                result = True
+                break
+            await asyncio.sleep(0.001)
+        self.saving = set() # put back in dirty below if it failed
+        self.saveStats['last'] = time.monotonic() - start
+        if result:
+            self.saveStats['count'] += 1
+            self.saveStats['total'] += self.saveStats['last']
+        else:
+            self.saveStats['failed'] += 1
+            self.dirty |= pending # put them back for the next try
+            if first is not None and (self.dirtyTime is None or first < self.dirtyTime): self.dirtyTime = first
+            await self.send('debug', embed=self.buildEmbed(title="Failed Save", timestamp=datetime.utcnow()))
+            discordDump = True
+        if discordDump:
+            try:
+                with open(self.saveFile(), 'rb') as infile:
+                    await self.send('debug', self.saveFile(), file=discord.File(infile))
+            except Exception as e:
+                pass
+        self.autosaving = False
+        return result
+
+    async def savetask(self): # background task writing the modified sections, once no modification happened for saveDebounce seconds (or after saveMaxLatency seconds at most)
+        self.saveEvent = asyncio.Event()
+        while True:
+            try:
+                if len(self.dirty) == 0 or self.exit_flag:
+                    self.saveEvent.clear()
+                    await self.saveEvent.wait()
+                    continue
+                delay = min(self.lastMark + self.saveDebounce, self.dirtyTime + self.saveMaxLatency) - time.monotonic()
+                if delay > 0:
+                    self.saveEvent.clear()
+                    try: await asyncio.wait_for(self.saveEvent.wait(), delay) # a new modification recomputes the delay
+                    except asyncio.TimeoutError: pass
+                    continue
+                if not await self.autosave():
+                    await asyncio.sleep(self.saveDebounce) # wait a bit before retrying
+            except asyncio.CancelledError:
+                await self.sendError('savetask', 'cancelled')
+                return
+            except Exception as e:
+                await self.sendError('savetask', str(e))
+                await asyncio.sleep(self.saveDebounce)
+
+    async def statustask(self): # background task changing the bot status
+        await self.send('debug', embed=self.buildEmbed(title="statustask() started", timestamp=datetime.utcnow()))
+        while True:
+            try:
+                await asyncio.sleep(1200)
+                with self.metrics.timer('task', 'statustask'):
+                    await self.change_presence(status=discord.Status.online, activity=discord.activity.Game(name=random.choice(self.games)))
+                    # check if it's time for the bot maintenance for me (every 2 weeks or so)
+                    c = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+                    if self.bot_maintenance and c > self.bot_maintenance and c.day == 16:
+                        await self.send('debug', self.get_user(self.ids['owner']).mention + " ▫️ Time for maintenance!")
+                        self.bot_maintenance = c
+                        self.markDirty('bot_maintenance')
+            except asyncio.CancelledError:
+                await self.sendError('statustask', 'cancelled')
+                return
+            except Exception as e:
+                await self.sendError('statustask', str(e))
+
+    async def invitetracker(self): # background task to track the invites of the (You) server
+        if 'you_server' not in self.ids or 'gbfg' not in self.ids: return
+        await asyncio.sleep(2)
+        await self.send('debug', embed=self.buildEmbed(title="invitetracker() started", timestamp=datetime.utcnow()))
+        guilds = [self.get_guild(self.ids['you_server']), self.get_guild(self.ids['gbfg'])]
+        log_channels = {self.ids['you_server']:'youlog', self.ids['gbfg']:'gbfglog'}
+        
+        try:
+            invites = {}
+            for g in guilds:
+                res = await g.invites()
+                invites[g.id] = {}
+                for i in res:
+                    invites[g.id][i.code] = i
+        except:
+            await self.sendError('invitetracker', 'cancelled, failed to retrieve a guild data')
+            return
+
+        while True:
+            try:
+                await asyncio.sleep(120)
+                for g in guilds:
+                    res = await g.invites()
+                    currents = {}
+                    for i in res:
+                        currents[i.code] = i
+
+                    for i in currents:
+                        if i in invites[g.id]:
+                            if currents[i].uses is not None and currents[i].uses != invites[g.id][i].uses:
+                                await self.send(log_channels[g.id], embed=bot.buildEmbed(title="Invite `{}` used".format(i), description="**Uses:** {}".format(currents[i].uses), timestamp=datetime.utcnow(), color=0xfcba03))
+                        else:
+                            msg = ""
+                            if currents[i].max_uses != 0: msg += "**Max uses:** {}\n".format(currents[i].max_uses)
+                            if currents[i].inviter is not None:
+                                msg += "**Inviter:** {}\n".format(currents[i].inviter)
+                            if currents[i].max_age != 0:
+                                if currents[i].max_age < 3600: msg += "**Duration:** {} minutes\n".format(currents[i].max_age // 60)
+                                else: msg += "**Duration:** {} hours\n".format(currents[i].max_age // 3600)
+                            msg += "**Channel:** {}\n".format(currents[i].channel.name)
+                            msg += "**Url:** {}\n".format(currents[i].url)
+                            await self.send(log_channels[g.id], embed=bot.buildEmbed(title="New Invite ▫️ `{}`".format(i), description=msg, timestamp=datetime.utcnow(), color=0xfcba03))
+
+                    for i in invites[g.id]:
+                        if i not in currents:
+                            await self.send(log_channels[g.id], embed=bot.buildEmbed(title="Revoked Invite ▫️ `{}`".format(i), timestamp=datetime.utcnow(), color=0xfcba03))
+
+                    invites[g.id] = currents
+            except asyncio.CancelledError:
+                await self.sendError('invitetracker', 'cancelled')
+                return
+            except Exception as e:
+                await self.sendError('invitetracker', str(e))
+                try: invites[g.id] = currents
+                except: pass
+                if str(e).startswith('500 INTERNAL SERVER ERROR'): # assume discord server issues and sleep
+                    await asyncio.sleep(1000)
+
+    def isAuthorized(self, ctx): # check if the command is authorized
+        return self.policy(ctx.guild).isAuthorized(ctx.channel.id)
+
+    def isYouServer(self, ctx): # check if the context is in the (You) guild
+        if ctx.message.author.guild.id == self.ids.get('you_server', -1):
+            return True
+        return False
+
+    def isDebugServer(self, ctx): # check if the context is in the debug guild
+        if ctx.message.author.guild.id == self.ids.get('debug_server', -1):
+            return True
+        return False
+
+    def isMod(self, ctx): # check if the member has the manage_message permission
+        if ctx.author.guild_permissions.manage_messages or ctx.author.id == self.ids.get('owner', -1):
+            return True
+        return False
+
+    def isOwner(self, ctx):
+        if ctx.message.author.id == self.ids.get('owner', -1):
+            return True
+        return False
+
+    def getEmote(self, key): # retrieve a custom emote
+        if key in self.emote_cache:
+            return self.emote_cache[key]
+        elif key in self.emotes:
+            try:
+                e = self.get_emoji(self.emotes[key]) # ids are defined in config.json
+                if e is not None: self.emote_cache[key] = e
+                return e
+            except:
+                return None
+        return None
+
+    async def react(self, ctx, key): # add a reaction using a custom emote defined in config.json
+        try:
+            await ctx.message.add_reaction(self.getEmote(key))
+            return True
+        except Exception as e:
+            await self.sendError('react', str(e))
+            return False
+
+    async def unreact(self, ctx, key): # remove a reaction using a custom emote defined in config.json
+        try:
+            await ctx.message.remove_reaction(self.getEmote(key), ctx.guild.me)
+            return True
+        except Exception as e:
+            await self.sendError('unreact', str(e))
+            return False
+
+    def buildEmbed(self, **options): # make a full embed
+        embed = discord.Embed(title=options.get('title'), description=options.pop('description', ""), url=options.pop('url', ""), color=options.pop('color', random.randint(0, 16777216)))
+        fields = options.pop('fields', [])
+        inline = options.pop('inline', False)
+        for f in fields:
+            embed.add_field(name=f.get('name'), value=f.get('value'), inline=f.pop('inline', inline))
+        buffer = options.pop('thumbnail', None)
+        if buffer is not None: embed.set_thumbnail(url=buffer)
+        buffer1 = options.pop('footer', None)
+        buffer2 = options.pop('footer_url', None)
+        if buffer1 is not None and buffer2 is not None: embed.set_footer(text=buffer1, icon_url=buffer2)
+        elif buffer1 is not None: embed.set_footer(text=buffer1)
+        elif buffer2 is not None: embed.set_footer(icon_url=buffer2)
+        buffer = options.pop('image', None)
+        if buffer is not None: embed.set_image(url=buffer)
+        buffer = options.pop('timestamp', None)
+        if buffer is not None: embed.timestamp=buffer
+        if 'author' in options:
+            embed.set_author(name=options['author'].pop('name', ""), url=options['author'].pop('url', ""), icon_url=options['author'].pop('icon_url', ""))
+        return embed
+
+    def database(self, name, opener=None): # return the loader of a database file (created on the first call, kept when the cogs are reloaded)
+        if name not in self.databases: self.databases[name] = MizabotDB(self, name, opener)
+        elif opener is not None: self.databases[name].opener = opener
+        return self.databases[name]
+
+    def cache(self, name, size=1000, ttl=None): # create a cache (registered under name for the cache command, replace the previous one)
+        self.caches[name] = MizabotCache(size, ttl)
+        return self.caches[name]
+
+    async def callThread(self, func, *args, **kwargs): # run a blocking function in the drive thread and wait for the result
+        return await self.loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def callWorker(self, func, *args, **kwargs): # same thing in the worker thread, for the blocking calls not using the google drive
+        return await self.loop.run_in_executor(self.worker, functools.partial(func, *args, **kwargs))
+
+    def runTask(self, name, func): # start a task (cancel a previous one with the same name)
+        self.cancelTask(name)
+        self.tasks[name] = self.loop.create_task(func())
+
+    def cancelTask(self, name): # cancel a task
+        if name in self.tasks:
+            self.tasks[name].cancel()
+
+    async def _run_event(self, coro, event_name, *args, **kwargs): # time every event handler
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.metrics.record('event', event_name, time.perf_counter() - start)
+
+    def startTasks(self): # start our tasks
+        self.runTask('metrics', self.metrics.run)
+        self.runTask('status', self.statustask)
+        self.runTask('save', self.savetask)
+        self.runTask('scheduler', self.scheduler.run)
+        self.runTask('invitetracker', self.invitetracker)
+        for c in self.cogs:
+            try:
+                self.get_cog(c).startTasks()
+            except:
+                pass
+
+    def setOnMessageCallback(self, name, callback, high_prio=False, guild=None, channel=None, author=None, active=None): # register a function to be called by on_message (high prio ones will be called first). Must return True (or False to interrupt on_message) and take message as parameter
+        # guild, channel and author are ids restricting the messages passed to the callback, active is a function returning False to skip it
+        self.on_message[name] = MizabotCallback(name, callback, high_prio, guild, channel, author, active)
+        self.on_message_plans = {}
+
+    def removeOnMessageCallback(self, name):
+        if self.on_message.pop(name, None) is not None:
+            self.on_message_plans = {}
+
+    def getOnMessagePlan(self, message): # callbacks to check for the channel of this message
+        plan = self.on_message_plans.get(message.channel.id, None)
+        if plan is None:
+            gid = None if message.guild is None else message.guild.id
+            callbacks = [c for c in self.on_message.values() if (c.channel is None or c.channel == message.channel.id) and (c.guild is None or c.guild == gid)]
+            plan = tuple([c for c in callbacks if c.high] + [c for c in callbacks if not c.high])
+            self.on_message_plans[message.channel.id] = plan
+        return plan
+
+    async def runOnMessageCallback(self, message):
+        for c in self.getOnMessagePlan(message):
+            try:
+                if not c.matches(message):
+                    c.skipped += 1
+                    continue
+                start = time.perf_counter()
+                try:
+                    r = await c.callback(message)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    c.count += 1
+                    c.total += elapsed
+                    if elapsed > c.max: c.max = elapsed
+                if not r: return False
+            except:
+                c.failed += 1
+        return True
+
+    def callbackStatus(self): # string describing the on message callbacks
+        msg = ""
+        for c in self.on_message.values():
+            msg += "**{}**{} ▫️ {} call(s), {} skipped, {} failed, {:.2f} ms average, {:.2f} ms max\n".format(c.name, " (high)" if c.high else "", c.count, c.skipped, c.failed, 1000 * c.total / max(1, c.count), 1000 * c.max)
+        if msg == "": msg = "No callbacks"
+        return msg
+
+    def setChannel(self, name, id_key : str): # "register" a channel to use with send()
+        try:
+            c = self.get_channel(self.ids[id_key])
+            if c is not None: self.channels[name] = c
+        except:
+            self.errn += 1
+            print("Invalid key: {}".format(id_key))
+
+    def setChannelID(self, name, id : int): # same but using an id instead of an id defined in config.json
+        try:
+            c = self.get_channel(id)
+            if c is not None: self.channels[name] = c
+        except:
+            self.errn += 1
+            print("Invalid ID: {}".format(id))
+
+    async def callCommand(self, ctx, command, cog, *args, **kwargs): #call a command in a cog
+        cmds = self.get_cog(cog).get_commands()
+        for c in cmds:
+            if c.name == command:
+                await ctx.invoke(c, *args, **kwargs)
+                return
+        raise Exception("Command `{}` not found".format(command))
+
+    async def send(self, channel_name : str, msg : str = "", embed : discord.Embed = None, file : discord.File = None): # send something to a channel
+        try:
+            await self.channels[channel_name].send(msg, embed=embed, file=file)
+        except Exception as e:
+            self.errn += 1
+            print("Channel {} error: {}".format(channel_name, e))
+
+    async def sendMulti(self, channel_names : list, msg : str = "", embed : discord.Embed = None, file : discord.File = None): # send to multiple channel at the same time
+        for c in channel_names:
+            await self.send(c, msg, embed, file)
+
+    async def sendError(self, func_name : str, msg : str, id = None): # send an error to the debug channel
+        if msg.startswith("403 FORBIDDEN"): return # I'm tired of those errors because people didn't set their channel permissions right
+        if self.errn >= 30: return # disable error messages if too many messages got sent
+        if id is None: id = ""
+        else: id = " {}".format(id)
+        self.errn += 1
+        await self.send('debug', embed=self.buildEmbed(title="Error in {}() {}".format(func_name, id), description=msg, timestamp=datetime.utcnow()))
+
+    def getJST(self, nomicro=False): # get the time in jst
+        if nomicro: return datetime.utcnow().replace(microsecond=0) + timedelta(seconds=32400) - timedelta(seconds=30)
+        return datetime.utcnow() + timedelta(seconds=32400) - timedelta(seconds=30)
+
+    def uptime(self, string=True): # get the uptime
+        delta = datetime.utcnow() - self.starttime
+        if string: return "{}".format(self.getTimedeltaStr(delta, None))
+        else: return delta
+
+    def getTimedeltaStr(self, delta, day=False):
+        if day is None: return "{}d{}h{}m{}s".format(delta.days, delta.seconds // 3600, (delta.seconds // 60) % 60, delta.seconds % 60)
+        elif day: return "{}d{}h{}m".format(delta.days, delta.seconds // 3600, (delta.seconds // 60) % 60)
+        else: return "{}h{}m".format(delta.seconds // 3600, (delta.seconds // 60) % 60)
+
+    # function to build a timedelta from a string (for $remind)
+    def makeTimedelta(self, d): # return None if error
+        flags = {'d':False,'h':False,'m':False}
+        tmp = 0 # buffer
+        sum = 0 # delta in seconds
+        for i in range(0, len(d)):
+            if d[i].isdigit():
+                tmp = (tmp * 10) + int(d[i])
+            elif d[i].lower() in flags:
+                c = d[i].lower()
+                if flags[c]:
+                    return None
+                if tmp < 0:
+                    return None
+                flags[c] = True
+                if c == 'd':
+                    sum += tmp * 86400
+                elif c == 'h':
+                    sum += tmp * 3600
+                elif c == 'm':
+                    sum += tmp * 60
+                tmp = 0
+            else:
+                return None
+        if tmp != 0: return None
+        return timedelta(days=sum//86400, seconds=sum%86400)
+
+# #####################################################################################
+# GracefulExit
+class GracefulExit: # when heroku force the bot to shutdown
+  def __init__(self, bot):
+    self.bot = bot
+    signal.signal(signal.SIGTERM, self.exit_gracefully)
+
+  def exit_gracefully(self,signum, frame):
+    self.bot.exit_flag = True
+    if self.bot.savePending:
+        if self.bot.executor.submit(self.bot.save).result(): # on the drive thread, after the save in progress
+            print('Autosave Success')
+        else:
+            print('Autosave Failed')
+    exit(0)
+
+# #####################################################################################
+# Start
+# make the bot instance
+bot = Mizabot()
+
+# bot events
+@bot.event
+async def on_ready(): # when the bot starts or reconnects
+    await bot.change_presence(status=discord.Status.online, activity=discord.activity.Game(name=random.choice(bot.games)))
+    if not bot.boot_flag:
+        # send a pretty message
+        bot.setChannel('debug', 'debug_channel') # set our debug channel
+        bot.setChannel('pinned', 'you_pinned') # set (you) pinned channel
+        bot.setChannel('gbfglog', 'gbfg_log') # set /gbfg/ lucilius log channel
+        bot.setChannel('youlog', 'you_log') # set (you) log channel
+        bot.startTasks() # start the tasks
+        await bot.send('debug', embed=bot.buildEmbed(title="{} is Ready".format(bot.user.display_name), description="**Version** {}\n**CPU**▫️{}%\n**Memory**▫️{}MB\n**Tasks Count**▫️{}\n**Servers Count**▫️{}\n**Pending Servers**▫️{}\n**Cogs Loaded**▫️{}/{}".format(bot.botversion, bot.process.cpu_percent(), bot.process.memory_full_info().uss >> 20, len(asyncio.all_tasks()), len(bot.guilds), len(bot.newserver['pending']), len(bot.cogs), bot.cogn), thumbnail=bot.user.avatar_url, timestamp=datetime.utcnow()))
+        bot.boot_flag = True
+
+@bot.event
+async def on_guild_join(guild): # when the bot joins a new guild
+    id = str(guild.id)
+    if id == str(bot.ids['debug_server']):
+        return
+    elif id in bot.newserver['servers'] or str(guild.owner.id) in bot.newserver['owners']: # leave if the server is blacklisted
+        try:
+            await bot.send('debug', embed=bot.buildEmbed(title="Banned guild request", description="{} ▫️ {}".format(guild.name, id), thumbnail=guild.icon_url, footer="Owner: {} ▫️ {}".format(guild.owner.name, guild.owner.id)))
+        except Exception as e:
+            await bot.send('debug', "on_guild_join(): {}".format(e))
+        await guild.leave()
+    else: # notify me and add to the pending servers
+        bot.newserver['pending'][id] = guild.name
+        bot.markDirty('newserver')
+        await guild.owner.send(embed=bot.buildEmbed(title="Pending guild request", description="Wait until my owner approve the new server", thumbnail=guild.icon_url))
+        await bot.send('debug', embed=bot.buildEmbed(title="Pending guild request", description="{} ▫️ {}".format(guild.name, id), thumbnail=guild.icon_url, footer="Owner: {} ▫️ {}".format(guild.owner.name, guild.owner.id)))
+
+@bot.event
+async def on_message(message): # to do something with a message
+    if await bot.runOnMessageCallback(message):
+        await bot.process_commands(message) # don't forget
+
+@bot.before_invoke
+async def before_invoke(ctx): # command timing start
+    ctx.metrics_start = time.perf_counter()
+
+@bot.after_invoke
+async def after_invoke(ctx): # command timing end
+    start = getattr(ctx, 'metrics_start', None)
+    if start is not None: bot.metrics.record('command', ctx.command.qualified_name, time.perf_counter() - start)
+
+@bot.check # authorize or not a command on a global scale
+async def global_check(ctx):
+    policy = bot.policy(ctx.guild)
+    if policy.banned or ctx.guild.owner_id in bot.bannedOwners: # ban check
+        await ctx.guild.leave() # leave the server if banned
+        return False
+    if policy.pending: # pending check
+        await bot.react(ctx, 'cooldown')
+        return False
+    return True
+
+@bot.event # if an error happens
+async def on_command_error(ctx, error):
+    msg = str(error)
+    if msg.find('You are on cooldown.') == 0:
+        await bot.react(ctx, 'cooldown')
+    elif msg.find('required argument that is missing') != -1:
+        return
+    elif msg.find('check functions for command') != -1:
+        return
+    elif msg.find('Member "') == 0 or msg.find('Command "') == 0 or msg.startswith('Command raised an exception: Forbidden: 403'):
+        return
+    else:
+        bot.errn += 1
+        await bot.send('debug', embed=bot.buildEmbed(title="⚠ Error caused by {}".format(ctx.message.author), thumbnail=ctx.author.avatar_url, fields=[{"name":"Command", "value":'`{}`'.format(ctx.message.content)}, {"name":"Server", "value":ctx.message.author.guild.name}, {"name":"Message", "value":msg}], timestamp=datetime.utcnow()))
+
+# (You) pin board system
+@bot.event
+async def on_raw_reaction_add(payload):
+    try:
+        if payload.channel_id != bot.ids.get('you_general', -1):
+            return
+        message = await bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
+        reactions = message.reactions
+    except Exception as e:
+        await bot.sendError('raw_react', str(e))
+        return
+    me = message.guild.me
+    role = message.guild.get_role(bot.ids.get('you_member', 0))
+    if role is None: return
+    for reaction in reactions:
+        if reaction.emoji == '📌':
+            users = await reaction.users().flatten()
+            guild = message.guild
+            content = message.content
+            isMod = False
+            count = 0
+            for u in users:
+                if u.id == me.id:
+                    return
+                m = guild.get_member(u.id)
+                if m.guild_permissions.manage_messages:
+                    isMod = True
+                    break
+                elif role in m.roles:
+                    count += 1
+            if not isMod and count < 3:
+                return
+
+            await message.add_reaction('📌')
+
+            dict = {}
+            dict['color'] = 0xf20252
+            dict['title'] = str(message.author)
+            if len(content) != 0: dict['description'] = content + "\n\n"
+            else: dict['description'] = ""
+            dict['description'] += ":earth_asia: [**Link**](https://discordapp.com/channels/{}/{}/{})\n".format(message.guild.id, message.channel.id, message.id)
+            dict['thumbnail'] = {'url':str(message.author.avatar_url)}
+            dict['fields'] = []
+
+            # for attachments
+            if message.attachments:
+                for file in message.attachments:
+                    if file.is_spoiler():
+                        dict['fields'].append({'inline': True, 'name':'Attachment', 'value':f'[{file.filename}]({file.url})'})
+                    elif file.url.lower().endswith(('.png', '.jpeg', '.jpg', '.gif', '.webp')) and 'image' not in dict:
+                        dict['image'] = {'url':file.url}
+                    else:
+                        dict['fields'].append({'inline': True, 'name':'Attachment', 'value':f'[{file.filename}]({file.url})'})
+            embed = discord.Embed.from_dict(dict)
+            embed.timestamp=message.created_at
+            await bot.send('pinned', embed=embed)
+            return
+
+# used by /gbfg/ and (You)
+@bot.event
+async def on_member_update(before, after):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if before.guild.id in guilds:
+        channel = guilds[before.guild.id]
+        if before.display_name != after.display_name:
+                await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Name change".format(after.display_name), 'icon_url':after.avatar_url}, description="{}\n**Before** ▫️ {}\n**After** ▫️ {}".format(after.mention, before.display_name, after.display_name), footer="User ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+        elif len(before.roles) < len(after.roles):
+            for r in after.roles:
+                if r not in before.roles:
+                    await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Role added".format(after.name), 'icon_url':after.avatar_url}, description="{} was given the `{}` role".format(after.mention, r.name), footer="User ID: {}".format(after.id), color=0x1b55b3, timestamp=datetime.utcnow()))
+                    break
+        elif len(before.roles) > len(after.roles):
+            for r in before.roles:
+                if r not in after.roles:
+                    await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Role removed".format(after.name), 'icon_url':after.avatar_url}, description="{} was removed from the `{}` role".format(after.mention, r.name), footer="User ID: {}".format(after.id), color=0x0b234a, timestamp=datetime.utcnow()))
+                    break
+
+@bot.event
+async def on_member_remove(member):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if member.guild.id in guilds:
+        await bot.send(guilds[member.guild.id], embed=bot.buildEmbed(author={'name':"{} ▫️ Left the server".format(member.name), 'icon_url':member.avatar_url}, footer="User ID: {}".format(member.id), timestamp=datetime.utcnow(), color=0xff0000))
+
+@bot.event
+async def on_member_join(member):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if member.guild.id in guilds:
+        channel = guilds[member.guild.id]
+        await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Joined the server".format(member.name), 'icon_url':member.avatar_url}, footer="User ID: {}".format(member.id), timestamp=datetime.utcnow(), color=0x00ff3c))
+
+@bot.event
+async def on_member_ban(guild, user):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if guild.id in guilds:
+        await bot.send(guilds[guild.id], embed=bot.buildEmbed(author={'name':"{} ▫️ Banned from the server".format(user.name), 'icon_url':user.avatar_url}, footer="User ID: {}".format(user.id), timestamp=datetime.utcnow(), color=0xff0000))
+
+@bot.event
+async def on_member_unban(guild, user):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if guild.id in guilds:
+        await bot.send(guilds[guild.id], embed=bot.buildEmbed(author={'name':"{} ▫️ Unbanned from the server".format(user.name), 'icon_url':user.avatar_url}, footer="User ID: {}".format(user.id), timestamp=datetime.utcnow(), color=0x00ff3c))
+
+@bot.event
+async def on_guild_emojis_update(guild, before, after):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if guild.id in guilds:
+        channel = guilds[guild.id]
+        if len(before) < len(after):
+            for e in after:
+                if e not in before:
+                    await bot.send(channel, embed=bot.buildEmbed(author={'name':"{} ▫️ Emoji added".format(e.name), 'icon_url':e.url}, footer="Emoji ID: {}".format(e.id), timestamp=datetime.utcnow(), color=0x00ff3c))
+                    break
+        else:
+            for e in before:
+                if e not in after:
+                    await bot.send(channel, embed=bot.buildEmbed(author={'name':" ▫️ Emoji removed".format(e.name), 'icon_url':e.url}, footer="Emoji ID: {}".format(e.id), timestamp=datetime.utcnow(), color=0xff0000))
+                    break
+
+@bot.event
+async def on_guild_role_create(role):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if role.guild.id in guilds:
+        channel = guilds[role.guild.id]
+        await bot.send(channel, embed=bot.buildEmbed(title="Role created ▫️ `{}`".format(role.name), footer="Role ID: {}".format(role.id), timestamp=datetime.utcnow(), color=0x00ff3c))
+
+@bot.event
+async def on_guild_role_delete(role):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if role.guild.id in guilds:
+        channel = guilds[role.guild.id]
+        await bot.send(channel, embed=bot.buildEmbed(title="Role deleted ▫️ `{}`".format(role.name), footer="Role ID: {}".format(role.id), timestamp=datetime.utcnow(), color=0xff0000))
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if before.guild.id in guilds:
+        channel = guilds[before.guild.id]
+        if before.name != after.name:
+            await bot.send(channel, embed=bot.buildEmbed(title="Role name updated", fields=[{'name':"Before", 'value':before.name}, {'name':"After", 'value':after.name}], footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+        elif before.colour != after.colour:
+            await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `" + after.name + "`", description="Color changed", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+        elif before.hoist != after.hoist:
+            if after.hoist:
+                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role is displayed separately from other members", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+            else:
+                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role is displayed as the other members", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+        elif before.mentionable != after.mentionable:
+            if after.mentionable:
+                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role is mentionable", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+            else:
+                await bot.send(channel, embed=bot.buildEmbed(title="Role updated ▫️ `{}`".format(after.name), description="Role isn't mentionable", footer="Role ID: {}".format(after.id), timestamp=datetime.utcnow(), color=0x1ba6b3))
+
+@bot.event
+async def on_guild_channel_create(channel):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if channel.guild.id in guilds:
+        await bot.send(guilds[channel.guild.id], embed=bot.buildEmbed(title="Channel created ▫️ `{}`".format(channel.name), footer="Channel ID: {}".format(channel.id), timestamp=datetime.utcnow(), color=0xebe007))
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    if 'you_server' not in bot.ids or 'gbfg' not in bot.ids: return
+    guilds = {bot.ids['you_server'] : 'youlog', bot.ids['gbfg'] : 'gbfglog'}
+    if channel.guild.id in guilds:
+        await bot.send(guilds[channel.guild.id], embed=bot.buildEmbed(title="Channel deleted ▫️ `{}`".format(channel.name), footer="Channel ID: {}".format(channel.id), timestamp=datetime.utcnow(), color=0x8a8306))
+
+# create the graceful exit
+grace = GracefulExit(bot)
+
+# load cogs from the cogs folder
+bot.loadCog("general", "gbf_game.GBF_Game", "gbf_utility.GBF_Utility", "gw.GW", "management", "owner", "baguette")
+
+# start the loop
 bot.mainLoop()
\ No newline at end of file
@@ -19,7 +19,7 @@ class GBF_Game(commands.Cog):
         self.pitroulettemax = 0
 
     def startTasks(self):
-        self.bot.setOnMessageCallback('pitroulette', self.pitroulette_callback, True)
+        self.bot.setOnMessageCallback('pitroulette', self.pitroulette_callback, True, channel=self.bot.ids.get('gbfg_general', -1), active=lambda: self.pitroulettestate and self.pitroulettemax > 0)
         self.bot.runTask('cleanroll', self.cleanrolltask)
 
     async def cleanrolltask(self): # silent task
@@ -37,7 +37,7 @@ class GBF_Game(commands.Cog):
                     if d.days >= 30:
                         del self.bot.spark[0][id]
                         change = True
-            if change: self.bot.savePending = True
+            if change: self.bot.markDirty('spark')
         except asyncio.CancelledError:
             await self.bot.sendError('cleanrolltask', 'cancelled')
             return
@@ -394,7 +394,7 @@ class GBF_Game(commands.Cog):
                     self.bot.spark[0].pop(id)
             else:
                 self.bot.spark[0][id] = [crystal, single, ten, datetime.utcnow()]
-            self.bot.savePending = True
+            self.bot.markDirty('spark')
             try:
                 await self.bot.callCommand(ctx, 'seeRoll', 'GBF_Game')
             except Exception as e:
@@ -612,7 +612,7 @@ class GBF_Game(commands.Cog):
 
     async def pitroulette_callback(self, message):
         try:
-            if self.pitroulettestate and self.pitroulettemax > 0 and message.channel.id == self.bot.ids.get('gbfg_general', -1) and message.author.id != self.bot.ids.get('owner', -1) and not message.author.bot:
+            if message.author.id != self.bot.ids.get('owner', -1) and not message.author.bot: # channel and game state are checked by the bot
                 self.pitroulettecount += 1
                 proba = 3 * (self.pitroulettemax + 1)
                 if random.randint(1, 100) <= proba:
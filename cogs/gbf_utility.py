@@ -8,68 +8,224 @@ import math
 import re
 import sqlite3
 import os
+import time
+import hashlib
+import html
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from xml.sax import saxutils as su
 
+# #####################################################################################
+# Token bucket (rate limit of the profile crawler)
+class TokenBucket():
+    def __init__(self, rate, burst):
+        self.rate = rate # tokens per second
+        self.burst = burst # maximum number of stored tokens
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = asyncio.Lock() # the waiters are served in order
+
+    async def acquire(self): # wait for a token
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# #####################################################################################
+# GBF profile page extractor (one regex scan of the page instead of a BeautifulSoup tree)
+class GBFProfile(NamedTuple):
+    name: str # None if the profile is private
+    rarity: str # SSR, SR or R
+    rank: str # "Rank 123", None if the header is missing
+    trophy: str
+    comment: str
+    mc: str # main character image url
+    hp: int
+    atk: int
+    job: str
+    joblvl: str
+    crew: str # crew name, None if not in a crew
+    crewurl: str # crew page (without the domain)
+    nocrew: str # text displayed instead of the crew
+    summons: dict # summon slot: "Lvl 000 Name"
+    star: dict # star character (name, plus, emp, ring, comment), None if missing
+
+class ProfileParser():
+    HEADERS = [("prt-title-bg-gld", "SSR"), ("prt-title-bg-slv", "SR"), ("prt-title-bg-nml", "R"), ("prt-title-bg-cpr", "R")] # the last one found is used
+    CLASSES = ['txt-other-name', 'prt-title-name', 'prt-other-comment', 'img-pc', 'num', 'txt-other-job-info', 'txt-other-job-level', 'prt-guild-name', 'btn-guild-detail', 'txt-notjoin', 'prt-fix-name', 'prt-current-npc-name', 'prt-pushed-info', 'txt-npc-rank', 'prt-quality'] + [h[0] for h in HEADERS]
+    STAR = ['prt-current-npc-name', 'prt-pushed-info', 'txt-npc-rank', 'prt-quality'] # only read in the star character section
+
+    def __init__(self):
+        # every tag (div, span or img) with one of the classes: tag, tag name, class, text up to the next tag, "</" if the text is the whole content
+        self.tagre = re.compile('(<(div|span|img)\\b[^>]*?(?<=\\s)class="(?:[^"]*\\s)?({})(?:\\s[^"]*)?"[^>]*>)([^<]*)(</)?'.format("|".join([re.escape(c) for c in self.CLASSES])))
+        self.attrre = re.compile('([\\w-]+)="([^"]*)"')
+        self.divre = re.compile('<(/?)div\\b')
+        self.rankre = re.compile("Rank ([0-9])+")
+        self.summonre = re.compile("Lvl [0-9]+ [A-Za-z'-. ]+") # same validation as the previous regexes
+        self.summonidre = re.compile("js-fix-summon([0-9]{2})-name")
+        self.starre = re.compile("\\s*(Lvl [0-9]+ [A-Za-z'-.μ ]+)\\s*")
+        self.starringre = re.compile("<div class=\"ico-augment2-s\"><\\/div>\\s*<\\/div>\\s*<div class=\"prt-pushed-spec\">\\s*<div class=\"prt-pushed-info\">")
+
+    def attributes(self, tag):
+        return {k: html.unescape(v) for k, v in self.attrre.findall(tag)}
+
+    def subtree(self, data, pos): # end of the div starting at pos
+        depth = 0
+        for m in self.divre.finditer(data, pos):
+            depth += -1 if m.group(1) else 1
+            if depth == 0: return m.end()
+        return len(data)
+
+    def parse(self, data): # return a GBFProfile
+        found = {} # class: first (tag, text) found
+        nums = []
+        summons = {}
+        star = {}
+        beg = data.find('<div class="prt-inner-title">Star Character</div>')
+        end = data.find('<div class="prt-2tabs">', beg+1) if beg != -1 else -1
+        if end == -1: end = len(data)
+        for m in self.tagre.finditer(data):
+            tag, tname, cls, raw, closed = m.groups()
+            if not closed: raw = None # the tag has children
+            text = None if raw is None else html.unescape(raw) # same as the .string of BeautifulSoup
+            if cls in self.STAR: # raw html, like the previous regexes
+                if beg == -1 or m.start() < beg or m.start() >= end: continue
+                if cls not in star: star[cls] = raw
+            elif cls == 'num':
+                if tname == 'div': nums.append(text)
+            elif cls == 'prt-fix-name':
+                sid = self.summonidre.fullmatch(self.attributes(tag).get('id', ''))
+                if tname == 'div' and sid is not None and raw is not None and self.summonre.fullmatch(raw):
+                    summons[sid.group(1)] = raw
+            elif cls not in found and tname == ('span' if cls == 'txt-other-name' else ('img' if cls == 'img-pc' else 'div')):
+                found[cls] = (m.start(), tag, text)
+        if 'txt-other-name' not in found or found['txt-other-name'][2] is None:
+            return GBFProfile(None, None, None, None, None, None, None, None, None, None, None, None, None, summons, None)
+        header = None
+        rarity = "R"
+        for h in self.HEADERS:
+            if h[0] in found:
+                header = found[h[0]][0]
+                rarity = h[1]
+        rank = None
+        if header is not None:
+            r = self.rankre.search(data, header, self.subtree(data, header))
+            if r is not None: rank = r.group(0)
+        def string(cls):
+            return found[cls][2] if cls in found else None
+        def attribute(cls, key):
+            return self.attributes(found[cls][1]).get(key, None) if cls in found else None
+        if 'prt-current-npc-name' in star and star['prt-current-npc-name'] is not None and self.starre.fullmatch(star['prt-current-npc-name']):
+            starinfo = {'name':self.starre.fullmatch(star['prt-current-npc-name']).group(1), 'plus':star.get('prt-quality', None), 'emp':star.get('txt-npc-rank', None), 'ring':self.starringre.search(data, beg, end) is not None, 'comment':star.get('prt-pushed-info', None) or None}
+            if starinfo['plus'] is not None and re.fullmatch("\\+[0-9]+", starinfo['plus']) is None: starinfo['plus'] = None
+            if starinfo['emp'] is not None and not starinfo['emp'].isdigit(): starinfo['emp'] = None
+        else:
+            starinfo = None
+        return GBFProfile(string('txt-other-name'), rarity, rank, string('prt-title-name'), string('prt-other-comment'), attribute('img-pc', 'src'), int(nums[0]) if len(nums) > 0 else None, int(nums[1]) if len(nums) > 1 else None, string('txt-other-job-info'), string('txt-other-job-level'), string('prt-guild-name'), attribute('btn-guild-detail', 'data-location-href'), string('txt-notjoin'), summons, starinfo)
+
 class GBF_Utility(commands.Cog):
     """GBF related commands."""
     def __init__(self, bot):
         self.bot = bot
         self.color = 0x46fc46
-        self.rankre = re.compile("Rank ([0-9])+")
-        self.sumre = re.compile("<div id=\"js-fix-summon([0-9]{2})-name\" class=\"prt-fix-name\" name=\"[A-Za-z'-. ]+\">(Lvl [0-9]+ [A-Za-z'-. ]+)<\/div>")
-        self.starre = re.compile("<span class=\"prt-current-npc-name\">\s*(Lvl [0-9]+ [A-Za-z'-.μ ]+)\s*<\/span>")
-        self.starcomre = re.compile("<div class=\"prt-pushed-info\">(.+)<\/div>")
-        self.empre = re.compile("<div class=\"txt-npc-rank\">([0-9]+)<\/div>")
-        self.starringre = re.compile("<div class=\"ico-augment2-s\"><\/div>\s*<\/div>\s*<div class=\"prt-pushed-spec\">\s*<div class=\"prt-pushed-info\">")
-        self.starplusre = re.compile("<div class=\"prt-quality\">(\+[0-9]+)<\/div>")
-        self.badprofilecache = []
-        self.badcrewcache = []
-        self.crewcache = {}
+        self.profileparser = ProfileParser() # profile page extractor
+        self.profilecache = bot.cache('profiles', 5000, 3600) # profiles not found
+        self.crewcache = bot.cache('crews', 1000, 86400) # public crews (None if not found, kept for one hour)
         self.possiblesum = {'10':'fire', '20':'water', '30':'earth', '40':'wind', '50':'light', '60':'dark', '00':'misc', '01':'misc'}
         self.subsum = {'chev':'luminiera omega', 'chevalier':'luminiera omega', 'lumi':'luminiera omega', 'luminiera':'luminiera omega', 'colossus':'colossus omega', 'colo':'colossus omega', 'leviathan':'leviathan omega', 'levi':'leviathan omega', 'yggdrasil':'yggdrasil omega', 'yugu':'yggdrasil omega', 'tiamat':'tiamat omega', 'tia':'tiamat omega', 'celeste':'celeste omega', 'boat':'celeste omega', 'alex':'godsworn alexiel', 'alexiel':'godsworn alexiel', 'zeph':'zephyrus', 'longdong':'huanglong', 'dong':'huanglong', 'long':'huanglong', 'bunny':'white rabbit', 'kirin':'qilin', 'sylph gacha':'sylph, flutterspirit of purity', 'poseidon gacha':'poseidon, the tide father', 'anat gacha':'anat, for love and war', 'cerberus gacha':'cerberus, hellhound trifecta', 'marduck gacha':'marduk, battlefield reaper'}
-        self.conn = None
-        self.cursor = None
-        self.sqllock = False
+        self.sumdb = bot.database("summon.sql", self.migrateSumDB) # support summon database
+        self.sqllock = False # true during a summon update
+        self.crawlsettings = {'concurrency':8, 'rate':10, 'burst':10, 'workers':2, 'batch':100, 'checkpoint':1000, 'refresh':96} # parallel requests, requests per second, burst size, parsing threads, profiles per database write, profiles between two drive uploads, minimum hours before a profile is crawled again
+        self.crawlstats = None # progress of the current or last summon update
+        self.probesettings = {'interval':30, 'ttl':45} # seconds between two probes of gbftask, seconds before a probe result is considered too old
+        self.probe = {'result':None, 'time':None, 'task':None, 'count':0, 'failed':0} # last game probe (True if up, False if in emergency maintenance, None if the request failed), the probe in progress
 
     def startTasks(self):
         self.bot.runTask('summon', self.summontask)
+        self.bot.runTask('gbfprobe', self.probetask)
 
-    async def isGBFAvailable(self):
+    async def isGBFAvailable(self): # use the cached probe result, the game is only requested if the last probe is too old
         current_time = self.bot.getJST()
-        req = None
+        probe = None
         if self.bot.maintenance['state'] and current_time < self.bot.maintenance['time']: # before maintenance
-            req = await self.requestGBF()
+            probe = await self.getProbe()
             if self.bot.getJST() >= self.bot.maintenance['time']:
                 return False
         elif self.bot.maintenance['state'] and current_time >= self.bot.maintenance['time'] and (self.bot.maintenance['duration'] == 0 or current_time < self.bot.maintenance['time'] + timedelta(seconds=self.bot.maintenance['duration']*3600+30)): # during maintenance
             return False
         elif self.bot.maintenance['state'] and current_time > self.bot.maintenance['time'] + timedelta(seconds=self.bot.maintenance['duration']*3600+30): # after maintenance
-            req = await self.requestGBF()
+            probe = await self.getProbe()
             self.bot.maintenance = {"state" : False, "time" : None, "duration" : 0}
-            self.bot.savePending = True
+            self.bot.markDirty('maintenance')
         else:
-            req = await self.requestGBF()
+            probe = await self.getProbe()
 
-        if req is not None and req[0].status == 200 and req[1].find("The app is now undergoing") != -1:
+        if probe is None:
+            raise Exception("Failed to request: http://game.granbluefantasy.jp")
+        elif probe == False:
             await self.bot.send('debug', embed=self.bot.buildEmbed(title="Emergency maintenance detected", timestamp=datetime.utcnow(), color=self.color))
             self.bot.maintenance['time'] = current_time
             self.bot.maintenance['duration'] = 0
             self.bot.maintenance['state'] = True
-            self.bot.savePending = True
+            self.bot.markDirty('maintenance')
             return False
             
         return True
 
+    async def getProbe(self): # return the last probe result if it's recent enough, probe the game otherwise
+        if self.probe['task'] is None and self.probe['time'] is not None and time.monotonic() - self.probe['time'] < self.probesettings['ttl']:
+            return self.probe['result']
+        return await self.probeGBF()
+
+    async def probeGBF(self): # request the game once, concurrent callers wait for the same request
+        if self.probe['task'] is None:
+            self.probe['task'] = asyncio.ensure_future(self.runProbe())
+        return await asyncio.shield(self.probe['task']) # a cancelled caller doesn't cancel the probe
+
+    async def runProbe(self):
+        try:
+            try:
+                async with self.bot.web.get("http://game.granbluefantasy.jp") as r:
+                    result = not (r.status == 200 and (await r.read()).find(b"The app is now undergoing") != -1)
+            except Exception:
+                result = None
+                self.probe['failed'] += 1
+            self.probe['result'] = result
+            self.probe['time'] = time.monotonic()
+            self.probe['count'] += 1
+            return result
+        finally:
+            self.probe['task'] = None
+
+    async def probetask(self): # probe the game at a fixed rate, the commands and the other tasks read the result
+        while True:
+            try:
+                if await self.probeGBF() is not None:
+                    await self.isGBFAvailable() # update the maintenance state
+                await asyncio.sleep(self.probesettings['interval'])
+            except asyncio.CancelledError:
+                await self.bot.sendError('probetask', 'cancelled')
+                return
+            except Exception as e:
+                await self.bot.sendError('probetask', str(e))
+                await asyncio.sleep(self.probesettings['interval'])
+
     async def summontask(self): # summon update task
         while True:
             try:
                 uptime = self.bot.uptime(False)
                 if self.bot.summonlast is None: delta = None
                 else: delta = self.bot.getJST() - self.bot.summonlast
-                if uptime.seconds > 3600 and uptime.seconds < 30000 and (delta is None or delta.days >= 4):
+                if uptime.seconds > 3600 and uptime.seconds < 30000 and (delta is None or delta.days >= 1): # only the profiles older than crawlsettings['refresh'] are updated
                     await self.bot.send('debug', embed=self.bot.buildEmbed(color=self.color, title="summontask()", description="auto update started", timestamp=datetime.utcnow()))
-                    await self.updateSummon()
+                    with self.bot.metrics.timer('task', 'summontask'):
+                        await self.updateSummon()
                     await self.bot.send('debug', embed=self.bot.buildEmbed(color=self.color, title="summontask()", description="auto update ended", timestamp=datetime.utcnow()))
                     await asyncio.sleep(80000)
                     return
@@ -81,26 +237,90 @@ class GBF_Utility(commands.Cog):
             except Exception as e:
                 await self.bot.sendError('summontask', str(e))
 
-    async def loadSumDB(self):
-        try:
-            if self.sqllock:
-                self.conn = None
-            elif self.bot.drive.dlFile("summon.sql", self.bot.tokens['files']):
-                self.conn = sqlite3.connect("summon.sql")
-                self.cursor = self.conn.cursor()
-            else:
-                self.conn = None
-        except Exception as e:
-            self.conn = None
-            await self.bot.sendError('loadSumDB', str(e))
-        return (self.conn is not None)
+    def buildSumDB(self, conn): # create the summon tables: one row per player, one per summon name, player_summons linking them with the level, and the crawl date and content hash of each profile
+        c = conn.cursor()
+        c.execute('CREATE TABLE IF NOT EXISTS players (id INTEGER PRIMARY KEY, name TEXT)')
+        c.execute('CREATE TABLE IF NOT EXISTS summons (id INTEGER PRIMARY KEY, name TEXT UNIQUE)')
+        c.execute('CREATE TABLE IF NOT EXISTS player_summons (player_id INTEGER, summon_id INTEGER, level INTEGER)')
+        c.execute('CREATE INDEX IF NOT EXISTS player_summons_level ON player_summons(summon_id, level)')
+        c.execute('CREATE INDEX IF NOT EXISTS player_summons_player ON player_summons(player_id)')
+        c.execute('CREATE TABLE IF NOT EXISTS profiles (id INTEGER PRIMARY KEY, crawled TEXT, hash TEXT)')
+
+    def readSumProfiles(self, conn): # return the crawl date of each profile (run in a thread)
+        c = conn.cursor()
+        c.execute('SELECT id, crawled FROM profiles')
+        return {r[0]: datetime.fromisoformat(r[1]) for r in c.fetchall()}
+
+    def removeSumProfiles(self, conn, ids): # remove the profiles unlinked since the last update (run in a thread)
+        c = conn.cursor()
+        for t, k in [('players', 'id'), ('player_summons', 'player_id'), ('profiles', 'id')]:
+            c.executemany('DELETE FROM {} WHERE {} = ?'.format(t, k), [(id,) for id in ids])
+        conn.commit()
+
+    def writeSumBatch(self, conn, batch, date, spread=0): # write a batch of crawled profiles in one transaction, only the profiles whose content changed are rewritten (run in a thread). batch is a list of (id, name, [(summon name, level)], hash), name is None for private profiles. each crawl date is moved forward by up to spread seconds. return the number of changed profiles
+        c = conn.cursor()
+        hashes = {}
+        for r in batch:
+            c.execute('SELECT hash FROM profiles WHERE id = ?', (r[0],))
+            h = c.fetchone()
+            if h is not None: hashes[r[0]] = h[0]
+        changed = [r for r in batch if hashes.get(r[0], None) != r[3]]
+        c.executemany('DELETE FROM player_summons WHERE player_id = ?', [(r[0],) for r in changed])
+        c.executemany('DELETE FROM players WHERE id = ?', [(r[0],) for r in changed if r[1] is None])
+        c.executemany('INSERT OR REPLACE INTO players VALUES (?, ?)', [(r[0], r[1]) for r in changed if r[1] is not None])
+        names = set([sn for r in changed for sn, level in r[2]])
+        c.executemany('INSERT OR IGNORE INTO summons (name) VALUES (?)', [(n,) for n in names])
+        ids = {}
+        for n in names:
+            c.execute('SELECT id FROM summons WHERE name = ?', (n,))
+            ids[n] = c.fetchone()[0]
+        c.executemany('INSERT INTO player_summons VALUES (?, ?, ?)', [(r[0], ids[sn], level) for r in changed for sn, level in r[2]])
+        c.executemany('INSERT OR REPLACE INTO profiles VALUES (?, ?, ?)', [(r[0], (date + timedelta(seconds=random.random()*spread)).isoformat(), r[3]) for r in batch])
+        conn.commit()
+        return len(changed)
+
+    def parseSumProfile(self, data): # return the player name (None if private), the list of (summon name, level) and the content hash of a profile page (run in the crawler pool)
+        profile = self.profileparser.parse(data)
+        name = profile.name
+        summons = []
+        if name is not None:
+            for s in profile.summons.values():
+                sp = s.lower().split() # Lvl 000 Name1 Name2 ... NameN
+                summons.append((" ".join(sp[2:]), int(sp[1])))
+        return name, summons, hashlib.md5(repr((name, summons)).encode('utf-8')).hexdigest()
+
+    def migrateSumDB(self, conn): # summon.sql opener: convert the previous format (one table per summon name) to the current one (run in a thread)
+        c = conn.cursor()
+        c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = [r[0] for r in c.fetchall()]
+        if 'summons' in tables: # current format
+            self.buildSumDB(conn)
+            conn.commit()
+            return
+        if 'players' in tables:
+            c.execute('ALTER TABLE players RENAME TO old_players')
+        self.buildSumDB(conn)
+        if 'players' in tables:
+            c.execute('INSERT OR REPLACE INTO players SELECT id, name FROM old_players')
+            c.execute('DROP TABLE old_players')
+        for t in tables:
+            if t == 'players': continue
+            c.execute('INSERT INTO summons (name) VALUES (?)', (t,))
+            c.execute('INSERT INTO player_summons SELECT id, ?, level FROM `{}`'.format(t.replace('`', '``')), (c.lastrowid,))
+            c.execute('DROP TABLE `{}`'.format(t.replace('`', '``')))
+        conn.commit()
+
+    async def loadSumDB(self): # download the database (concurrent calls share the same download)
+        if self.sqllock: return False # the update writes in the current file
+        await self.sumdb.load()
+        return self.sumdb.state == True
 
     async def checkSumDB(self, ctx):
-        if self.conn:
+        if self.sumdb.state == True: # the current database stays usable during a download or an update
             return True
         else:
             await self.bot.react(ctx, 'time')
-            r = await self.loadSumDB()
+            r = await self.sumdb.ready()
             await self.bot.unreact(ctx, 'time')
             return r
 
@@ -119,44 +339,44 @@ class GBF_Utility(commands.Cog):
             return {'error':"Invalid name `{}`\nOnly some crews are registered, please input an id instead".format(id)}
         if id < 0 or id >= 10000000:
             return {'error':'Out of range ID'}
-        if id in self.badcrewcache: # if already searched (to limit bad requests)
+        cached = self.crewcache.get(id, False) # public crews are stored for a day (to limit the request amount)
+        if cached is None: # if already searched (to limit bad requests)
             return {'error':'Crew not found'}
+        elif cached:
+            return cached
 
         crew = {'scores':[], 'id':id}
-        if id in self.crewcache: # public crews are stored until next reboot (to limit the request amount)
-            return self.crewcache[id]
-        else:
-            for i in range(0, 4): # for each page (page 0 being the crew page, 1 to 3 being the crew page
-                get = cog.requestCrew(id, i)
-                if get is None:
-                    if i == 0: # if error on page 0, the crew doesn't exist
-                        self.badcrewcache.append(id)
-                        return {'error':'Crew not found'}
-                    elif i == 1: # if error on page 1, the crew is private
-                        crew['private'] = True
-                    break
+        for i in range(0, 4): # for each page (page 0 being the crew page, 1 to 3 being the crew page
+            get = cog.requestCrew(id, i)
+            if get is None:
+                if i == 0: # if error on page 0, the crew doesn't exist
+                    self.crewcache.set(id, None, 3600)
+                    return {'error':'Crew not found'}
+                elif i == 1: # if error on page 1, the crew is private
+                    crew['private'] = True
+                break
+            else:
+                # store the data
+                if i == 0:
+                    crew['timestamp'] = datetime.utcnow()
+                    crew['footer'] = ""
+                    crew['private'] = False # in preparation
+                    crew['name'] = su.unescape(get['guild_name'])
+                    crew['rank'] = get['guild_rank']
+                    crew['ship'] = "http://game-a.granbluefantasy.jp/assets_en/img/sp/guild/thumb/top/{}.png".format(get['ship_img'])
+                    crew['ship_element'] = {"10001":"wind", "20001":"fire", "30001":"water", "40001":"earth"}.get(get['ship_img'].split('_')[0], 'gw')
+                    crew['leader'] = su.unescape(get['leader_name'])
+                    crew['leader_id'] = get['leader_user_id']
+                    crew['donator'] = su.unescape(get['most_donated_name'])
+                    crew['donator_id'] = get['most_donated_id']
+                    crew['donator_amount'] = get['most_donated_lupi']
+                    crew['message'] = su.unescape(get['introduction'])
+                    crew['total_rank'] = 0
                 else:
-                    # store the data
-                    if i == 0:
-                        crew['timestamp'] = datetime.utcnow()
-                        crew['footer'] = ""
-                        crew['private'] = False # in preparation
-                        crew['name'] = su.unescape(get['guild_name'])
-                        crew['rank'] = get['guild_rank']
-                        crew['ship'] = "http://game-a.granbluefantasy.jp/assets_en/img/sp/guild/thumb/top/{}.png".format(get['ship_img'])
-                        crew['ship_element'] = {"10001":"wind", "20001":"fire", "30001":"water", "40001":"earth"}.get(get['ship_img'].split('_')[0], 'gw')
-                        crew['leader'] = su.unescape(get['leader_name'])
-                        crew['leader_id'] = get['leader_user_id']
-                        crew['donator'] = su.unescape(get['most_donated_name'])
-                        crew['donator_id'] = get['most_donated_id']
-                        crew['donator_amount'] = get['most_donated_lupi']
-                        crew['message'] = su.unescape(get['introduction'])
-                        crew['total_rank'] = 0
-                    else:
-                        if 'player' not in crew: crew['player'] = []
-                        for p in get['list']:
-                            crew['total_rank'] += int(p['level'])
-                            crew['player'].append({'id':p['id'], 'name':su.unescape(p['name']), 'level':p['level'], 'is_leader':p['is_leader'], 'member_position':p['member_position'], 'honor':None}) # honor is a placeholder
+                    if 'player' not in crew: crew['player'] = []
+                    for p in get['list']:
+                        crew['total_rank'] += int(p['level'])
+                        crew['player'].append({'id':p['id'], 'name':su.unescape(p['name']), 'level':p['level'], 'is_leader':p['is_leader'], 'member_position':p['member_position'], 'honor':None}) # honor is a placeholder
 
         # get the last gw score
         cog = self.bot.get_cog('GW')
@@ -180,7 +400,7 @@ class GBF_Utility(commands.Cog):
         if not crew['private']:
             crew['average'] = round(crew['total_rank'] / (len(crew['player']) * 1.0))
 
-        if not crew['private']: self.crewcache[id] = crew # only cache public crews
+        if not crew['private']: self.crewcache.set(id, crew) # only cache public crews
         return crew
 
     def honor(self, h): # convert honor number to a shorter string version
@@ -227,28 +447,22 @@ class GBF_Utility(commands.Cog):
                 if gwstate:
                     total = 0
                     unranked = 0
-                    for i in range(0, len(players)):
-                        # retrieve player honors
-                        honor = await cog.searchGWDBPlayer(ctx, players[i]['id'], 2)
-                        if honor[1] is None or len(honor[1]) == 0 or len(honor[1]['result']) == 0:
-                            players[i]['honor'] = None
-                            unranked += 1
+                    # retrieve player honors
+                    honor = await cog.searchGWDBPlayers(ctx, [p['id'] for p in players])
+                    if honor[1] is not None and 'result' in honor[1]:
+                        gwid = honor[1].get('gw', None)
+                        rows = honor[1]['result']
+                    else:
+                        rows = {}
+                    for p in players:
+                        res = rows.get(int(p['id']), None)
+                        if res is not None and res[3] is not None:
+                            p['honor'] = res[3]
+                            total += res[3]
                         else:
-                            res = honor[1].get('result', [None, None, None, None])
-                            if gwid is None: gwid = honor[1].get('gw', None)
-                            if res is not None and len(res[0]) != 0 and res[0][3] is not None:
-                                players[i]['honor'] = res[0][3]
-                                total += res[0][3]
-                            else:
-                                players[i]['honor'] = None
-                                unranked += 1
-                        if i > 0 and players[i]['honor'] is not None:
-                            # sorting
-                            for j in range(0, i):
-                                if players[j]['honor'] is None or players[i]['honor'] > players[j]['honor']:
-                                    tmp = players[j]
-                                    players[j] = players[i]
-                                    players[i] = tmp
+                            p['honor'] = None
+                            unranked += 1
+                    players.sort(key=lambda p: (p['honor'] is None, -(p['honor'] or 0))) # sorting, unranked last
                     if gwid and len(players) - unranked > 0:
                         description += "\n{} GW**{}** ▫️ Player Total **{}** ▫️ Average **{}**".format(self.bot.getEmote('question'), gwid, self.honor(total), self.honor(total // (len(players) - unranked)))
                         if unranked > 0:
@@ -275,47 +489,84 @@ class GBF_Utility(commands.Cog):
         except Exception as e:
             await self.bot.sendError("postCrewData", str(e))
 
-    async def updateSummon(self):
-        self.bot.drive.delFiles(["summon.sql"], self.bot.tokens['files'])
+    async def updateSummon(self): # crawl the profiles not updated for crawlsettings['refresh'] hours and write the changes in summon.sql, which stays searchable
         cog = self.bot.get_cog('Baguette')
-        if cog is None: return
-        try: os.remove('summon.sql')
-        except: pass
+        if cog is None or self.sqllock: return
         self.sqllock = True
-        conn = sqlite3.connect('summon.sql')
-        c = conn.cursor()
-        c.execute('CREATE TABLE players (id int, name text)')
-        summonnames = []
-        for sid in list(self.bot.gbfids.keys()):
-            id = self.bot.gbfids[sid]
-            data = await cog.getProfileData(id)
-            if data is None:
-                continue
-            soup = BeautifulSoup(data, 'html.parser')
-            try: name = soup.find_all("span", class_="txt-other-name")[0].string
-            except: name = None
-            if name is not None: # private
-                try:
-                    c.execute("INSERT INTO players VALUES ({},'{}')".format(id, name.replace("'", "''").replace("%", "\%")))
-                    summons_res = self.sumre.findall(data)
-                    for s in summons_res:
-                        sp = s[1].lower().split() # Lvl 000 Name1 Name2 ... NameN
-                        sn = " ".join(sp[2:])
-                        if sn not in summonnames:
-                            summonnames.append(sn)
-                            c.execute('CREATE TABLE `{}` (id int, level int)'.format(sn))
-                        c.execute("INSERT INTO `{}` VALUES ({},{})".format(sn, id, sp[1]))
-                except:
-                    pass
-            await asyncio.sleep(0.1)
-        conn.commit()
-        conn.close()
-        self.sqllock = False
-        if self.bot.drive.saveDiskFile("summon.sql", "application/sql", "summon.sql", self.bot.tokens['files']):
-            self.conn = sqlite3.connect("summon.sql")
-            self.cursor = self.conn.cursor()
-        self.bot.summonlast = self.bot.getJST()
-        self.bot.savePending = True
+        settings = self.crawlsettings
+        pool = ThreadPoolExecutor(max_workers=settings['workers'], thread_name_prefix='summon') # parsing, out of the event loop
+        conn = None
+        writer = None
+        crawlers = []
+        try:
+            if not await self.sumdb.ready():
+                if self.sumdb.state is None: return # download error
+                await self.sumdb.open() # not on the drive, start a new one
+            conn = await self.bot.callWorker(sqlite3.connect, 'summon.sql', check_same_thread=False)
+            now = self.bot.getJST()
+            crawled = await self.bot.callWorker(self.readSumProfiles, conn)
+            ids = set(self.bot.gbfids.values())
+            removed = [id for id in crawled if id not in ids]
+            if len(removed) > 0: await self.bot.callWorker(self.removeSumProfiles, conn, removed)
+            queue = asyncio.Queue() # profiles to crawl
+            for id in ids:
+                if id not in crawled or now - crawled[id] >= timedelta(seconds=3600*settings['refresh']): queue.put_nowait(id)
+            results = asyncio.Queue(maxsize=settings['batch']*2) # crawled profiles, waiting to be written
+            self.crawlstats = {'start':time.time(), 'end':None, 'total':queue.qsize(), 'skipped':len(ids)-queue.qsize(), 'removed':len(removed), 'done':0, 'changed':0, 'private':0, 'failed':0}
+            bucket = TokenBucket(settings['rate'], settings['burst'])
+
+            async def crawl(): # producer
+                loop = asyncio.get_event_loop()
+                while not queue.empty():
+                    id = queue.get_nowait()
+                    await bucket.acquire()
+                    try:
+                        data = await cog.getProfileData(id)
+                        if data is None: raise Exception("no data")
+                        name, summons, h = await loop.run_in_executor(pool, self.parseSumProfile, data)
+                    except Exception:
+                        self.crawlstats['failed'] += 1 # the previous data is kept, retried on the next update
+                        continue
+                    if name is None: self.crawlstats['private'] += 1
+                    await results.put((id, name, summons, h))
+
+            async def write(): # consumer
+                batch = []
+                checkpoint = 0
+                while True:
+                    r = await results.get()
+                    if r is not None: batch.append(r)
+                    if len(batch) >= settings['batch'] or (r is None and len(batch) > 0):
+                        self.crawlstats['changed'] += await self.bot.callWorker(self.writeSumBatch, conn, batch, self.bot.getJST(), 3600*settings['refresh']) # the next update of these profiles is spread over the refresh period following the first one, never earlier
+                        self.crawlstats['done'] += len(batch)
+                        batch = []
+                        if r is not None and self.crawlstats['done'] - checkpoint >= settings['checkpoint']: # an interrupted update restarts from here
+                            checkpoint = self.crawlstats['done']
+                            await self.bot.callThread(self.bot.drive.overwriteDiskFile, "summon.sql", "application/sql", "summon.sql", self.bot.tokens['files'])
+                    if r is None: return
+
+            async def flush(): # end the writer once every profile is crawled
+                await asyncio.gather(*crawlers)
+                await results.put(None)
+
+            writer = asyncio.ensure_future(write())
+            crawlers = [asyncio.ensure_future(crawl()) for i in range(settings['concurrency'])]
+            await asyncio.gather(flush(), writer) # raise if the writer fails, the crawlers would be stuck on the full results queue
+            self.crawlstats['end'] = time.time()
+            await self.bot.callThread(self.bot.drive.overwriteDiskFile, "summon.sql", "application/sql", "summon.sql", self.bot.tokens['files'])
+            self.bot.summonlast = self.bot.getJST()
+            self.bot.markDirty('summonlast')
+        except Exception as e:
+            await self.bot.sendError('updateSummon', str(e))
+        finally:
+            if writer is not None: writer.cancel()
+            for t in crawlers: t.cancel()
+            if self.crawlstats is not None and self.crawlstats['end'] is None: self.crawlstats['end'] = time.time()
+            if conn is not None:
+                try: conn.close()
+                except: pass
+            pool.shutdown(wait=False)
+            self.sqllock = False
 
     def isYou(): # for decorators
         async def predicate(ctx):
@@ -337,14 +588,6 @@ class GBF_Utility(commands.Cog):
             return ctx.bot.isAuthorized(ctx)
         return commands.check(predicate)
 
-    async def requestGBF(self):
-        async with aiohttp.ClientSession() as session:
-            async with session.get("http://game.granbluefantasy.jp") as r:
-                s = await r.read()
-                s = s.decode('utf-8')
-                return [r, s]
-        raise Exception("Failed to request: http://game.granbluefantasy.jp")
-
     def maintenanceUpdate(self): # check the gbf maintenance status, empty string returned = no maintenance
         current_time = self.bot.getJST()
         msg = ""
@@ -361,7 +604,7 @@ class GBF_Utility(commands.Cog):
                     msg = "{} Emergency maintenance on going".format(self.bot.getEmote('cog'))
                 elif (d.seconds // 3600) >= self.bot.maintenance['duration']:
                     self.bot.maintenance = {"state" : False, "time" : None, "duration" : 0}
-                    self.bot.savePending = True
+                    self.bot.markDirty('maintenance')
                 else:
                     e = self.bot.maintenance['time'] + timedelta(seconds=3600*self.bot.maintenance['duration'])
                     d = e - current_time
@@ -422,10 +665,9 @@ class GBF_Utility(commands.Cog):
                     arr.append(self.fixCase(s))
                 sch = "_".join(arr)
                 url = "https://gbf.wiki/" + sch
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as r:
-                        if r.status != 200:
-                            raise Exception("HTTP Error 404: Not Found")
+                async with self.bot.web.get(url) as r:
+                    if r.status != 200:
+                        raise Exception("HTTP Error 404: Not Found")
                 await ctx.send(embed=self.bot.buildEmbed(title="{} search result".format(" ".join(terms)), description="Click here :point_right: {}".format(url), color=self.color))
             except Exception as e:
                 if str(e) != "HTTP Error 404: Not Found":
@@ -454,12 +696,14 @@ class GBF_Utility(commands.Cog):
             return
 
         # get avatar url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(pic.format(a[1]), allow_redirects=False) as r:
+        try:
+            async with self.bot.web.get(pic.format(a[1]), allow_redirects=False) as r:
                 if r.status == 302:
                     pic = r.headers['location']
                 else:
                     pic = ""
+        except:
+            pic = ""
 
         url = url.format(a[1])
         await ctx.send(embed=self.bot.buildEmbed(title=url, url=url, description=a[0], thumbnail=pic, color=self.color))
@@ -597,7 +841,7 @@ class GBF_Utility(commands.Cog):
             if id < 0 or id >= 100000000:
                 await ctx.send(embed=self.bot.buildEmbed(title="Profile Error", description="Invalid ID", color=self.color))
                 return
-            if id in self.badprofilecache:
+            if self.profilecache.get(id, False): # not found recently
                 await ctx.send(embed=self.bot.buildEmbed(title="Profile Error", description="Profile not found", color=self.color))
                 return
             data = await cog.getScoutData(id)
@@ -627,7 +871,7 @@ class GBF_Utility(commands.Cog):
         for discord_id in self.bot.gbfids:
             if self.bot.gbfids[discord_id] == gbf_id:
                 del self.bot.gbfids[discord_id]
-                self.bot.savePending = True
+                self.bot.markDirty('gbfids')
                 await self.bot.send('debug', 'User `{}` has been removed'.format(discord_id))
                 await ctx.message.add_reaction('✅') # white check mark
                 return
@@ -648,10 +892,13 @@ class GBF_Utility(commands.Cog):
     @isOwner()
     async def profileStat(self, ctx):
         """Linked GBF id statistics (Owner only)"""
-        if self.conn is not None: msg = "Database loaded"
+        if self.sumdb.state == True: msg = "Database loaded (version {})".format(self.sumdb.version)
         else:
-            if self.sqllock: msg = "Database is locked"
-            else: msg = "Database isn't loaded"
+            msg = "Database isn't loaded"
+        if self.crawlstats is not None:
+            if self.crawlstats['end'] is None: msg += "\nUpdate in progress: **{}/{}** profiles".format(self.crawlstats['done'], self.crawlstats['total'])
+            else: msg += "\nLast update: **{}** profiles in **{:.0f}s**".format(self.crawlstats['done'], self.crawlstats['end'] - self.crawlstats['start'])
+            msg += " ({} changed, {} private, {} failed, {} up to date, {} removed)".format(self.crawlstats['changed'], self.crawlstats['private'], self.crawlstats['failed'], self.crawlstats['skipped'], self.crawlstats['removed'])
         await ctx.send(embed=self.bot.buildEmbed(title="{} Summon statistics".format(self.bot.getEmote('summon')), description="**{}** Registered Users\n{}".format(len(self.bot.gbfids), msg), color=self.color))
 
     @commands.command(no_pm=True, cooldown_after_parsing=True, aliases=['unsetid'])
@@ -662,7 +909,7 @@ class GBF_Utility(commands.Cog):
             await ctx.send(embed=self.bot.buildEmbed(title="Unset Profile Error", description="You didn't set your GBF profile ID", color=self.color))
             return
         del self.bot.gbfids[str(ctx.author.id)]
-        self.bot.savePending = True
+        self.bot.markDirty('gbfids')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True, cooldown_after_parsing=True, aliases=['setid'])
@@ -685,7 +932,7 @@ class GBF_Utility(commands.Cog):
                     return
             # register
             self.bot.gbfids[str(ctx.author.id)] = id
-            self.bot.savePending = True
+            self.bot.markDirty('gbfids')
             await ctx.message.add_reaction('✅') # white check mark
         except Exception as e:
             await self.bot.sendError("setprofile", str(e))
@@ -711,12 +958,15 @@ class GBF_Utility(commands.Cog):
                 name = " ".join(search)
         name = self.subsum.get(name.lower(), name.lower())
         try:
-            self.cursor.execute("SELECT * FROM `{}` WHERE level >= {}".format(name.lower(), level))
-            data = self.cursor.fetchall()
-        except:
+            c = self.sumdb.conn.cursor()
+            c.execute("SELECT players.id, MAX(player_summons.level), players.name FROM summons JOIN player_summons ON player_summons.summon_id = summons.id JOIN players ON players.id = player_summons.player_id WHERE summons.name = ? AND player_summons.level >= ? GROUP BY players.id ORDER BY RANDOM() LIMIT 30", (name, level))
+            data = c.fetchall()
+        except Exception as e:
+            await self.bot.sendError('summon', str(e))
+            data = []
+        if len(data) == 0 and level <= 0:
             await ctx.send(embed=self.bot.buildEmbed(title="Summon Error", description="`{}` ▫️ No one has this summon".format(name), footer="Be sure to type the full name", color=self.color))
             return
-        random.shuffle(data)
         msg = ""
         count = 0
         fields = []
@@ -725,31 +975,24 @@ class GBF_Utility(commands.Cog):
         try:
             terms = name.split(" ")
             for i in range(0, len(terms)): terms[i] = self.fixCase(terms[i])
-            async with aiohttp.ClientSession() as session:
-                async with session.get("http://gbf.wiki/{}".format("_".join(terms))) as r:
-                    if r.status != 200:
-                        raise Exception("HTTP Error 404: Not Found")
-                    else:
-                        soup = BeautifulSoup(await r.read(), 'html.parser')
-                        thumbnail = "http://game-a1.granbluefantasy.jp/assets_en/img_low/sp/assets/summon/m/{}.jpg".format(soup.find_all("div", class_="mw-parser-output")[0].findChildren("div" , recursive=False)[0].findChildren("div" , recursive=False)[0].findChildren("div" , recursive=False)[1].findChildren("div" , recursive=False)[0].findChildren("div" , recursive=False)[1].findChildren("table" , recursive=False)[0].findChildren("tbody" , recursive=False)[0].findChildren("tr" , recursive=False)[1].findChildren("td" , recursive=False)[0].text.replace(" ", ""))
+            async with self.bot.web.get("http://gbf.wiki/{}".format("_".join(terms))) as r:
+                if r.status != 200:
+                    raise Exception("HTTP Error 404: Not Found")
+                else:
+                    soup = BeautifulSoup(await r.read(), 'html.parser')
+                    thumbnail = "http://game-a1.granbluefantasy.jp/assets_en/img_low/sp/assets/summon/m/{}.jpg".format(soup.find_all("div", class_="mw-parser-output")[0].findChildren("div" , recursive=False)[0].findChildren("div" , recursive=False)[0].findChildren("div" , recursive=False)[1].findChildren("div" , recursive=False)[0].findChildren("div" , recursive=False)[1].findChildren("table" , recursive=False)[0].findChildren("tbody" , recursive=False)[0].findChildren("tr" , recursive=False)[1].findChildren("td" , recursive=False)[0].text.replace(" ", ""))
         except:
             thumbnail = ""
 
-        history = []
-        for u in data:
-            if u[0] not in history:
-                history.append(u[0])
-                self.cursor.execute("SELECT * FROM players WHERE id == {}".format(u[0]))
-                pname = self.cursor.fetchall()
-                if len(pname) == 0: continue
-                if count < 3:
-                    fields.append({'name':'Page {} '.format(self.bot.getEmote(str(len(fields)+1))), 'value':'', 'inline':True})
-                fields[count%3]['value'] += "**{}**▫️[{}](http://game.granbluefantasy.jp/#profile/{})\n".format(u[1], self.escape(pname[0][1]), u[0])
-                count += 1
-                if count >= 30:
-                    if level > 0: msg = "*Only {} random results shown*.".format(count)
-                    else: msg = "*Only {} random results shown, specify a minimum level to affine the result*.".format(count)
-                    break
+        for u in data: # id, level, name
+            if count < 3:
+                fields.append({'name':'Page {} '.format(self.bot.getEmote(str(len(fields)+1))), 'value':'', 'inline':True})
+            fields[count%3]['value'] += "**{}**▫️[{}](http://game.granbluefantasy.jp/#profile/{})\n".format(u[1], self.escape(u[2]), u[0])
+            count += 1
+            if count >= 30:
+                if level > 0: msg = "*Only {} random results shown*.".format(count)
+                else: msg = "*Only {} random results shown, specify a minimum level to affine the result*.".format(count)
+                break
 
         if count == 0:
             await ctx.send(embed=self.bot.buildEmbed(title="Summon Error", description="`{}` ▫️ No one has this summon above level {}".format(name, level), footer="Be sure to type the full name", thumbnail=thumbnail, color=self.color))
@@ -797,7 +1040,7 @@ class GBF_Utility(commands.Cog):
             if id < 0 or id >= 100000000:
                 await ctx.send(embed=self.bot.buildEmbed(title="Profile Error", description="Invalid ID", color=self.color))
                 return
-            if id in self.badprofilecache:
+            if self.profilecache.get(id, False): # not found recently
                 await ctx.send(embed=self.bot.buildEmbed(title="Profile Error", description="Profile not found", color=self.color))
                 return
             data = await cog.getProfileData(id)
@@ -805,46 +1048,25 @@ class GBF_Utility(commands.Cog):
                 await ctx.send(embed=self.bot.buildEmbed(title="Profile Error", description="Game is in maintenance", color=self.color))
                 return
             elif data is None:
-                self.badprofilecache.append(id)
+                self.profilecache.set(id, True)
                 await ctx.send(embed=self.bot.buildEmbed(title="Profile Error", description="Profile not found", color=self.color))
                 return
-            soup = BeautifulSoup(data, 'html.parser')
-            try: name = soup.find_all("span", class_="txt-other-name")[0].string
-            except: name = None
+            profile = self.profileparser.parse(data)
+            name = profile.name
             if name is not None:
-                header = None
-                rarity = "R"
-                possible_headers = [("prt-title-bg-gld", "SSR"), ("prt-title-bg-slv", "SR"), ("prt-title-bg-nml", "R"), ("prt-title-bg-cpr", "R")]
-                for h in possible_headers:
-                    try:
-                        header = soup.find_all("div", class_=h[0])[0]
-                        rarity = h[1]
-                    except:
-                        pass
-                if header is not None: rank = "**{}**".format(self.rankre.search(str(header)).group(0))
+                rarity = profile.rarity
+                if profile.rank is not None: rank = "**{}**".format(profile.rank)
                 else:
                     await self.bot.send('debug', 'profile: debug this profile: {}'.format(id))
                     rank = ""
-                trophy = soup.find_all("div", class_="prt-title-name")[0].string
-                comment = su.unescape(soup.find_all("div", class_="prt-other-comment")[0].string).replace('\t', '').replace('\n', '')
+                trophy = profile.trophy
+                comment = su.unescape(profile.comment).replace('\t', '').replace('\n', '')
                 if comment == "": pass
                 elif rank == "": comment = "💬 ``{}``".format(comment)
                 else: comment = " ▫️ 💬 ``{}``".format(comment)
-                mc_url = soup.find_all("img", class_="img-pc")[0]['src'].replace("/po/", "/talk/").replace("/img_low/", "/img/")
-                stats = soup.find_all("div", class_="num")
-                hp = int(stats[0].string)
-                atk = int(stats[1].string)
-                job = soup.find_all("div", class_="txt-other-job-info")[0].string
-                job_lvl = soup.find_all("div", class_="txt-other-job-level")[0].string.replace("  ", " ")
-
-                try:
-                    try:
-                        crew = soup.find_all("div", class_="prt-guild-name")[0].string
-                        crewid = soup.find_all("div", class_="btn-guild-detail")[0]['data-location-href']
-                        crew = "[{}](http://game.granbluefantasy.jp/#{})".format(crew, crewid)
-                    except: crew = soup.find_all("div", class_="txt-notjoin")[0].string
-                except:
-                    crew = None
+                mc_url = profile.mc.replace("/po/", "/talk/").replace("/img_low/", "/img/")
+                if profile.crew is not None and profile.crewurl is not None: crew = "[{}](http://game.granbluefantasy.jp/#{})".format(profile.crew, profile.crewurl)
+                else: crew = profile.nocrew
 
                 # get the last gw score
                 cog = self.bot.get_cog('GW')
@@ -865,10 +1087,7 @@ class GBF_Utility(commands.Cog):
                 fields = []
 
                 try:
-                    summons_res = self.sumre.findall(data)
-                    summons = {}
-                    for s in summons_res:
-                        summons[s[0]] = s[1]
+                    summons = profile.summons
                     count = 0
                     half = len(summons) // 2
                     if half < 4: half = 4
@@ -885,25 +1104,15 @@ class GBF_Utility(commands.Cog):
                 except:
                     pass
 
-                try:
-                    beg = data.find('<div class="prt-inner-title">Star Character</div>')
-                    end = data.find('<div class="prt-2tabs">', beg+1)
-                    star_section = data[beg:end]
-                    try:
-                        ring = self.starringre.findall(star_section)[0]
-                        msg = "**\💍** "
-                    except:
-                        msg = ""
-                    msg += "{}".format(self.starre.findall(star_section)[0]) # name
-                    try: msg += " **{}**".format(self.starplusre.findall(star_section)[0]) # plus
-                    except: pass
-                    try: msg += " ▫️ **{}** EMP".format(self.empre.findall(star_section)[0]) # emp
-                    except: pass
-                    starcom = self.starcomre.findall(star_section)
-                    if starcom is not None and starcom[0] != "(Blank)": msg += "\n\u202d💬 ``{}``".format(su.unescape(starcom[0]))
+                star = profile.star
+                if star is not None and star['comment'] is not None:
+                    if star['ring']: msg = "**\💍** "
+                    else: msg = ""
+                    msg += "{}".format(star['name']) # name
+                    if star['plus'] is not None: msg += " **{}**".format(star['plus']) # plus
+                    if star['emp'] is not None: msg += " ▫️ **{}** EMP".format(star['emp']) # emp
+                    if star['comment'] != "(Blank)": msg += "\n\u202d💬 ``{}``".format(su.unescape(star['comment']))
                     fields.append({'name':'{} Star Character'.format(self.bot.getEmote('skill2')), 'value':msg})
-                except:
-                    pass
                 if trophy == "No Trophy Displayed": title = "\u202d{} **{}**".format(self.bot.getEmote(rarity), name)
                 else: title = "\u202d{} **{}**▫️{}".format(self.bot.getEmote(rarity), name, trophy)
 
@@ -6,21 +6,174 @@ from datetime import datetime, timedelta
 import random
 import json
 import sqlite3
+import time
+import array
+import struct
+import sys
+from bisect import bisect_right
 from xml.sax import saxutils as su
 
+# #####################################################################################
+# GW ranking history (one column of points per cutoff, one row per update)
+class RankingSeries():
+    HEADER = b'MZGR'
+    VERSION = 1
+
+    def __init__(self, id=None):
+        self.id = id # gw id
+        self.times = array.array('q') # update times, in minutes since the epoch (JST)
+        self.columns = {} # 'crew_300', 'player_2000', etc...: array of points (-1 if missing)
+
+    def key(self, rank, crew):
+        return '{}_{}'.format('crew' if crew else 'player', rank)
+
+    def toMinutes(self, date):
+        return int((date - datetime(1970, 1, 1)).total_seconds()) // 60
+
+    def toDate(self, minutes):
+        return datetime(1970, 1, 1) + timedelta(seconds=minutes*60)
+
+    def append(self, date, values): # add a row. values is a dict of key: points
+        n = len(self.times)
+        self.times.append(self.toMinutes(date))
+        for k in values:
+            if k not in self.columns: self.columns[k] = array.array('q', [-1] * n)
+        for k in self.columns:
+            self.columns[k].append(values.get(k, -1))
+
+    def lastDate(self):
+        if len(self.times) == 0: return None
+        return self.toDate(self.times[-1])
+
+    def valid(self, key, i): # index of the last sample with a value at or before i, -1 if none
+        col = self.columns[key]
+        while i >= 0 and col[i] < 0: i -= 1
+        return i
+
+    def last(self, key): # points of the latest update, None if missing
+        if key not in self.columns or len(self.times) == 0 or self.columns[key][-1] < 0: return None
+        return self.columns[key][-1]
+
+    def speed(self, key, window=None): # points per minute over the window (timedelta, the previous update if None), None if unavailable
+        if key not in self.columns: return None
+        i = len(self.times) - 1
+        if i < 1 or self.columns[key][i] < 0: return None
+        if window is None: j = self.valid(key, i - 1)
+        else: j = self.valid(key, max(0, bisect_right(self.times, self.times[i] - int(window.total_seconds()) // 60) - 1))
+        if j < 0 or self.times[i] == self.times[j]: return None
+        return (self.columns[key][i] - self.columns[key][j]) / (self.times[i] - self.times[j])
+
+    def history(self, key): # list of (date, points)
+        if key not in self.columns: return []
+        col = self.columns[key]
+        return [(self.toDate(self.times[i]), col[i]) for i in range(0, len(self.times)) if col[i] >= 0]
+
+    def dumps(self): # columnar binary form: header, gw id, row count, column names, then the time column and each point column
+        out = bytearray(self.HEADER)
+        out += struct.pack('<BqIH', self.VERSION, -1 if self.id is None else self.id, len(self.times), len(self.columns))
+        for k in self.columns:
+            b = k.encode('utf-8')
+            out += struct.pack('<H', len(b)) + b
+        for col in [self.times] + list(self.columns.values()):
+            if sys.byteorder != 'little':
+                col = array.array('q', col)
+                col.byteswap()
+            out += col.tobytes()
+        return bytes(out)
+
+    def loads(self, data): # read the columnar binary form
+        if data[:4] != self.HEADER: raise ValueError("Not a ranking file")
+        version, id, rows, cols = struct.unpack_from('<BqIH', data, 4)
+        if version != self.VERSION: raise ValueError("Unsupported ranking file version {}".format(version))
+        pos = 4 + struct.calcsize('<BqIH')
+        names = []
+        for i in range(0, cols):
+            l = struct.unpack_from('<H', data, pos)[0]
+            names.append(data[pos+2:pos+2+l].decode('utf-8'))
+            pos += 2 + l
+        columns = []
+        for i in range(0, cols + 1):
+            col = array.array('q')
+            col.frombytes(data[pos:pos+rows*8])
+            if sys.byteorder != 'little': col.byteswap()
+            columns.append(col)
+            pos += rows * 8
+        self.id = None if id == -1 else id
+        self.times = columns[0]
+        self.columns = dict(zip(names, columns[1:]))
+
 class GW(commands.Cog):
     """GW related commands."""
     def __init__(self, bot):
         self.bot = bot
         self.color = 0xf4426e
-        self.sql = [None, None]
-        self.conn = [None, None]
-        self.cursor = [None, None]
-        self.loadingdb = False
+        self.dbs = [bot.database("GW_old.sql", self.openGWDB), bot.database("GW.sql", self.openGWDB)] # previous and current gw
+        self.leaderboard = None # cached /gbfg/ ranking of GW.sql: [database version, gw id, sorted crews]
+        self.rankinglock = asyncio.Lock() # to space the ranking requests
+        self.rankinglast = 0 # time of the last ranking request
+        self.rankingsettings = {'concurrency':4, 'interval':0.1, 'retry':3, 'backoff':1.0, 'timeout':10} # parallel requests, seconds between two requests, attempts, base retry delay, timeout
+        self.rankingstats = {'sweep':None, 'latency':[], 'failed':0} # duration of the last sweep, latency of each of its requests, failed requests
+        self.rankings = RankingSeries() # cutoff history of the current gw
+        self.rankingfile = "gwranking.bin" # stored in the save folder
 
     def startTasks(self):
         self.bot.runTask('check_ranking', self.checkGWRanking)
-        self.bot.runTask('check_buff', self.checkGWBuff)
+        self.scheduleGWBuff()
+
+    async def rankingThrottle(self): # wait until we can send the next request to the game
+        async with self.rankinglock:
+            delay = self.rankinglast + self.rankingsettings['interval'] - time.monotonic()
+            if delay > 0: await asyncio.sleep(delay)
+            self.rankinglast = time.monotonic()
+
+    async def fetchRanking(self, cog, page, crew): # one ranking request with retries
+        for i in range(0, self.rankingsettings['retry']):
+            await self.rankingThrottle()
+            start = time.monotonic()
+            try:
+                r = await asyncio.wait_for(cog.requestRanking(page, crew), self.rankingsettings['timeout'])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                r = None
+            self.rankingstats['latency'].append(time.monotonic() - start)
+            if r is not None: return r
+            await asyncio.sleep(self.rankingsettings['backoff'] * (2 ** i) * random.uniform(0.5, 1.5)) # jittered exponential backoff
+        self.rankingstats['failed'] += 1
+        return None
+
+    async def fetchRankings(self, cog, cutoffs): # request all the cutoffs in parallel. cutoffs is a list of (rank, is_crew). return the results in the same order
+        sem = asyncio.Semaphore(self.rankingsettings['concurrency'])
+        async def fetch(rank, crew):
+            async with sem:
+                return await self.fetchRanking(cog, rank // 10, crew)
+        self.rankingstats['latency'] = []
+        start = time.monotonic()
+        res = await asyncio.gather(*[fetch(c[0], c[1]) for c in cutoffs])
+        self.rankingstats['sweep'] = time.monotonic() - start
+        return res
+
+    async def loadRankings(self): # retrieve the cutoff history from the drive
+        try:
+            if await self.bot.callThread(self.bot.drive.dlFile, self.rankingfile, self.bot.tokens['drive']):
+                with open(self.rankingfile, 'rb') as f:
+                    self.rankings.loads(f.read())
+        except Exception as e:
+            await self.bot.sendError('loadrankings', str(e))
+        if self.rankings.id != self.bot.gw.get('id', None): # different gw
+            self.rankings = RankingSeries(self.bot.gw.get('id', None))
+
+    async def saveRankings(self): # write the cutoff history to the drive
+        try:
+            with open(self.rankingfile, 'wb') as f:
+                f.write(self.rankings.dumps())
+            if not await self.bot.callThread(self.bot.drive.overwriteDiskFile, self.rankingfile, "application/octet-stream", self.rankingfile, self.bot.tokens['drive']):
+                raise Exception("Couldn't upload to google drive")
+        except Exception as e:
+            await self.bot.sendError('saverankings', str(e))
+
+    def resetRankings(self): # new gw
+        self.rankings = RankingSeries(self.bot.gw.get('id', None))
 
     async def checkGWRanking(self):
         await self.bot.send('debug', embed=self.bot.buildEmbed(color=self.color, title="checkgwranking() started", timestamp=datetime.utcnow()))
@@ -35,16 +188,16 @@ class GW(commands.Cog):
         days = ["End", "Day 5", "Day 4", "Day 3", "Day 2", "Day 1", "Interlude", "Preliminaries"]
         minute_update = [4, 24, 44]
 
+        if self.bot.gw.pop('ranking', None) is not None: # old format, the save doesn't carry the ranking anymore
+            self.bot.markDirty('gw')
+        await self.loadRankings()
+
         while True:
             self.getGWState()
             try:
                 if self.bot.gw['state'] == False:
-                    self.bot.gw['ranking'] = None
-                    self.bot.savePending = True
                     await asyncio.sleep(3600)
                 elif self.bot.getJST() < self.bot.gw['dates']["Preliminaries"]:
-                    self.bot.gw['ranking'] = None
-                    self.bot.savePending = True
                     d = self.bot.gw['dates']["Preliminaries"] - self.bot.getJST()
                     await asyncio.sleep(d.seconds + 1)
                 elif self.bot.getJST() > self.bot.gw['dates']["Day 5"] - timedelta(seconds=21600):
@@ -68,34 +221,20 @@ class GW(commands.Cog):
                                 crews = crewsB
                             else:
                                 crews = crewsA
-                            try:
-                                data = [{}, {}, {}, {}, current_time - timedelta(seconds=60 * (current_time.minute % 20))]
-                                if self.bot.gw['ranking'] is not None:
-                                    diff = data[4] - self.bot.gw['ranking'][4]
-                                    diff = round(diff.total_seconds() / 60.0)
-                                else: diff = 0
-                                for c in crews:
-                                    r = await cog.requestRanking(c // 10, True)
-                                    if r is not None and 'list' in r and len(r['list']) > 0:
-                                        data[0][str(c)] = int(r['list'][-1]['point'])
-                                        if diff > 0 and self.bot.gw['ranking'] is not None and str(c) in self.bot.gw['ranking'][0]:
-                                            data[2][str(c)] = (data[0][str(c)] - self.bot.gw['ranking'][0][str(c)]) / diff
-                                    await asyncio.sleep(0.001)
-
-                                for p in players:
-                                    r = await cog.requestRanking(p // 10, False)
-                                    if r is not None and 'list' in r and len(r['list']) > 0:
-                                        data[1][str(p)] = int(r['list'][-1]['point'])
-                                        if diff > 0 and self.bot.gw['ranking'] is not None and str(p) in self.bot.gw['ranking'][1]:
-                                            data[3][str(p)] = (data[1][str(p)] - self.bot.gw['ranking'][1][str(p)]) / diff
-                                    await asyncio.sleep(0.001)
-
-                                self.bot.gw['ranking'] = data
-                                self.bot.savePending = True
-                            except Exception as ex:
-                                await self.bot.sendError('checkgwranking', str(ex))
-                                self.bot.gw['ranking'] = None
-                                self.bot.savePending = True
+                            with self.bot.metrics.timer('task', 'checkGWRanking'):
+                                try:
+                                    if self.rankings.id != self.bot.gw['id']: self.resetRankings()
+                                    cutoffs = [(c, True) for c in crews] + [(p, False) for p in players]
+                                    results = await self.fetchRankings(cog, cutoffs)
+                                    values = {}
+                                    for i in range(0, len(cutoffs)):
+                                        r = results[i]
+                                        if r is not None and 'list' in r and len(r['list']) > 0:
+                                            values[self.rankings.key(cutoffs[i][0], cutoffs[i][1])] = int(r['list'][-1]['point'])
+                                    self.rankings.append(current_time - timedelta(seconds=60 * (current_time.minute % 20)), values)
+                                    await self.saveRankings()
+                                except Exception as ex:
+                                    await self.bot.sendError('checkgwranking', str(ex))
                             await asyncio.sleep(600)
                         else:
                             await asyncio.sleep(30)
@@ -108,61 +247,54 @@ class GW(commands.Cog):
                 await self.bot.sendError('checkgwranking', str(e))
                 return
 
-    async def checkGWBuff(self): # automatically calls the GW buff used by the (you) crew
+    def scheduleGWBuff(self): # give the (you) buff calendar to the scheduler
+        self.bot.scheduler.cancelGroup('gwbuff')
         self.getGWState()
         if self.bot.gw['state'] == False: return
-        await asyncio.sleep(3)
-        await self.bot.send('debug', embed=self.bot.buildEmbed(color=self.color, title="checkgwbuff() started", timestamp=datetime.utcnow()))
+        for b in self.bot.gw['buffs']:
+            self.bot.scheduler.add(b[0] - timedelta(seconds=2), 'gwbuff', self.callGWBuff, b)
+
+    def cancelGWBuff(self):
+        self.bot.scheduler.cancelGroup('gwbuff')
+
+    async def callGWBuff(self, buff): # automatically calls the GW buff used by the (you) crew. called by the scheduler
+        if self.bot.gw['state'] == False: return
         try:
-            guild = self.bot.get_guild(self.bot.ids.get('you_server', 0))
-            if guild is None:
-                await self.bot.sendError('checkgwbuff', 'cancelled, no guild found')
-            channel = self.bot.get_channel(self.bot.ids.get('you_announcement', 0))
-            gl_role = guild.get_role(self.bot.ids.get('gl', 0))
-            fo_role = guild.get_role(self.bot.ids.get('fo', 0))
-            buff_role = [[guild.get_role(self.bot.ids.get('atkace', 0)), 'atkace'], [guild.get_role(self.bot.ids.get('deface', 0)), 'deface']]
             msg = ""
-            while self.bot.gw['state'] and (len(self.bot.gw['buffs']) > 0 or len(msg) != 0):
-                current_time = self.bot.getJST() + timedelta(seconds=32)
-                if len(self.bot.gw['buffs']) > 0 and current_time >= self.bot.gw['buffs'][0][0]:
-                    msg = ""
-                    if (current_time - self.bot.gw['buffs'][0][0]) < timedelta(seconds=200):
-                        if self.bot.gw['buffs'][0][1]:
-                            for r in buff_role:
-                                msg += "{} {}\n".format(self.bot.getEmote(r[1]), r[0].mention)
-                        if self.bot.gw['buffs'][0][2]:
-                            msg += "{} {}\n".format(self.bot.getEmote('foace'), fo_role.mention)
-                        if self.bot.gw['buffs'][0][4]:
-                            if self.bot.gw['buffs'][0][3]:
-                                msg += '*Buffs in 5 minutes* **(Double use this time only !)**'
-                            else:
-                                msg += 'Buffs now! **(Double use this time only !)**'
-                        else:
-                            if self.bot.gw['buffs'][0][3]:
-                                msg += '*Buffs in 5 minutes*'
-                            else:
-                                msg += 'Buffs now!'
-                        if self.bot.gw['skip']:
-                            msg = ""
-                        if not self.bot.gw['buffs'][0][3]:
-                            self.bot.gw['skip'] = False
-                    self.bot.gw['buffs'].pop(0)
-                    self.bot.savePending = True
+            if (self.bot.scheduler.now() + timedelta(seconds=2) - buff[0]) < timedelta(seconds=200): # ignore if too late
+                guild = self.bot.get_guild(self.bot.ids.get('you_server', 0))
+                if guild is None:
+                    await self.bot.sendError('callgwbuff', 'no guild found')
+                    return
+                fo_role = guild.get_role(self.bot.ids.get('fo', 0))
+                buff_role = [[guild.get_role(self.bot.ids.get('atkace', 0)), 'atkace'], [guild.get_role(self.bot.ids.get('deface', 0)), 'deface']]
+                if buff[1]:
+                    for r in buff_role:
+                        msg += "{} {}\n".format(self.bot.getEmote(r[1]), r[0].mention)
+                if buff[2]:
+                    msg += "{} {}\n".format(self.bot.getEmote('foace'), fo_role.mention)
+                if buff[4]:
+                    if buff[3]:
+                        msg += '*Buffs in 5 minutes* **(Double use this time only !)**'
+                    else:
+                        msg += 'Buffs now! **(Double use this time only !)**'
                 else:
-                    if msg != "":
-                        await channel.send("{} {}\n{}".format(self.bot.getEmote('captain'), gl_role.mention, msg))
-                        msg = ""
-                    if len(self.bot.gw['buffs']) > 0:
-                        d = self.bot.gw['buffs'][0][0] - current_time
-                        if d.seconds > 1:
-                            await asyncio.sleep(d.seconds-1)
-            if len(msg) > 0:
-                await channel.send(msg)
-        except asyncio.CancelledError:
-            await self.bot.sendError('checkgwbuff', 'cancelled')
+                    if buff[3]:
+                        msg += '*Buffs in 5 minutes*'
+                    else:
+                        msg += 'Buffs now!'
+                if self.bot.gw['skip']:
+                    msg = ""
+                if not buff[3]:
+                    self.bot.gw['skip'] = False
+            if buff in self.bot.gw['buffs']: self.bot.gw['buffs'].remove(buff)
+            self.bot.markDirty('gw')
+            if msg != "":
+                channel = self.bot.get_channel(self.bot.ids.get('you_announcement', 0))
+                gl_role = guild.get_role(self.bot.ids.get('gl', 0))
+                await channel.send("{} {}\n{}".format(self.bot.getEmote('captain'), gl_role.mention, msg))
         except Exception as e:
-            await self.bot.sendError('checkgwbuff', str(e))
-        await self.bot.send('debug', embed=self.bot.buildEmbed(color=self.color, title="checkgwbuff() ended", timestamp=datetime.utcnow()))
+            await self.bot.sendError('callgwbuff', str(e))
 
     async def checkMaintenance(self):
         try:
@@ -234,7 +366,7 @@ class GW(commands.Cog):
                 self.bot.gw['state'] = False
                 self.bot.gw['dates'] = {}
                 self.bot.cancelTask('gwtask')
-                self.bot.savePending = True
+                self.bot.markDirty('gw')
                 return ""
             elif current_time > self.bot.gw['dates']["Day 5"]:
                 d = self.bot.gw['dates']["End"] - current_time
@@ -270,7 +402,7 @@ class GW(commands.Cog):
                 self.bot.gw['state'] = False
                 self.bot.gw['dates'] = {}
                 self.bot.cancelTask('gwtask')
-                self.bot.savePending = True
+                self.bot.markDirty('gw')
                 return False
             else:
                 return True
@@ -321,7 +453,7 @@ class GW(commands.Cog):
                     self.bot.gw['state'] = False
                     self.bot.gw['dates'] = {}
                     self.bot.cancelTask('gwtask')
-                    self.bot.savePending = True
+                    self.bot.markDirty('gw')
                     return
 
                 try:
@@ -375,10 +507,9 @@ class GW(commands.Cog):
     async def search(self, ctx, *, terms : str):
         """Search a crew preliminary score (by name)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post("http://gbf.gw.lt/gw-guild-searcher/search", json={'search': terms}) as resp:
-                    if resp.status != 200: raise Exception("HTTP Error " + str(resp.status))
-                    data = json.loads(await resp.read())
+            async with self.bot.web.post("http://gbf.gw.lt/gw-guild-searcher/search", json={'search': terms}) as resp:
+                if resp.status != 200: raise Exception("HTTP Error " + str(resp.status))
+                data = json.loads(await resp.read())
             if len(data['result']) == 1:
                 try:
                     await self.bot.callCommand(ctx, 'searchID', 'GW', data['result'][0]['id'])
@@ -410,10 +541,9 @@ class GW(commands.Cog):
         """Search a crew preliminary score (by ID)"""
         try:
             if id < 0: raise Exception("Negative ID")
-            async with aiohttp.ClientSession() as session:
-                async with session.get("http://gbf.gw.lt/gw-guild-searcher/info/{}".format(id)) as resp:
-                    if resp.status != 200: raise Exception("HTTP Error " + str(resp.status))
-                    data = json.loads(await resp.read())
+            async with self.bot.web.get("http://gbf.gw.lt/gw-guild-searcher/info/{}".format(id)) as resp:
+                if resp.status != 200: raise Exception("HTTP Error " + str(resp.status))
+                data = json.loads(await resp.read())
             if len(data["data"]) == 0:
                 await ctx.send(embed=self.bot.buildEmbed(title="{} Guild Searcher".format(self.bot.getEmote('gw')), description="Crew not found", color=self.color))
                 return
@@ -433,163 +563,182 @@ class GW(commands.Cog):
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="The seach couldn't be completed", footer=str(e), color=self.color))
             await self.bot.sendError("searchid", str(e))
 
+    def rankingName(self, rank): # cutoff name for the ranking commands
+        if rank < 1000: return "#{:}".format(rank)
+        elif rank % 1000 != 0: return "#{:,}.{:,}K".format(rank//1000, (rank%1000)//100)
+        else: return "#{:,}K".format(rank//1000)
+
+    def rankingSpeed(self, speed): # speed string for the ranking commands
+        if speed is None or speed <= 0: return ""
+        elif speed > 1000000000: return " \▫️  {:,.1f}B/min".format(speed/1000000000)
+        elif speed > 1000000: return " \▫️  {:,.1f}M/min".format(speed/1000000)
+        elif speed > 1000: return " \▫️  {:,.1f}K/min".format(speed/1000)
+        else: return " \▫️  {:,.1f}/min".format(speed)
+
     @commands.command(no_pm=True, cooldown_after_parsing=True, aliases=['rankings', 'cutoff', 'cutoffs'])
     @commands.cooldown(1, 10, commands.BucketType.guild)
-    async def ranking(self, ctx):
-        """Retrieve the current GW ranking"""
+    async def ranking(self, ctx, window : str = ""):
+        """Retrieve the current GW ranking
+        [window] format: XdXhXm, to calculate the speed over a longer period (default is since the previous update)"""
         try:
-            if self.bot.gw['state'] == False or self.bot.getJST() < self.bot.gw['dates']["Preliminaries"] or self.bot.gw['ranking'] is None:
+            if self.bot.gw['state'] == False or self.bot.getJST() < self.bot.gw['dates']["Preliminaries"] or self.rankings.lastDate() is None or self.rankings.id != self.bot.gw['id']:
                 await ctx.send(embed=self.bot.buildEmbed(title="Ranking unavailable", color=self.color))
             else:
+                if window != "":
+                    delta = self.bot.makeTimedelta(window)
+                    if delta is None or delta.total_seconds() < 60:
+                        await ctx.send(embed=self.bot.buildEmbed(title="Ranking Error", description="Invalid window `{}`, format is `NdNhNm`".format(window), color=self.color))
+                        return
+                else:
+                    delta = None
                 fields = [{'name':'**Crew Ranking**', 'value':''}, {'name':'**Player Ranking**', 'value':''}]
-                for c in self.bot.gw['ranking'][0]:
-                    if int(c) < 1000:
-                        fields[0]['value'] += "**#{:}** \▫️ {:,}".format(c, self.bot.gw['ranking'][0][c])
-                    elif int(c) % 1000 != 0:
-                        fields[0]['value'] += "**#{:,}.{:,}K** \▫️ {:,}".format(int(c)//1000, (int(c)%1000)//100, self.bot.gw['ranking'][0][c])
-                    else:
-                        fields[0]['value'] += "**#{:,}K** \▫️ {:,}".format(int(c)//1000, self.bot.gw['ranking'][0][c])
-                    if c in self.bot.gw['ranking'][2]:
-                        if self.bot.gw['ranking'][2][c] > 1000000000:
-                            fields[0]['value'] += " \▫️  {:,.1f}B/min".format(self.bot.gw['ranking'][2][c]/1000000000)
-                        elif self.bot.gw['ranking'][2][c] > 1000000:
-                            fields[0]['value'] += " \▫️  {:,.1f}M/min".format(self.bot.gw['ranking'][2][c]/1000000)
-                        elif self.bot.gw['ranking'][2][c] > 1000:
-                            fields[0]['value'] += " \▫️  {:,.1f}K/min".format(self.bot.gw['ranking'][2][c]/1000)
-                        elif self.bot.gw['ranking'][2][c] > 0:
-                            fields[0]['value'] += " \▫️  {:,.1f}/min".format(self.bot.gw['ranking'][2][c])
-                    fields[0]['value'] += "\n"
-                if fields[0]['value'] == '': fields[0]['value'] = 'Unavailable'
-
-                for c in self.bot.gw['ranking'][1]:
-                    if int(c) < 1000:
-                        fields[1]['value'] += "**#{:}** \▫️ {:,}".format(c, self.bot.gw['ranking'][1][c])
-                    elif int(c) % 1000 != 0:
-                        fields[1]['value'] += "**#{:,}.{:,}K** \▫️ {:,}".format(int(c)//1000, (int(c)%1000)//100, self.bot.gw['ranking'][1][c])
-                    else:
-                        fields[1]['value'] += "**#{:,}K** \▫️ {:,}".format(int(c)//1000, self.bot.gw['ranking'][1][c])
-                    if c in self.bot.gw['ranking'][3]:
-                        if self.bot.gw['ranking'][3][c] > 1000000000:
-                            fields[1]['value'] += " \▫️  {:,.1f}B/min".format(self.bot.gw['ranking'][3][c]/1000000000)
-                        elif self.bot.gw['ranking'][3][c] > 1000000:
-                            fields[1]['value'] += " \▫️  {:,.1f}M/min".format(self.bot.gw['ranking'][3][c]/1000000)
-                        elif self.bot.gw['ranking'][3][c] > 1000:
-                            fields[1]['value'] += " \▫️  {:,.1f}K/min".format(self.bot.gw['ranking'][3][c]/1000)
-                        elif self.bot.gw['ranking'][3][c] > 0:
-                            fields[1]['value'] += " \▫️  {:,.1f}/min".format(self.bot.gw['ranking'][3][c])
-                    fields[1]['value'] += "\n"
-                if fields[1]['value'] == '': fields[1]['value'] = 'Unavailable'
+                for k in self.rankings.columns:
+                    n = 0 if k.startswith('crew') else 1
+                    points = self.rankings.last(k)
+                    if points is None: continue
+                    fields[n]['value'] += "**{}** \▫️ {:,}{}\n".format(self.rankingName(int(k.split('_')[1])), points, self.rankingSpeed(self.rankings.speed(k, delta)))
+                for f in fields:
+                    if f['value'] == '': f['value'] = 'Unavailable'
 
                 em = self.bot.getEmote(self.bot.gw.get('element', ''))
                 if em is None: em = ""
-                await ctx.send(embed=self.bot.buildEmbed(title="{} **Guild War {}** {}".format(self.bot.getEmote('gw'), self.bot.gw['id'], em), fields=fields, footer="Last Update ▫️ {:%a. %m/%d %H:%M} JST ▫️ Update on minute 5, 25 and 45".format(self.bot.gw['ranking'][4]), inline=True, color=self.color))
+                footer = "Last Update ▫️ {:%a. %m/%d %H:%M} JST ▫️ Update on minute 5, 25 and 45".format(self.rankings.lastDate())
+                if delta is not None: footer += " ▫️ Speed over {}".format(self.bot.getTimedeltaStr(delta, True))
+                await ctx.send(embed=self.bot.buildEmbed(title="{} **Guild War {}** {}".format(self.bot.getEmote('gw'), self.bot.gw['id'], em), fields=fields, footer=footer, inline=True, color=self.color))
         except Exception as e:
             await self.bot.sendError("ranking", str(e))
 
-    async def loadGWDB(self):
-        self.loadingdb = True
+    @commands.command(no_pm=True, cooldown_after_parsing=True, aliases=['cutoffhistory'])
+    @commands.cooldown(1, 10, commands.BucketType.guild)
+    async def rankingHistory(self, ctx, rank : int, mode : str = "crew"):
+        """Show the evolution of a GW cutoff
+        [mode]: crew (default) or player"""
         try:
-            if self.bot.drive.dlFile("GW_old.sql", self.bot.tokens['files']):
-                self.conn[0] = sqlite3.connect("GW_old.sql")
-                self.cursor[0] = self.conn[0].cursor()
-                self.sql[0] = True
-            else:
-                self.sql[0] = False
+            key = self.rankings.key(rank, mode.lower() != "player")
+            history = self.rankings.history(key)
+            if self.bot.gw['state'] == False or self.rankings.id != self.bot.gw['id'] or len(history) == 0:
+                await ctx.send(embed=self.bot.buildEmbed(title="Ranking unavailable", description="No data for this cutoff", footer="Available: " + ", ".join([self.rankingName(int(k.split('_')[1])) + ' ' + k.split('_')[0] for k in self.rankings.columns]), color=self.color))
+                return
+            step = max(1, len(history) // 20) # 20 lines at most
+            samples = history[::-1][::step][::-1]
+            description = ""
+            for i in range(0, len(samples)):
+                description += "**{:%a. %m/%d %H:%M}** \▫️ {:,}".format(samples[i][0], samples[i][1])
+                if i > 0:
+                    d = (samples[i][0] - samples[i-1][0]).total_seconds() / 60
+                    if d > 0: description += self.rankingSpeed((samples[i][1] - samples[i-1][1]) / d)
+                description += "\n"
+            await ctx.send(embed=self.bot.buildEmbed(title="{} **Guild War {}** {} {}".format(self.bot.getEmote('gw'), self.bot.gw['id'], mode.lower() if mode.lower() == "player" else "crew", self.rankingName(rank)), description=description, footer="{} update(s)".format(len(history)), color=self.color))
         except Exception as e:
-            self.sql[0] = None
-            await self.bot.sendError('loadGWDB A', str(e))
+            await self.bot.sendError("rankinghistory", str(e))
+
+    def openGWDB(self, conn): # build the indexes of a new database (run in a thread). return the gw id, the column names of the crews table and if the name search index is available
+        info = {}
+        c = conn.cursor()
+        c.execute("PRAGMA table_info(crews)")
+        info['crewcolumns'] = [r[1] for r in c.fetchall()]
         try:
-            if self.bot.drive.dlFile("GW.sql", self.bot.tokens['files']):
-                self.conn[1] = sqlite3.connect("GW.sql")
-                self.cursor[1] = self.conn[1].cursor()
-                self.sql[1] = True
-            else:
-                self.sql[1] = False
-        except Exception as e:
-            self.sql[1] = None
-            await self.bot.sendError('loadGWDB B', str(e))
-        self.loadingdb = False
-        return self.sql
+            c.execute("SELECT id FROM GW")
+            info['gwid'] = int(c.fetchone()[0])
+        except:
+            info['gwid'] = None
+        info['fts'] = True
+        for t in ['crews', 'players']:
+            c.execute("CREATE INDEX IF NOT EXISTS {0}_id ON {0}(id)".format(t))
+            c.execute("CREATE INDEX IF NOT EXISTS {0}_lname ON {0}(lower(name))".format(t)) # exact name search
+            try: # substring name search (sqlite 3.34 or higher)
+                c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS {0}_fts USING fts5(name, content='{0}', content_rowid='rowid', tokenize='trigram')".format(t))
+                c.execute("INSERT INTO {0}_fts({0}_fts) VALUES('rebuild')".format(t))
+            except:
+                info['fts'] = False
+        conn.commit()
+        return info
 
-    async def searchGWDBCrew(self, ctx, terms, mode):
-        while self.loadingdb: await asyncio.sleep(0.001)
-        if self.sql[0] is None or self.sql[1] is None:
-            await self.bot.react(ctx, 'time')
-            await self.loadGWDB()
-            await self.bot.unreact(ctx, 'time')
+    async def loadGWDB(self): # download both databases (or join the downloads in progress), return True if both were replaced
+        res = await asyncio.gather(*[db.load() for db in self.dbs])
+        return False not in res
+
+    async def readyGWDB(self, ctx): # wait for both databases, download them if they aren't loaded
+        if None not in [db.state for db in self.dbs]: # the current databases stay usable during a download
+            return
+        await self.bot.react(ctx, 'time')
+        await asyncio.gather(*[db.ready() for db in self.dbs])
+        await self.bot.unreact(ctx, 'time')
+
+    def queryGWDB(self, n, table, terms, mode): # search in a table (crews or players) of a database. mode: 0 = name contains terms, 1 = exact name, 2 = id, 3 = list of ids
+        c = self.dbs[n].conn.cursor()
+        if mode == 3:
+            ids = [int(i) for i in terms]
+            res = []
+            for i in range(0, len(ids), 500): # sqlite limit on the number of parameters
+                chunk = ids[i:i+500]
+                c.execute("SELECT * FROM {} WHERE id IN ({})".format(table, ",".join(["?"] * len(chunk))), chunk)
+                res += c.fetchall()
+            return res
+        elif mode == 2:
+            c.execute("SELECT * FROM {} WHERE id = ?".format(table), (int(terms),))
+        elif mode == 1:
+            c.execute("SELECT * FROM {} WHERE lower(name) = ?".format(table), (terms.lower(),))
+        elif self.dbs[n].info['fts'] and len(terms) >= 3: # the trigram index needs 3 characters
+            c.execute("SELECT {0}.* FROM {0}_fts JOIN {0} ON {0}.rowid = {0}_fts.rowid WHERE {0}_fts MATCH ?".format(table), ('"{}"'.format(terms.replace('"', '""')),))
+        else:
+            c.execute("SELECT * FROM {} WHERE instr(lower(name), ?) > 0".format(table), (terms.lower(),))
+        return c.fetchall()
+
+    def queryGWDBCrewScores(self, n, ids): # return (id, name, rank, column, honor) for a list of crew ids, using the most recent total available (column 11, 9, 7, 5 or 3), sorted by honor
+        cols = ['"{}"'.format(self.dbs[n].info['crewcolumns'][i].replace('"', '""')) for i in [0, 1, 2, 11, 9, 7, 5, 3]]
+        best = "COALESCE({})".format(", ".join(cols[3:]))
+        which = "CASE " + " ".join(["WHEN {} IS NOT NULL THEN {}".format(cols[3+i], [11, 9, 7, 5, 3][i]) for i in range(0, 5)]) + " END"
+        ids = [int(i) for i in ids]
+        res = []
+        c = self.dbs[n].conn.cursor()
+        for i in range(0, len(ids), 500): # sqlite limit on the number of parameters
+            chunk = ids[i:i+500]
+            c.execute("SELECT {}, {}, {}, {}, {} AS honor FROM crews WHERE {} IN ({}) AND honor IS NOT NULL".format(cols[1], cols[2], cols[0], which, best, cols[1], ",".join(["?"] * len(chunk))), chunk)
+            res += c.fetchall()
+        res.sort(key=lambda r: -int(r[4]))
+        return res
+
+    async def searchGWDB(self, ctx, table, terms, mode): # search in both databases, return [old gw, current gw]
+        await self.readyGWDB(ctx)
 
         data = [None, None]
 
         for n in range(0, 2):
-            if self.sql[n] is not None and self.sql[n] == True:
+            if self.dbs[n].state == True:
                 data[n] = {}
+                if self.dbs[n].info['gwid'] is not None:
+                    data[n]['gw'] = self.dbs[n].info['gwid']
                 try:
-                    self.cursor[n].execute("SELECT id FROM GW")
-                    for row in self.cursor[n]:
-                        data[n]['gw'] = int(row[0])
-                        break
-                except:
-                    pass
-
-                try:
-                    if mode == 0:
-                        self.cursor[n].execute("SELECT * FROM crews WHERE lower(name) LIKE '%{}%'".format(terms.lower().replace("'", "''").replace("%", "\%")))
-                    elif mode == 1:
-                        self.cursor[n].execute("SELECT * FROM crews WHERE lower(name) LIKE '{}'".format(terms.lower().replace("'", "''").replace("%", "\%")))
-                    elif mode == 2:
-                        self.cursor[n].execute("SELECT * FROM crews WHERE id = {}".format(terms))
-                    data[n]['result'] = self.cursor[n].fetchall()
+                    data[n]['result'] = self.queryGWDB(n, table, terms, mode)
                     random.shuffle(data[n]['result'])
                 except Exception as e:
-                    await self.bot.sendError('searchGWDBCrew {}'.format(n), str(e))
+                    await self.bot.sendError('searchGWDB {} {}'.format(table, n), str(e))
                     data[n] = None
 
         return data
 
-    async def searchGWDBPlayer(self, ctx, terms, mode):
-        while self.loadingdb: await asyncio.sleep(0.001)
-        if self.sql[0] is None or self.sql[1] is None:
-            await self.bot.react(ctx, 'time')
-            await self.loadGWDB()
-            await self.bot.unreact(ctx, 'time')
-
-        data = [None, None]
-
-        for n in range(0, 2):
-            if self.sql[n] is not None and self.sql[n] == True:
-                data[n] = {}
-                try:
-                    self.cursor[n].execute("SELECT id FROM GW")
-                    for row in self.cursor[n]:
-                        data[n]['gw'] = int(row[0])
-                        break
-                except:
-                    pass
+    async def searchGWDBCrew(self, ctx, terms, mode):
+        return await self.searchGWDB(ctx, 'crews', terms, mode)
 
-                try:
-                    if mode == 0:
-                        self.cursor[n].execute("SELECT * FROM players WHERE lower(name) LIKE '%{}%'".format(terms.lower().replace("'", "''").replace("%", "\%")))
-                    elif mode == 1:
-                        self.cursor[n].execute("SELECT * FROM players WHERE lower(name) LIKE '{}'".format(terms.lower().replace("'", "''").replace("%", "\%")))
-                    elif mode == 2:
-                        self.cursor[n].execute("SELECT * FROM players WHERE id = {}".format(terms))
-                    data[n]['result'] = self.cursor[n].fetchall()
-                    random.shuffle(data[n]['result'])
-                except Exception as e:
-                    await self.bot.sendError('searchGWDBPlayer {}'.format(n), str(e))
-                    data[n] = None
+    async def searchGWDBPlayer(self, ctx, terms, mode):
+        return await self.searchGWDB(ctx, 'players', terms, mode)
 
+    async def searchGWDBPlayers(self, ctx, ids): # search a list of player ids, one query per database. return [old gw, current gw], with results as a dict of id: row
+        data = await self.searchGWDB(ctx, 'players', ids, 3)
+        for d in data:
+            if d is not None and 'result' in d:
+                d['result'] = {row[1]: row for row in d['result']}
         return data
 
     @commands.command(no_pm=True, cooldown_after_parsing=True)
     @isOwner()
     async def reloadDB(self, ctx):
         """Download GW.sql (Owner only)"""
-        while self.loadingdb: await asyncio.sleep(0.001)
         await self.bot.react(ctx, 'time')
-        await self.loadGWDB()
+        r = await self.loadGWDB()
         await self.bot.unreact(ctx, 'time')
-        if False in self.sql or None in self.sql:
+        if not r:
             await ctx.message.add_reaction('❎') # white negative mark
         else:
             await ctx.message.add_reaction('✅') # white check mark
@@ -598,37 +747,29 @@ class GW(commands.Cog):
     @commands.cooldown(1, 60, commands.BucketType.guild)
     async def gbfgranking(self, ctx):
         """Post and sort all /gbfg/ crew per contribution"""
-        crews = []
-        blacklist = ["677159", "147448"]
-        for e in self.bot.granblue['gbfgcrew']:
-            if self.bot.granblue['gbfgcrew'][e] in crews or self.bot.granblue['gbfgcrew'][e] in blacklist: continue
-            crews.append(self.bot.granblue['gbfgcrew'][e])
-        tosort = {}
-        possible = {11:"Total Day 4", 9:"Total Day 3", 7:"Total Day 2", 5:"Total Day 1", 3:"Total Prelim."}
-        gwid = None
-        for c in crews:
-            data = await self.searchGWDBCrew(ctx, int(c), 2)
-            if data is None or data[1] is None or 'result' not in data[1] or len(data[1]['result']) == 0:
-                continue
-            result = data[1]['result'][0]
-            if gwid is None: gwid = data[1].get('gw', None)
-            for ps in possible:
-                if result[ps] is not None:
-                    if ps == 11 and result[0] is not None:
-                        tosort[c] = [c, result[2], int(result[ps]), str(result[0])] # id, name, honor, rank
-                        break
+        await self.readyGWDB(ctx)
+        if self.dbs[1].state == True and (self.leaderboard is None or self.leaderboard[0] != self.dbs[1].version): # computed once per GW.sql
+            crews = []
+            blacklist = ["677159", "147448"]
+            for e in self.bot.granblue['gbfgcrew']:
+                if self.bot.granblue['gbfgcrew'][e] in crews or self.bot.granblue['gbfgcrew'][e] in blacklist: continue
+                crews.append(self.bot.granblue['gbfgcrew'][e])
+            possible = {11:"Total Day 4", 9:"Total Day 3", 7:"Total Day 2", 5:"Total Day 1", 3:"Total Prelim."}
+            try:
+                sorted = []
+                for r in self.queryGWDBCrewScores(1, crews):
+                    if r[3] == 11 and r[2] is not None:
+                        sorted.append([r[0], r[1], int(r[4]), str(r[2])]) # id, name, honor, rank
                     else:
-                        tosort[c] = [c, result[2], int(result[ps]), possible[ps]] # id, name, honor, day
-                        break
-        sorted = []
-        for c in tosort:
-            inserted = False
-            for i in range(0, len(sorted)):
-                if tosort[c][2] > sorted[i][2]:
-                    inserted = True
-                    sorted.insert(i, tosort[c])
-                    break
-            if not inserted: sorted.append(tosort[c])
+                        sorted.append([r[0], r[1], int(r[4]), possible[r[3]]]) # id, name, honor, day
+                self.leaderboard = [self.dbs[1].version, self.dbs[1].info['gwid'], sorted]
+            except Exception as e:
+                await self.bot.sendError('gbfgranking', str(e))
+        if self.leaderboard is None:
+            gwid = None
+            sorted = []
+        else:
+            gwid, sorted = self.leaderboard[1:]
         fields = []
         if gwid is None: gwid = ""
         for i in range(0, len(sorted)):
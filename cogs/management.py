@@ -36,10 +36,10 @@ class Management(commands.Cog):
         if prefix_string == '$':
             if id in self.bot.prefixes:
                 self.bot.prefixes.pop(id)
-                self.bot.savePending = True
+                self.bot.markDirty('prefixes')
         else:
             self.bot.prefixes[id] = prefix_string
-            self.bot.savePending = True
+            self.bot.markDirty('prefixes')
         await ctx.send(embed=self.bot.buildEmbed(title=ctx.guild.name, description="Server Prefix changed to `{}`".format(prefix_string), color=self.color))
 
     @commands.command(no_pm=True, cooldown_after_parsing=True, aliases=['bug', 'report', 'bug_report'])
@@ -70,7 +70,7 @@ class Management(commands.Cog):
         id = str(ctx.guild.id)
         if id in self.bot.st:
             self.bot.st.pop(id)
-            self.bot.savePending = True
+            self.bot.markDirty('st')
             await ctx.message.add_reaction('✅') # white check mark
         else:
             await ctx.send(embed=self.bot.buildEmbed(title=ctx.guild.name, description="No ST set on this server\nI can't delete.", thumbnail=ctx.guild.icon_url, color=self.color))
@@ -83,7 +83,7 @@ class Management(commands.Cog):
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="Values must be between 0 and 23 included", color=self.color))
             return
         self.bot.st[str(ctx.message.author.guild.id)] = [st1, st2]
-        self.bot.savePending = True
+        self.bot.markDirty('st')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True, cooldown_after_parsing=True, aliases=['banspark'])
@@ -95,7 +95,7 @@ class Management(commands.Cog):
         id = str(member.id)
         if id not in self.bot.spark[1]:
             self.bot.spark[1].append(id)
-            self.bot.savePending = True
+            self.bot.markDirty('spark')
             await ctx.send(embed=self.bot.buildEmbed(title="{} ▫️ {}".format(member.display_name, id), description="Banned from all roll rankings by {}".format(ctx.author.display_name), thumbnail=member.avatar_url, color=self.color, footer=ctx.guild.name))
             await self.bot.send('debug', embed=self.bot.buildEmbed(title="{} ▫️ {}".format(member.display_name, id), description="Banned from all roll rankings by {}".format(ctx.author.display_name), thumbnail=member.avatar_url, color=self.color, footer=ctx.guild.name))
         else:
@@ -106,11 +106,11 @@ class Management(commands.Cog):
     async def setGW(self, ctx, id : int, element : str, day : int, month : int, year : int):
         """Set the GW date ((You) Mod only)"""
         try:
-            # stop the task
-            self.bot.cancelTask('check_buff')
+            # stop the buff calls
+            self.bot.get_cog('GW').cancelGWBuff()
             self.bot.gw['state'] = False
             self.bot.gw['id'] = id
-            self.bot.gw['ranking'] = ""
+            self.bot.get_cog('GW').resetRankings()
             self.bot.gw['element'] = element.lower()
             # build the calendar
             self.bot.gw['dates'] = {}
@@ -170,15 +170,15 @@ class Management(commands.Cog):
             self.bot.gw['buffs'].append([self.bot.gw['dates']["Day 4"]+timedelta(seconds=54000), True, True, False, False])
             # set the gw state to true
             self.bot.gw['state'] = True
-            self.bot.savePending = True
-            self.bot.runTask('check_buff', self.bot.get_cog('GW').checkGWBuff)
+            self.bot.markDirty('gw')
+            self.bot.get_cog('GW').scheduleGWBuff()
             await ctx.send(embed=self.bot.buildEmbed(title="{} Guild War Mode".format(self.bot.getEmote('gw')), description="Set to : **{:%m/%d %H:%M}**".format(self.bot.gw['dates']["Preliminaries"]), color=self.color))
         except Exception as e:
-            self.bot.cancelTask('check_buff')
+            self.bot.get_cog('GW').cancelGWBuff()
             self.bot.gw['dates'] = {}
             self.bot.gw['buffs'] = []
             self.bot.gw['state'] = False
-            self.bot.savePending = True
+            self.bot.markDirty('gw')
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="An unexpected error occured", footer=str(e), color=self.color))
             await self.bot.sendError('setgw', str(e))
 
@@ -187,9 +187,9 @@ class Management(commands.Cog):
     async def disableGW(self, ctx):
         """Disable the GW mode ((You) Mod only)
         It doesn't delete the GW settings"""
-        self.bot.cancelTask('check_buff')
+        self.bot.get_cog('GW').cancelGWBuff()
         self.bot.gw['state'] = False
-        self.bot.savePending = True
+        self.bot.markDirty('gw')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True, cooldown_after_parsing=True)
@@ -200,8 +200,8 @@ class Management(commands.Cog):
             await ctx.send(embed=self.bot.buildEmbed(title="{} Guild War Mode".format(self.bot.getEmote('gw')), description="Already enabled", color=self.color))
         elif len(self.bot.gw['dates']) == 8:
             self.bot.gw['state'] = True
-            self.bot.runTask('check_buff', self.bot.get_cog('GW').checkGWBuff)
-            self.bot.savePending = True
+            self.bot.get_cog('GW').scheduleGWBuff()
+            self.bot.markDirty('gw')
             await ctx.message.add_reaction('✅') # white check mark
         else:
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="No Guild War available in my memory", color=self.color))
@@ -212,7 +212,7 @@ class Management(commands.Cog):
         """The bot will skip the next GW buff call ((You) Mod only)"""
         if not self.bot.gw['skip']:
             self.bot.gw['skip'] = True
-            self.bot.savePending = True
+            self.bot.markDirty('gw')
             await ctx.message.add_reaction('✅') # white check mark
         else:
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="I'm already skipping the next set of buffs", color=self.color))
@@ -223,7 +223,7 @@ class Management(commands.Cog):
         """Cancel the GW buff call skipping ((You) Mod only)"""
         if self.bot.gw['skip']:
             self.bot.gw['skip'] = False
-            self.bot.savePending = True
+            self.bot.markDirty('gw')
             await ctx.message.add_reaction('✅') # white check mark
         else:
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="No buff skip is currently set", color=self.color))
@@ -240,7 +240,7 @@ class Management(commands.Cog):
         for i in range(0, len(self.bot.permitted[gid])):
             if self.bot.permitted[gid][i] == cid:
                 self.bot.permitted[gid].pop(i)
-                self.bot.savePending = True
+                self.bot.markDirty('permitted')
                 try:
                     await self.bot.callCommand(ctx, 'seeBotPermission', 'Management')
                 except Exception as e:
@@ -248,7 +248,7 @@ class Management(commands.Cog):
                 await ctx.message.add_reaction('➖')
                 return
         self.bot.permitted[gid].append(cid)
-        self.bot.savePending = True
+        self.bot.markDirty('permitted')
         await ctx.message.add_reaction('➕')
         try:
             await self.bot.callCommand(ctx, 'seeBotPermission', 'Management')
@@ -262,7 +262,7 @@ class Management(commands.Cog):
         gid = str(ctx.guild.id)
         if gid in self.bot.permitted:
             self.bot.permitted.pop(gid)
-            self.bot.savePending = True
+            self.bot.markDirty('permitted')
             await ctx.send(embed=self.bot.buildEmbed(title="Commands are now sauthorized everywhere", thumbnail=ctx.guild.icon_url, footer=ctx.guild.name + " ▫️ " + str(ctx.guild.id), color=self.color))
         else:
             await ctx.send(embed=self.bot.buildEmbed(title="Commands are already sauthorized everywhere", thumbnail=ctx.guild.icon_url, footer=ctx.guild.name + " ▫️ " + str(ctx.guild.id), color=self.color))
@@ -296,7 +296,7 @@ class Management(commands.Cog):
         for i in range(0, len(self.bot.news[gid])):
             if self.bot.news[gid][i] == cid:
                 self.bot.news[gid].pop(i)
-                self.bot.savePending = True
+                self.bot.markDirty('news')
                 try:
                     await self.bot.callCommand(ctx, 'seeBroadcast', 'Management')
                 except Exception as e:
@@ -304,7 +304,7 @@ class Management(commands.Cog):
                 await ctx.message.add_reaction('➖')
                 return
         self.bot.news[gid].append(cid)
-        self.bot.savePending = True
+        self.bot.markDirty('news')
         await ctx.message.add_reaction('➕')
         try:
             await self.bot.callCommand(ctx, 'seeBroadcast', 'Management')
@@ -333,4 +333,4 @@ class Management(commands.Cog):
     @commands.cooldown(1, 10, commands.BucketType.guild)
     async def status(self, ctx):
         """Post the bot status"""
-        await ctx.send(embed=self.bot.buildEmbed(title="{} ▫️ v{}".format(ctx.guild.me.display_name, self.bot.botversion), description="**Uptime**▫️{}\n**CPU**▫️{}%\n**Memory**▫️{}MB\n**Save Pending**▫️{}\n**Errors since boot**▫️{}\n**Tasks Count**▫️{}\n**Servers Count**▫️{}\n**Pending Servers**▫️{}\n**Cogs Loaded**▫️{}/{}".format(self.bot.uptime(), self.bot.process.cpu_percent(), self.bot.process.memory_full_info().uss >> 20, self.bot.savePending, self.bot.errn, len(asyncio.all_tasks()), len(self.bot.guilds), len(self.bot.newserver['pending']), len(self.bot.cogs), self.bot.cogn), thumbnail=ctx.guild.me.avatar_url, color=self.color))
\ No newline at end of file
+        await ctx.send(embed=self.bot.buildEmbed(title="{} ▫️ v{}".format(ctx.guild.me.display_name, self.bot.botversion), description="**Uptime**▫️{}\n**CPU**▫️{}%\n**Memory**▫️{}MB\n**Save Pending**▫️{}\n**Errors since boot**▫️{}\n**Tasks Count**▫️{}\n**Servers Count**▫️{}\n**Pending Servers**▫️{}\n**Cogs Loaded**▫️{}/{}".format(self.bot.uptime(), self.bot.process.cpu_percent(), self.bot.process.memory_full_info().uss >> 20, self.bot.saveStatus(), self.bot.errn, len(asyncio.all_tasks()), len(self.bot.guilds), len(self.bot.newserver['pending']), len(self.bot.cogs), self.bot.cogn), thumbnail=ctx.guild.me.avatar_url, color=self.color))
\ No newline at end of file
@@ -80,7 +80,7 @@ class Owner(commands.Cog):
         try:
             if id not in self.bot.newserver['servers']:
                 self.bot.newserver['servers'].append(id)
-                self.bot.savePending = True
+                self.bot.markDirty('newserver')
             try:
                 toleave = self.bot.get_guild(id)
                 await toleave.leave()
@@ -99,7 +99,7 @@ class Owner(commands.Cog):
         try:
             if id not in self.bot.newserver['owners']:
                 self.bot.newserver['owners'].append(id)
-                self.bot.savePending = True
+                self.bot.markDirty('newserver')
             for g in self.bot.guilds:
                 try:
                     if str(g.owner.id) == id:
@@ -119,7 +119,7 @@ class Owner(commands.Cog):
         try:
             if sid in self.bot.newserver['pending']:
                 self.bot.newserver['pending'].pop(sid)
-                self.bot.savePending = True
+                self.bot.markDirty('newserver')
                 guild = self.bot.get_guild(id)
                 if guild:
                     await guild.owner.send(embed=self.bot.buildEmbed(title="I'm now available for use in {}".format(guild.name), description="Use `$help` for my list of commands, `$help Management` for mod only commands.\nUse `$setPrefix` to change the command prefix (default: `$`)\nIf you encounter an issue, use `$bug_report` and describe the problem.\nIf I'm down or slow, I might be rebooting, in maintenance or Discord itself might be acting up.", thumbnail=guild.icon_url))
@@ -136,7 +136,7 @@ class Owner(commands.Cog):
         try:
             if id in self.bot.newserver['pending']:
                 self.bot.newserver['pending'].pop(id)
-                self.bot.savePending = True
+                self.bot.markDirty('newserver')
                 guild = self.bot.get_guild(id)
                 if guild:
                     await guild.leave()
@@ -156,13 +156,14 @@ class Owner(commands.Cog):
     @isOwner()
     async def _load(self, ctx, drive : str = ""):
         """Command to reload the bot settings (Owner only)"""
-        self.bot.cancelTask('check_buff')
+        self.bot.get_cog('GW').cancelGWBuff()
         if drive == 'drive': 
-            if not self.bot.drive.load():
+            if not await self.bot.callThread(self.bot.drive.load):
                 await self.bot.send('debug', embed=self.bot.buildEmbed(title=ctx.guild.me.name, description="Failed to retrieve save.json on the Google Drive", color=self.color))
         if self.bot.load():
             self.bot.savePending = False
-            self.bot.runTask('check_buff', self.bot.get_cog('GW').checkGWBuff)
+            self.bot.get_cog('GW').scheduleGWBuff()
+            self.bot.runTask('reminder', self.bot.get_cog('General').remindertask) # rebuild the reminder queue
             await self.bot.send('debug', embed=self.bot.buildEmbed(title=ctx.guild.me.name, description="save.json reloaded", color=self.color))
         else:
             await self.bot.send('debug', embed=self.bot.buildEmbed(title=ctx.guild.me.name, description="save.json loading failed", color=self.color))
@@ -188,8 +189,58 @@ class Owner(commands.Cog):
             if b[3]: msg += '[Warning] '
             if b[4]: msg += '[Double duration] '
             msg += '\n'
+        msg += '{} call(s) scheduled'.format(len(self.bot.scheduler.pending('gwbuff')))
         await self.bot.send('debug', embed=self.bot.buildEmbed(title="{} Guild War (You) Buff debug check".format(self.bot.getEmote('gw')), description=msg, color=self.color))
 
+    @commands.command(no_pm=True, aliases=['caches'])
+    @isOwner()
+    async def cache(self, ctx, name : str = ""):
+        """List the caches or clear one (Owner only)"""
+        if name != "":
+            if name not in self.bot.caches:
+                await ctx.message.add_reaction('❎') # white negative mark
+                return
+            self.bot.caches[name].clear()
+        msg = ""
+        for n in self.bot.caches:
+            msg += "**{}** ▫️ {}\n".format(n, self.bot.caches[n].status())
+        if msg == "": msg = "No caches"
+        await ctx.message.add_reaction('✅') # white check mark
+        await self.bot.send('debug', embed=self.bot.buildEmbed(title="Caches", description=msg, color=self.color))
+
+    @commands.command(no_pm=True, aliases=['http'])
+    @isOwner()
+    async def webstats(self, ctx):
+        """Statistics of the HTTP requests (Owner only)"""
+        await ctx.message.add_reaction('✅') # white check mark
+        await self.bot.send('debug', embed=self.bot.buildEmbed(title="HTTP requests", description=self.bot.web.status(), color=self.color))
+
+    @commands.command(no_pm=True, aliases=['onmessage'])
+    @isOwner()
+    async def callbacks(self, ctx):
+        """Statistics of the on message callbacks (Owner only)"""
+        await ctx.message.add_reaction('✅') # white check mark
+        await self.bot.send('debug', embed=self.bot.buildEmbed(title="On message callbacks", description=self.bot.callbackStatus(), color=self.color))
+
+    @commands.command(no_pm=True, aliases=['perf'])
+    @isOwner()
+    async def metrics(self, ctx, option : str = ""):
+        """Latency statistics (Owner only)
+        Options: "save" to append them to metrics.json, "reset" to clear them, "debug" to toggle the slow callback detection"""
+        option = option.lower()
+        if option == 'save':
+            try:
+                await self.bot.callWorker(self.bot.metrics.write, self.bot.metrics.dump())
+            except Exception as e:
+                await self.bot.sendError('metrics', str(e))
+                return
+        elif option == 'reset':
+            self.bot.metrics.reset()
+        elif option == 'debug':
+            self.bot.metrics.setDebug(not self.bot.metrics.debug)
+        await ctx.message.add_reaction('✅') # white check mark
+        await self.bot.send('debug', embed=self.bot.buildEmbed(title="Metrics", description=self.bot.metrics.status(), color=self.color))
+
     @commands.command(no_pm=True)
     @isOwner()
     async def setMaintenance(self, ctx, day : int, month : int, hour : int, duration : int):
@@ -198,7 +249,7 @@ class Owner(commands.Cog):
             self.bot.maintenance['time'] = datetime.now().replace(month=month, day=day, hour=hour, minute=0, second=0, microsecond=0)
             self.bot.maintenance['duration'] = duration
             self.bot.maintenance['state'] = True
-            self.bot.savePending = True
+            self.bot.markDirty('maintenance')
             await ctx.message.add_reaction('✅') # white check mark
         except Exception as e:
             await self.bot.sendError('setmaintenance', str(e))
@@ -208,7 +259,7 @@ class Owner(commands.Cog):
     async def delMaintenance(self, ctx):
         """Delete the maintenance date (Owner only)"""
         self.bot.maintenance = {"state" : False, "time" : None, "duration" : 0}
-        self.bot.savePending = True
+        self.bot.markDirty('maintenance')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True, aliases=['as'])
@@ -221,7 +272,7 @@ class Owner(commands.Cog):
         for s in strs:
             self.bot.stream['content'].append(s)
             msg += "`" + s + "`\n"
-        self.bot.savePending = True
+        self.bot.markDirty('stream')
         await ctx.send(embed=self.bot.buildEmbed(title="Stream Settings", description="Appended the following lines:\n" + msg, color=self.color))
 
     @commands.command(no_pm=True, aliases=['sst'])
@@ -231,7 +282,7 @@ class Owner(commands.Cog):
         The text needs to contain {} for the cooldown to show up"""
         try:
             self.bot.stream['time'] = datetime.now().replace(year=year, month=month, day=day, hour=hour, minute=0, second=0, microsecond=0)
-            self.bot.savePending = True
+            self.bot.markDirty('stream')
             await ctx.message.add_reaction('✅') # white check mark
         except Exception as e:
             await self.bot.sendError('setstreamtime', str(e))
@@ -242,7 +293,7 @@ class Owner(commands.Cog):
         """Clear the stream command text (Owner only)"""
         self.bot.stream['content'] = []
         self.bot.stream['time'] = None
-        self.bot.savePending = True
+        self.bot.markDirty('stream')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True, aliases=['dsl'])
@@ -259,7 +310,7 @@ class Owner(commands.Cog):
             msg = ""
             for i in range(0, many):
                 msg += self.bot.stream['content'].pop(line) + "\n"
-            self.bot.savePending = True
+            self.bot.markDirty('stream')
             await ctx.send(embed=self.bot.buildEmbed(title="Stream Settings", description="Removed the following lines:\n" + msg, color=self.color))
         else:
             await ctx.send(embed=self.bot.buildEmbed(title="Error", description="Invalid line number", color=self.color))
@@ -270,7 +321,7 @@ class Owner(commands.Cog):
         """Set the GBF schedule for the month (Owner only)
         Use ; to separate elements"""
         self.bot.schedule = txt.split(';')
-        self.bot.savePending = True
+        self.bot.markDirty('schedule')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True)
@@ -287,7 +338,7 @@ class Owner(commands.Cog):
         id = str(id)
         if id not in self.bot.spark[1]:
             self.bot.spark[1].append(id)
-            self.bot.savePending = True
+            self.bot.markDirty('spark')
             await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True, aliases=['unbanspark'])
@@ -301,7 +352,7 @@ class Owner(commands.Cog):
             while i < len(self.bot.spark[1]):
                 if id == self.bot.spark[1][i]: self.bot.spark[1].pop(i)
                 else: i += 1
-            self.bot.savePending = True
+            self.bot.markDirty('spark')
             await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True)
@@ -315,7 +366,7 @@ class Owner(commands.Cog):
                 self.bot.spark[0].pop(k)
                 count += 1
         if count > 0:
-            self.bot.savePending = True
+            self.bot.markDirty('spark')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True)
@@ -356,11 +407,11 @@ class Owner(commands.Cog):
         for k in list(self.bot.permitted.keys()):
             if k not in guild_ids:
                 self.bot.permitted.pop(k)
-                self.bot.savePending = True
+                self.bot.markDirty('permitted')
         for k in list(self.bot.news.keys()):
             if k not in guild_ids or len(self.bot.news[k]) == 0:
                 self.bot.news.pop(k)
-                self.bot.savePending = True
+                self.bot.markDirty('news')
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True)
@@ -383,8 +434,8 @@ class Owner(commands.Cog):
     @commands.command(no_pm=True)
     @isOwner()
     async def newgwtask(self, ctx):
-        """Start a new checkGWBuff() task (Owner only)"""
-        self.bot.runTask('check_buff', self.bot.get_cog('GW').checkGWBuff)
+        """Reschedule the GW buff calls (Owner only)"""
+        self.bot.get_cog('GW').scheduleGWBuff()
         await ctx.message.add_reaction('✅') # white check mark
 
     @commands.command(no_pm=True)